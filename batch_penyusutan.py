@@ -0,0 +1,329 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from page.susutio import SUPPORTED_EXTENSIONS, file_extension
+from page.enginebulanan import (
+    REPORTING_DATE,
+    EXPORT_MODES,
+    EXPORT_MODE_SHEET_PER_ASSET,
+    MONEY_MODES,
+    MONEY_MODE_FLOAT,
+    SPILL_MIN_ROWS,
+    available_cpu_count,
+    normalize_reporting_dates,
+    run_depreciation_file,
+)
+from page.susuttrace import TRACE_FORMATS, TRACE_FORMAT_JSONL, parse_trace_codes
+
+
+# =========================================================
+# RUNNER PENYUSUTAN BULANAN TANPA UI (BARIS PERINTAH)
+# =========================================================
+# Contoh (cron):
+#   python batch_penyusutan.py /data/register --output /data/kkp --workers 8
+#
+# Kode keluar:
+#   0 = semua file berhasil
+#   1 = sebagian / semua file gagal diproses
+#   2 = argumen tidak valid atau tidak ada file input
+
+EXIT_OK = 0
+EXIT_FILE_FAILED = 1
+EXIT_USAGE = 2
+
+logger = logging.getLogger("batch_penyusutan")
+
+
+def find_input_files(paths):
+    files = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            # Ekstensi dicocokkan tanpa membedakan huruf (.XLSX, .Csv)
+            # lewat file_extension di bawah
+            files.extend(item for item in glob.glob(os.path.join(path, "*")) if os.path.isfile(item))
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            logger.warning("Input tidak ditemukan: %s", path)
+
+    # File kunci Excel (~$nama.xlsx) dan duplikat diabaikan
+    unique = []
+
+    for path in sorted(files):
+        name = os.path.basename(path)
+
+        if name.startswith("~$") or file_extension(name) not in SUPPORTED_EXTENSIONS:
+            continue
+
+        if os.path.abspath(path) not in [os.path.abspath(p) for p in unique]:
+            unique.append(path)
+
+    return unique
+
+
+def process_one_file(
+    input_path,
+    output_dir,
+    reporting_dates,
+    parallel,
+    max_workers,
+    export_mode,
+    money_mode=MONEY_MODE_FLOAT,
+    spill_threshold_rows=SPILL_MIN_ROWS,
+    with_rollups=False,
+    trace_codes=None,
+    trace_format=TRACE_FORMAT_JSONL
+):
+    try:
+        return run_depreciation_file(
+            input_path,
+            output_dir,
+            reporting_dates=reporting_dates,
+            parallel=parallel,
+            max_workers=max_workers,
+            export_mode=export_mode,
+            money_mode=money_mode,
+            spill_threshold_rows=spill_threshold_rows,
+            with_rollups=with_rollups,
+            trace_codes=trace_codes,
+            trace_format=trace_format
+        )
+    except Exception as e:
+        return failed_summary(input_path, e)
+
+
+def failed_summary(input_path, error):
+    return {
+        "file": os.path.abspath(input_path),
+        "status": "gagal",
+        "error": f"{type(error).__name__}: {error}",
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=(
+            "Hitung penyusutan bulanan untuk satu atau banyak file register aset "
+            "dan tulis workbook KKP + ringkasan JSON per file."
+        ),
+        epilog="Kode keluar: 0 = semua berhasil, 1 = ada file gagal, 2 = argumen/input tidak valid.",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help=f"File register atau folder berisi file ({', '.join(SUPPORTED_EXTENSIONS)}).",
+    )
+    parser.add_argument(
+        "-o", "--output",
+        required=True,
+        help="Folder tujuan workbook KKP dan ringkasan JSON.",
+    )
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=available_cpu_count(),
+        help="Jumlah proses paralel (default: jumlah core).",
+    )
+    parser.add_argument(
+        "--tanggal",
+        default=REPORTING_DATE.strftime("%Y-%m-%d"),
+        help="Tanggal pelaporan snapshot, pisahkan dengan koma (akhir bulan, maks. REPORTING_DATE).",
+    )
+    parser.add_argument(
+        "--format-detail",
+        choices=EXPORT_MODES,
+        default=EXPORT_MODE_SHEET_PER_ASSET,
+        help=(
+            "sheet_per_aset = satu sheet per Kode Aset (format KKP); detail_panjang = satu "
+            "sheet Detail berformat tabel + sheet per aset anomali (jauh lebih cepat)."
+        ),
+    )
+    parser.add_argument(
+        "--aritmetika",
+        choices=MONEY_MODES,
+        default=MONEY_MODE_FLOAT,
+        help=(
+            "float = aritmetika float (bawaan); sen = fixed-point int64 per sen dengan "
+            "pembulatan setengah ke atas dan sisa sen dialokasikan tepat di bulan terakhir."
+        ),
+    )
+    parser.add_argument(
+        "--spill-baris",
+        type=int,
+        default=SPILL_MIN_ROWS,
+        help=(
+            "Jadwal dengan perkiraan baris (aset x bulan) >= nilai ini disimpan ke disk "
+            "sebagai file memory-mapped (lihat AUDITAPP_SPILL_DIR); 0 = selalu ke disk."
+        ),
+    )
+    parser.add_argument(
+        "--rekap",
+        action="store_true",
+        help=(
+            "Tambahkan sheet Rekap Semesteran dan Rekap Tahunan yang diturunkan dari "
+            "jadwal bulanan (tanpa menghitung ulang per periode)."
+        ),
+    )
+    parser.add_argument(
+        "--lacak",
+        default="",
+        help=(
+            "Kode Aset yang dilacak per bulan, pisahkan dengan koma atau titik koma; "
+            "trace ditulis ke <nama>_trace.<format-lacak> di folder output."
+        ),
+    )
+    parser.add_argument(
+        "--format-lacak",
+        choices=TRACE_FORMATS,
+        default=TRACE_FORMAT_JSONL,
+        help="jsonl = satu objek JSON per baris; npz = biner ringkas (numpy).",
+    )
+    parser.add_argument(
+        "--log-file",
+        help="Tulis log juga ke file ini (selain stderr).",
+    )
+
+    return parser.parse_args(argv)
+
+
+def setup_logging(log_file=None):
+    handlers = [logging.StreamHandler(sys.stderr)]
+
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+        handlers=handlers,
+    )
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(args.log_file)
+
+    try:
+        reporting_dates = normalize_reporting_dates([
+            text.strip() for text in args.tanggal.split(",") if text.strip()
+        ])
+    except ValueError as e:
+        logger.error("%s", e)
+        return EXIT_USAGE
+
+    if args.workers < 1:
+        logger.error("--workers minimal 1")
+        return EXIT_USAGE
+
+    trace_codes = parse_trace_codes(args.lacak)
+    files = find_input_files(args.inputs)
+
+    if not files:
+        logger.error("Tidak ada file input yang dapat diproses.")
+        return EXIT_USAGE
+
+    os.makedirs(args.output, exist_ok=True)
+
+    # Satu file: paralel di dalam file (per blok aset).
+    # Banyak file: paralel antar file, tiap file dihitung dalam satu proses.
+    single_file = len(files) == 1
+    started = time.perf_counter()
+    summaries = []
+
+    logger.info(
+        "Mulai: %d file, %d worker, tanggal pelaporan %s",
+        len(files),
+        args.workers,
+        ", ".join(d.strftime("%d/%m/%Y") for d in reporting_dates)
+    )
+
+    if single_file or args.workers == 1:
+        for path in files:
+            summary = process_one_file(
+                path, args.output, reporting_dates,
+                parallel=single_file and args.workers > 1,
+                max_workers=args.workers,
+                export_mode=args.format_detail,
+                money_mode=args.aritmetika,
+                spill_threshold_rows=args.spill_baris,
+                with_rollups=args.rekap,
+                trace_codes=trace_codes,
+                trace_format=args.format_lacak
+            )
+            log_summary(summary)
+            summaries.append(summary)
+    else:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(files))) as executor:
+            futures = {
+                executor.submit(
+                    process_one_file, path, args.output, reporting_dates, False, None,
+                    args.format_detail, args.aritmetika, args.spill_baris,
+                    args.rekap, trace_codes, args.format_lacak
+                ): path
+                for path in files
+            }
+
+            for future in as_completed(futures):
+                # Worker yang mati (mis. kehabisan memori -> BrokenProcessPool)
+                # tidak menghentikan run: file dicatat gagal dan ringkasan
+                # run tetap ditulis
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    summary = failed_summary(futures[future], e)
+
+                log_summary(summary)
+                summaries.append(summary)
+
+    summaries.sort(key=lambda item: item["file"])
+    failed = [item for item in summaries if item["status"] != "ok"]
+
+    run_summary = {
+        "jumlah_file": len(summaries),
+        "berhasil": len(summaries) - len(failed),
+        "gagal": len(failed),
+        "waktu_detik": round(time.perf_counter() - started, 3),
+        "file": summaries,
+    }
+
+    with open(os.path.join(args.output, "ringkasan_run.json"), "w", encoding="utf-8") as f:
+        json.dump(run_summary, f, ensure_ascii=False, indent=2)
+
+    logger.info(
+        "Selesai: %d berhasil, %d gagal, %.1f detik",
+        run_summary["berhasil"],
+        run_summary["gagal"],
+        run_summary["waktu_detik"]
+    )
+
+    return EXIT_FILE_FAILED if failed else EXIT_OK
+
+
+def log_summary(summary):
+    name = os.path.basename(summary["file"])
+
+    if summary["status"] != "ok":
+        logger.error("%s: GAGAL - %s", name, summary["error"])
+        return
+
+    timings = summary["waktu_detik"]
+
+    logger.info(
+        "%s: %d aset diproses, %d dilewati, %d anomali | %s",
+        name,
+        summary["jumlah_diproses"],
+        summary["jumlah_dilewati"],
+        summary["jumlah_anomali"],
+        " ".join(f"{stage}={seconds:.2f}s" for stage, seconds in timings.items())
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
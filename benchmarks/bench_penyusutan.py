@@ -0,0 +1,324 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generate_register import generate_register_file
+
+
+# =========================================================
+# BENCHMARK MESIN PENYUSUTAN (BULANAN / SEMESTERAN / TAHUNAN)
+# =========================================================
+# Setiap kombinasi mesin x ukuran dijalankan di proses baru agar memori
+# puncak (ru_maxrss) tidak tercampur antar kasus. Tahap yang diukur:
+# load, prepare, compute, export. Hasil ditulis ke JSON untuk dibandingkan
+# antar run (opsi --baseline).
+#
+# Contoh:
+#   python -m benchmarks.bench_penyusutan --sizes 1000,10000 --output bench.json
+#   python -m benchmarks.bench_penyusutan --sizes 1000 --baseline bench.json
+
+ENGINES = ["bulanan", "semesteran", "tahunan"]
+DEFAULT_SIZES = "1000,10000,100000,1000000"
+STAGES = ["load", "prepare", "compute", "export"]
+
+# Export membuat satu sheet per aset; di atas batas ini tahap export dilewati
+DEFAULT_EXPORT_LIMIT = 10000
+
+
+def _peak_rss_mb():
+    # ru_maxrss: KB di Linux, byte di macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _measure(stages, name, func, *args, **kwargs):
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    value = func(*args, **kwargs)
+    stages[name] = {
+        "wall_s": round(time.perf_counter() - wall_start, 4),
+        "cpu_s": round(time.process_time() - cpu_start, 4),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+    return value
+
+
+def _run_bulanan(path, export_path, stages):
+    from page import enginebulanan as engine
+
+    assets_df, caps_df, corrs_df, _, _ = _measure(stages, "load", engine.read_register_file, path)
+    assets_df, caps_df, corrs_df = _measure(
+        stages, "prepare", engine.prepare_input_data, assets_df, caps_df, corrs_df
+    )
+    processed = _measure(
+        stages, "compute", engine.compute_depreciation_chunk, assets_df, caps_df, corrs_df
+    )
+
+    if export_path:
+        _measure(
+            stages, "export", engine.write_kkp_workbook_streaming,
+            export_path,
+            processed["results"],
+            processed["schedule_store"],
+            skipped_rows=processed["skipped_rows"],
+            anomaly_rows=processed["anomaly_rows"],
+            total_rows=processed["total_rows"]
+        )
+
+    return len(processed["results"])
+
+
+def _run_page_engine(page, path, export_path, stages):
+    # Halaman semesteran / tahunan: load_input_sheets -> prepare_input_data
+    # -> compute_depreciation -> convert_df_to_excel_with_sheets halaman itu
+    # (mesin bulanan memakai write_kkp_workbook_streaming, lihat _run_bulanan)
+    assets_df, caps_df, corrs_df = _measure(stages, "load", page.load_input_sheets, path)
+    assets_df, caps_df, corrs_df = _measure(
+        stages, "prepare", page.prepare_input_data, assets_df, caps_df, corrs_df
+    )
+
+    # Ketiga mesin berjalan di kernel bersama page.susutcore.depreciation_kernel
+    results, schedules = _measure(
+        stages, "compute", page.compute_depreciation, assets_df, caps_df, corrs_df
+    )
+
+    if export_path:
+        content = _measure(stages, "export", page.convert_df_to_excel_with_sheets, results, schedules)
+
+        if hasattr(content, "getvalue"):
+            content = content.getvalue()
+
+        with open(export_path, "wb") as f:
+            f.write(content)
+
+    return len(results)
+
+
+def run_case(engine_name, path, export_path):
+    stages = {}
+
+    if engine_name == "bulanan":
+        processed = _run_bulanan(path, export_path, stages)
+    elif engine_name == "semesteran":
+        from page import batchsemesteran
+        processed = _run_page_engine(batchsemesteran, path, export_path, stages)
+    else:
+        from page import batchglyearly
+        processed = _run_page_engine(batchglyearly, path, export_path, stages)
+
+    return {"stages": stages, "jumlah_diproses": processed}
+
+
+def _run_case_isolated(engine_name, path, export_path):
+    context = multiprocessing.get_context("spawn")
+
+    with context.Pool(1) as pool:
+        return pool.apply(run_case, (engine_name, path, export_path))
+
+
+def _dataset_path(data_dir, layout, n_assets, event_density, messy_dates, seed):
+    name = f"{layout}_{n_assets}_d{event_density}_s{seed}{'_messy' if messy_dates else ''}.xlsx"
+    return os.path.join(data_dir, name)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(
+    sizes,
+    engines=ENGINES,
+    event_density=0.3,
+    messy_dates=True,
+    seed=0,
+    data_dir=None,
+    export_limit=DEFAULT_EXPORT_LIMIT,
+    log=print
+):
+    data_dir = data_dir or os.path.join(tempfile.gettempdir(), "auditapp_bench")
+    os.makedirs(data_dir, exist_ok=True)
+    export_dir = tempfile.mkdtemp(prefix="export_", dir=data_dir)
+
+    cases = []
+
+    for n_assets in sizes:
+        for engine_name in engines:
+            path = _dataset_path(data_dir, engine_name, n_assets, event_density, messy_dates, seed)
+
+            if not os.path.exists(path):
+                log(f"Membuat register {engine_name} {n_assets} aset -> {path}")
+                generate_start = time.perf_counter()
+                generate_register_file(
+                    path,
+                    n_assets,
+                    layout=engine_name,
+                    event_density=event_density,
+                    messy_dates=messy_dates,
+                    seed=seed
+                )
+                log(f"  selesai dalam {time.perf_counter() - generate_start:.1f} detik")
+
+            export_path = None
+
+            if n_assets <= export_limit:
+                export_path = os.path.join(export_dir, f"{engine_name}_{n_assets}.xlsx")
+
+            log(f"Menjalankan {engine_name} {n_assets} aset...")
+
+            try:
+                outcome = _run_case_isolated(engine_name, path, export_path)
+                status = "ok"
+            except Exception as e:
+                outcome = {"stages": {}, "error": f"{type(e).__name__}: {e}"}
+                status = "gagal"
+
+            case = {
+                "engine": engine_name,
+                "jumlah_aset": n_assets,
+                "file": path,
+                "ukuran_file_mb": round(os.path.getsize(path) / (1024 * 1024), 2),
+                "status": status,
+                **outcome,
+            }
+
+            if export_path is None:
+                case["catatan"] = f"export dilewati (> {export_limit} aset)"
+
+            cases.append(case)
+            log(format_case(case))
+
+            if export_path and os.path.exists(export_path):
+                os.remove(export_path)
+
+    return {
+        "dibuat": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "lingkungan": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "parameter": {
+            "sizes": list(sizes),
+            "engines": list(engines),
+            "event_density": event_density,
+            "messy_dates": messy_dates,
+            "seed": seed,
+            "export_limit": export_limit,
+        },
+        "hasil": cases,
+    }
+
+
+def format_case(case):
+    if case["status"] != "ok":
+        return f"  {case['engine']:<10} {case['jumlah_aset']:>8}  GAGAL: {case['error']}"
+
+    parts = [
+        f"{stage}={case['stages'][stage]['wall_s']:.2f}s"
+        for stage in STAGES
+        if stage in case["stages"]
+    ]
+    peak = max((item["peak_rss_mb"] for item in case["stages"].values()), default=0)
+
+    return f"  {case['engine']:<10} {case['jumlah_aset']:>8}  {' '.join(parts)}  peak={peak:.0f}MB"
+
+
+def compare_with_baseline(report, baseline, log=print):
+    # Rasio waktu (run ini / baseline) per mesin, ukuran dan tahap
+    previous = {
+        (case["engine"], case["jumlah_aset"]): case
+        for case in baseline.get("hasil", [])
+        if case.get("status") == "ok"
+    }
+
+    log(f"Perbandingan dengan baseline {baseline.get('dibuat')} ({baseline.get('git_commit')}):")
+
+    for case in report["hasil"]:
+        old = previous.get((case["engine"], case["jumlah_aset"]))
+
+        if case["status"] != "ok" or old is None:
+            continue
+
+        ratios = []
+
+        for stage in STAGES:
+            if stage in case["stages"] and stage in old["stages"]:
+                before = old["stages"][stage]["wall_s"]
+                after = case["stages"][stage]["wall_s"]
+                ratios.append(f"{stage} x{after / before:.2f}" if before > 0 else f"{stage} -")
+
+        log(f"  {case['engine']:<10} {case['jumlah_aset']:>8}  {'  '.join(ratios)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark mesin penyusutan batch.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Jumlah aset, pisahkan dengan koma.")
+    parser.add_argument("--engines", default=",".join(ENGINES), help="bulanan,semesteran,tahunan")
+    parser.add_argument("--event-density", type=float, default=0.3)
+    parser.add_argument("--clean-dates", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="Folder cache register sintetis.")
+    parser.add_argument("--export-limit", type=int, default=DEFAULT_EXPORT_LIMIT)
+    parser.add_argument(
+        "-o", "--output",
+        default=f"bench_{datetime.now():%Y%m%d_%H%M%S}.json",
+        help="File JSON hasil."
+    )
+    parser.add_argument("--baseline", help="File JSON hasil run sebelumnya untuk dibandingkan.")
+    args = parser.parse_args(argv)
+
+    sizes = [int(text) for text in args.sizes.split(",") if text.strip()]
+    engines = [text.strip() for text in args.engines.split(",") if text.strip()]
+
+    unknown = [name for name in engines if name not in ENGINES]
+
+    if unknown:
+        parser.error(f"Mesin tidak dikenal: {', '.join(unknown)}")
+
+    report = run_benchmark(
+        sizes,
+        engines=engines,
+        event_density=args.event_density,
+        messy_dates=not args.clean_dates,
+        seed=args.seed,
+        data_dir=args.data_dir,
+        export_limit=args.export_limit
+    )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"Hasil ditulis ke {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare_with_baseline(report, json.load(f))
+
+    return 1 if any(case["status"] != "ok" for case in report["hasil"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+
+# =========================================================
+# GENERATOR REGISTER ASET SINTETIS (DATA ASET / KAPITALISASI / KOREKSI)
+# =========================================================
+# Layout mengikuti template masing-masing halaman batch:
+#   bulanan    -> Kode Aset, Tanggal Perolehan (format campur), dst.
+#   semesteran -> Nama Aset, Tanggal Perolehan dd/mm/yyyy, Tanggal Pelaporan
+#   tahunan    -> Nama Aset, Tahun Perolehan, Tahun Pelaporan
+#
+# Contoh:
+#   python -m benchmarks.generate_register --assets 10000 --layout bulanan -o reg_10k.xlsx
+
+LAYOUTS = ["bulanan", "semesteran", "tahunan"]
+SHEET_NAMES = ["Data Aset", "Kapitalisasi", "Koreksi"]
+
+USEFUL_LIVES = np.array([4, 5, 8, 10, 15, 20, 40, 50])
+USEFUL_LIFE_WEIGHTS = np.array([0.25, 0.2, 0.15, 0.15, 0.05, 0.1, 0.05, 0.05])
+LIFE_EXTENSIONS = np.array([0, 1, 2, 5])
+
+REPORTING_DATE = pd.Timestamp("2025-12-31")
+FIRST_ACQUISITION = pd.Timestamp("1990-01-01")
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+
+
+def _random_dates(rng, n, start, end):
+    start_day = (start - EXCEL_EPOCH).days
+    end_day = (end - EXCEL_EPOCH).days
+    return EXCEL_EPOCH + pd.to_timedelta(rng.integers(start_day, end_day + 1, n), unit="D")
+
+
+def _messy_dates(rng, dates, messy):
+    # Campuran format yang biasa muncul di register entitas: tanggal Excel
+    # asli, teks dd/mm/yyyy, teks ISO, dd-mm-yyyy dan nomor seri Excel.
+    values = pd.Series(dates).astype(object)
+
+    if not messy:
+        return values
+
+    kind = rng.choice(5, len(values), p=[0.45, 0.25, 0.1, 0.1, 0.1])
+    dates = pd.DatetimeIndex(dates)
+
+    values[kind == 1] = dates[kind == 1].strftime("%d/%m/%Y")
+    values[kind == 2] = dates[kind == 2].strftime("%Y-%m-%d")
+    values[kind == 3] = dates[kind == 3].strftime("%d-%m-%Y")
+    values[kind == 4] = (dates[kind == 4] - EXCEL_EPOCH).days.astype(float)
+
+    return values
+
+
+def _event_counts(rng, n_assets, density):
+    # density = rata-rata jumlah event per aset; sebagian besar aset tanpa event
+    has_event = rng.random(n_assets) < min(density, 1.0)
+    counts = np.where(has_event, 1 + rng.poisson(max(density - 0.5, 0.1), n_assets), 0)
+    return counts
+
+
+def generate_register(
+    n_assets,
+    layout="bulanan",
+    event_density=0.3,
+    messy_dates=True,
+    invalid_ratio=0.005,
+    seed=0
+):
+    # Hasil: (assets_df, capitalizations_df, corrections_df)
+    if layout not in LAYOUTS:
+        raise ValueError(f"Layout tidak dikenal: {layout}")
+
+    rng = np.random.default_rng(seed)
+
+    codes = (1_000_000 + rng.permutation(n_assets * 3)[:n_assets]).astype(str)
+    costs = np.round(np.exp(rng.normal(17.5, 1.6, n_assets)), -3)
+    lives = rng.choice(USEFUL_LIVES, n_assets, p=USEFUL_LIFE_WEIGHTS)
+    acquired = _random_dates(rng, n_assets, FIRST_ACQUISITION, REPORTING_DATE)
+
+    def events(density, with_extension):
+        counts = _event_counts(rng, n_assets, density)
+        owner = np.repeat(np.arange(n_assets), counts)
+        n_events = len(owner)
+
+        # Sebagian kecil event sengaja sebelum tanggal perolehan (anomali)
+        offset_days = rng.integers(30, 365 * 15, n_events)
+        before_parent = rng.random(n_events) < 0.01
+        offset_days[before_parent] = -rng.integers(1, 365, before_parent.sum())
+
+        dates = acquired[owner] + pd.to_timedelta(offset_days, unit="D")
+        dates = dates.where(dates <= REPORTING_DATE + pd.Timedelta(days=365), REPORTING_DATE)
+
+        table = {
+            "owner": owner,
+            "date": dates,
+            "amount": np.round(costs[owner] * rng.uniform(0.01, 0.4, n_events), -3),
+        }
+
+        if with_extension:
+            table["extension"] = rng.choice(LIFE_EXTENSIONS, n_events, p=[0.5, 0.25, 0.15, 0.1])
+
+        return table
+
+    caps = events(event_density, True)
+    corrs = events(event_density / 2, False)
+
+    if layout == "bulanan":
+        assets_df = pd.DataFrame({
+            "Kode Aset": codes,
+            "Harga Perolehan Awal (Rp)": costs,
+            "Tanggal Perolehan": _messy_dates(rng, acquired, messy_dates),
+            "Masa Manfaat (tahun)": lives,
+        })
+
+        # Baris rusak: harga kosong/negatif, masa manfaat 0, tanggal kosong
+        bad = np.flatnonzero(rng.random(n_assets) < invalid_ratio)
+        problem = rng.integers(0, 4, len(bad))
+        assets_df = assets_df.astype({"Harga Perolehan Awal (Rp)": object, "Tanggal Perolehan": object})
+        assets_df.loc[bad[problem == 0], "Harga Perolehan Awal (Rp)"] = None
+        assets_df.loc[bad[problem == 1], "Harga Perolehan Awal (Rp)"] = -1000.0
+        assets_df.loc[bad[problem == 2], "Masa Manfaat (tahun)"] = 0
+        assets_df.loc[bad[problem == 3], "Tanggal Perolehan"] = None
+
+        capitalizations_df = pd.DataFrame({
+            "Kode Aset": codes[caps["owner"]],
+            "Tanggal Kapitalisasi": _messy_dates(rng, caps["date"], messy_dates),
+            "Jumlah": caps["amount"],
+            "Tambahan Usia": caps["extension"],
+        })
+        corrections_df = pd.DataFrame({
+            "Kode Aset": codes[corrs["owner"]],
+            "Tanggal Koreksi": _messy_dates(rng, corrs["date"], messy_dates),
+            "Jumlah": corrs["amount"],
+        })
+
+    elif layout == "semesteran":
+        names = np.char.add("Aset ", codes)
+
+        def semester_dates(dates):
+            # Halaman semesteran menerima tanggal Excel atau teks dd/mm/yyyy,
+            # tetapi tidak campuran keduanya dalam satu kolom
+            if messy_dates:
+                return pd.Series(pd.DatetimeIndex(dates).strftime("%d/%m/%Y"))
+
+            return pd.Series(dates).astype(object)
+
+        assets_df = pd.DataFrame({
+            "Nama Aset": names,
+            "Harga Perolehan Awal (Rp)": costs,
+            "Tanggal Perolehan": semester_dates(acquired),
+            "Masa Manfaat (tahun)": lives,
+            "Tanggal Pelaporan": REPORTING_DATE.strftime("%d/%m/%Y"),
+        })
+        capitalizations_df = pd.DataFrame({
+            "Nama Aset": names[caps["owner"]],
+            "Tanggal": semester_dates(caps["date"]),
+            "Jumlah": caps["amount"],
+            "Tambahan Usia": caps["extension"],
+        })
+        corrections_df = pd.DataFrame({
+            "Nama Aset": names[corrs["owner"]],
+            "Tanggal": semester_dates(corrs["date"]),
+            "Jumlah": corrs["amount"],
+        })
+
+    else:
+        names = np.char.add("Aset ", codes)
+
+        assets_df = pd.DataFrame({
+            "Nama Aset": names,
+            "Harga Perolehan Awal (Rp)": costs,
+            "Tahun Perolehan": pd.DatetimeIndex(acquired).year,
+            "Masa Manfaat (tahun)": lives,
+            "Tahun Pelaporan": REPORTING_DATE.year,
+        })
+        capitalizations_df = pd.DataFrame({
+            "Nama Aset": names[caps["owner"]],
+            "Tahun": pd.DatetimeIndex(caps["date"]).year,
+            "Jumlah": caps["amount"],
+            "Tambahan Usia": caps["extension"],
+        })
+        corrections_df = pd.DataFrame({
+            "Nama Aset": names[corrs["owner"]],
+            "Tahun": pd.DatetimeIndex(corrs["date"]).year,
+            "Jumlah": corrs["amount"],
+        })
+
+    # Urutan event diacak seperti register asli (tidak dikelompokkan per aset)
+    capitalizations_df = capitalizations_df.sample(frac=1, random_state=seed).reset_index(drop=True)
+    corrections_df = corrections_df.sample(frac=1, random_state=seed + 1).reset_index(drop=True)
+
+    return assets_df, capitalizations_df, corrections_df
+
+
+def _cell_value(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return None
+
+    if isinstance(value, np.generic):
+        return value.item()
+
+    return value
+
+
+def write_register_excel(path, tables, sheet_names=SHEET_NAMES):
+    # Ditulis baris per baris dengan constant_memory agar register 1 juta
+    # aset tidak perlu disimpan utuh di memori xlsxwriter.
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    date_fmt = workbook.add_format({"num_format": "dd/mm/yyyy"})
+
+    for name, df in zip(sheet_names, tables):
+        ws = workbook.add_worksheet(name)
+        ws.write_row(0, 0, list(df.columns))
+
+        for row_number, row in enumerate(df.itertuples(index=False, name=None), start=1):
+            for col_number, value in enumerate(row):
+                value = _cell_value(value)
+
+                if value is None:
+                    continue
+
+                if isinstance(value, pd.Timestamp):
+                    ws.write_datetime(row_number, col_number, value.to_pydatetime(), date_fmt)
+                else:
+                    ws.write(row_number, col_number, value)
+
+    workbook.close()
+
+    return path
+
+
+def generate_register_file(
+    path,
+    n_assets,
+    layout="bulanan",
+    event_density=0.3,
+    messy_dates=True,
+    seed=0
+):
+    tables = generate_register(
+        n_assets,
+        layout=layout,
+        event_density=event_density,
+        messy_dates=messy_dates,
+        seed=seed
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    write_register_excel(path, tables)
+
+    return {
+        "path": os.path.abspath(path),
+        "layout": layout,
+        "jumlah_aset": len(tables[0]),
+        "jumlah_kapitalisasi": len(tables[1]),
+        "jumlah_koreksi": len(tables[2]),
+        "event_density": event_density,
+        "messy_dates": messy_dates,
+        "seed": seed,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buat register aset sintetis tiga sheet.")
+    parser.add_argument("--assets", type=int, default=1000, help="Jumlah aset.")
+    parser.add_argument("--layout", choices=LAYOUTS, default="bulanan")
+    parser.add_argument("--event-density", type=float, default=0.3, help="Rata-rata kapitalisasi per aset.")
+    parser.add_argument("--clean-dates", action="store_true", help="Semua tanggal sebagai tanggal Excel asli.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", required=True, help="Path file .xlsx tujuan.")
+    args = parser.parse_args(argv)
+
+    info = generate_register_file(
+        args.output,
+        args.assets,
+        layout=args.layout,
+        event_density=args.event_density,
+        messy_dates=not args.clean_dates,
+        seed=args.seed
+    )
+    print(
+        f"{info['path']}: {info['jumlah_aset']} aset, "
+        f"{info['jumlah_kapitalisasi']} kapitalisasi, {info['jumlah_koreksi']} koreksi"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,71 @@
 import streamlit as st
 import pandas as pd
 from io import BytesIO
-import re
+import os
+import math
+
+from page.susutio import SUPPORTED_EXTENSIONS
+from page.susutperf import new_profiler, profile_stage, stage_rows
+from page.susutspill import touch_spill_dir
+from page.susuttrace import (
+    TRACE_FORMAT_BINARY,
+    TRACE_FORMAT_JSONL,
+    new_tracer,
+    parse_trace_codes,
+    trace_bytes,
+    trace_frame,
+)
+from page.susutjobs import (
+    STATUS_DONE,
+    STATUS_CANCELLED,
+    submit_job,
+    job_status,
+    find_job,
+    cancel_job,
+    discard_job,
+    report_progress,
+    set_partial_result,
+)
+from page.enginebulanan import (
+    REPORTING_DATE,
+    read_register_from_bytes,
+    prepare_input_data,
+    get_asset_schedule_df,
+    SNAPSHOT_COLUMNS,
+    month_end_dates,
+    compute_reporting_snapshots,
+    ROLLUP_GRANULARITIES,
+    ROLLUP_SHEET_NAMES,
+    compute_period_rollups,
+    rollup_df,
+    rollup_sheet_names,
+    build_result_indexes,
+    build_code_index,
+    search_code_index,
+    rows_with_codes,
+    available_cpu_count,
+    compute_depreciation_incremental,
+    run_cache_key,
+    save_processed_to_cache,
+    load_processed_from_cache,
+    MONEY_MODE_FLOAT,
+    MONEY_MODE_SEN,
+    SPILL_MIN_ROWS,
+    EXPORT_MODE_SHEET_PER_ASSET,
+    EXPORT_MODE_LONG_DETAIL,
+    asset_sheet_codes_for_export,
+    long_detail_sheet_names,
+    largest_schedule_assets,
+    export_kkp_workbook_to_tempfile,
+    remove_export_file,
+)
 
-REPORTING_DATE = pd.Timestamp("2025-12-31")
 MAX_UPLOAD_MB = 50
+PAGE_SIZE_OPTIONS = [50, 100, 500, 1000]
+PROCESS_JOB_KIND = "bulanan_hitung"
+EXPORT_JOB_KIND = "bulanan_export"
+JOB_POLL_SECONDS = 1.0
+DETAIL_OPTIONS_PER_PAGE = 1000
 
 
 # =========================================================
@@ -140,85 +201,6 @@ def status_card(label, value, color_class):
     )
 
 
-# =========================================================
-# HELPER
-# =========================================================
-
-def parse_mixed_excel_date(value):
-    if pd.isna(value):
-        return pd.NaT
-
-    if isinstance(value, pd.Timestamp):
-        return value
-
-    text = str(value).strip().replace("\xa0", "").replace("  ", " ")
-
-    if text == "" or text.lower() in ["nan", "none", "nat"]:
-        return pd.NaT
-
-    try:
-        num = float(text)
-        if num > 1000 and text.replace(".", "", 1).isdigit():
-            return pd.Timestamp("1899-12-30") + pd.to_timedelta(int(num), unit="D")
-    except Exception:
-        pass
-
-    if re.match(r"^\d{4}[-/]\d{1,2}[-/]\d{1,2}", text):
-        return pd.to_datetime(text, errors="coerce", yearfirst=True)
-
-    return pd.to_datetime(text, errors="coerce", dayfirst=True)
-
-
-def normalize_kode_aset(value):
-    if pd.isna(value):
-        return pd.NA
-
-    text = str(value).strip().replace("\xa0", "")
-
-    if text == "" or text.lower() in ["nan", "none"]:
-        return pd.NA
-
-    try:
-        num = float(text)
-        if num.is_integer():
-            return str(int(num))
-    except Exception:
-        pass
-
-    return text
-
-
-def safe_sheet_name(name):
-    text = str(name)
-
-    for ch in ["/", "\\", ":", "*", "?", "[", "]"]:
-        text = text.replace(ch, "_")
-
-    text = text.strip()
-
-    if not text:
-        text = "Sheet"
-
-    return text[:31]
-
-
-def get_empty_capitalization_df():
-    return pd.DataFrame(columns=[
-        "Kode Aset",
-        "Tanggal Kapitalisasi",
-        "Jumlah",
-        "Tambahan Usia"
-    ])
-
-
-def get_empty_correction_df():
-    return pd.DataFrame(columns=[
-        "Kode Aset",
-        "Tanggal Koreksi",
-        "Jumlah"
-    ])
-
-
 # =========================================================
 # TEMPLATE EXCEL
 # =========================================================
@@ -285,569 +267,171 @@ def create_template_excel():
 
 
 # =========================================================
-# LOAD EXCEL
+# JOB LATAR BELAKANG: HITUNG DAN EXPORT
 # =========================================================
+# Fungsi job berjalan di thread pekerja (lihat susutjobs): tidak boleh
+# memanggil st.*, progres dilaporkan lewat report_progress yang sekaligus
+# menjadi titik pembatalan.
+
+def attach_search_indexes(processed, profiler=None):
+    with profile_stage(profiler, "Indeks pencarian Kode Aset"):
+        processed["code_index"] = build_result_indexes(processed)
+        processed["frames"] = {
+            "results": pd.DataFrame(processed["results"]),
+            "skipped": pd.DataFrame(processed["skipped_rows"]),
+            "anomalies": pd.DataFrame(processed["anomaly_rows"]),
+        }
 
-@st.cache_data(show_spinner=False)
-def load_excel_from_bytes(file_bytes):
-    excel_data = pd.ExcelFile(BytesIO(file_bytes), engine="openpyxl")
-    sheet_names = excel_data.sheet_names
-
-    if len(sheet_names) < 1:
-        raise ValueError("File Excel tidak memiliki sheet yang dapat dibaca.")
-
-    assets_df = excel_data.parse(sheet_name=0)
-
-    if len(sheet_names) >= 2:
-        capitalizations_df = excel_data.parse(sheet_name=1)
-    else:
-        capitalizations_df = get_empty_capitalization_df()
-
-    if len(sheet_names) >= 3:
-        corrections_df = excel_data.parse(sheet_name=2)
-    else:
-        corrections_df = get_empty_correction_df()
-
-    return assets_df, capitalizations_df, corrections_df, sheet_names
+    return processed
 
 
-# =========================================================
-# VALIDASI DAN NORMALISASI DATA
-# =========================================================
-
-def prepare_input_data(assets_df, capitalizations_df, corrections_df):
-    required_assets = {
-        "Kode Aset",
-        "Harga Perolehan Awal (Rp)",
-        "Tanggal Perolehan",
-        "Masa Manfaat (tahun)"
+def run_processing_job(
+    job,
+    file_bytes,
+    file_name,
+    cache_key,
+    parallel=False,
+    previous=None,
+    profile=False,
+    money_mode=MONEY_MODE_FLOAT,
+    spill_threshold_rows=None,
+    trace_codes=None
+):
+    profiler = new_profiler(enabled=profile)
+    # Trace hanya terisi saat aset benar-benar dihitung: cache dilewati
+    tracer = new_tracer(trace_codes)
+    outcome = {
+        "profiler": profiler,
+        "tracer": tracer,
+        "from_cache": False,
+        "sheet_names": [],
+        "read_timings": [],
+        "cache_warning": None,
     }
 
-    if not required_assets.issubset(assets_df.columns):
-        raise ValueError(
-            "Kolom di Sheet 1 tidak valid. Wajib: "
-            "Kode Aset, Harga Perolehan Awal (Rp), Tanggal Perolehan, Masa Manfaat (tahun)."
-        )
+    report_progress(job, 0, "Memeriksa hasil tersimpan...")
 
-    if capitalizations_df is None or capitalizations_df.empty:
-        capitalizations_df = get_empty_capitalization_df()
-    else:
-        required_caps = {
-            "Kode Aset",
-            "Tanggal Kapitalisasi",
-            "Jumlah",
-            "Tambahan Usia"
-        }
-
-        if not required_caps.issubset(capitalizations_df.columns):
-            raise ValueError(
-                "Kolom di Sheet 2 tidak valid. Wajib: "
-                "Kode Aset, Tanggal Kapitalisasi, Jumlah, Tambahan Usia."
-            )
+    with profile_stage(profiler, "Muat dari cache"):
+        processed = None if tracer is not None else load_processed_from_cache(cache_key, spill_threshold_rows)
 
-    if corrections_df is None or corrections_df.empty:
-        corrections_df = get_empty_correction_df()
+    if processed is not None:
+        outcome["from_cache"] = True
     else:
-        required_corrs = {
-            "Kode Aset",
-            "Tanggal Koreksi",
-            "Jumlah"
-        }
-
-        if not required_corrs.issubset(corrections_df.columns):
-            raise ValueError(
-                "Kolom di Sheet 3 tidak valid. Wajib: "
-                "Kode Aset, Tanggal Koreksi, Jumlah."
+        report_progress(job, 1, "Membaca file...")
+
+        with profile_stage(profiler, "Baca file"):
+            (
+                assets_df,
+                capitalizations_df,
+                corrections_df,
+                outcome["sheet_names"],
+                outcome["read_timings"]
+            ) = read_register_from_bytes(file_bytes, file_name)
+
+        report_progress(job, 4, "Validasi dan normalisasi data...")
+
+        with profile_stage(profiler, "Validasi & normalisasi input"):
+            assets_df, capitalizations_df, corrections_df = prepare_input_data(
+                assets_df,
+                capitalizations_df,
+                corrections_df
             )
 
-    assets_df = assets_df.copy()
-    capitalizations_df = capitalizations_df.copy()
-    corrections_df = corrections_df.copy()
-
-    assets_df["Kode Aset"] = assets_df["Kode Aset"].apply(normalize_kode_aset)
-    capitalizations_df["Kode Aset"] = capitalizations_df["Kode Aset"].apply(normalize_kode_aset)
-    corrections_df["Kode Aset"] = corrections_df["Kode Aset"].apply(normalize_kode_aset)
-
-    assets_df["Harga Perolehan Awal (Rp)"] = pd.to_numeric(
-        assets_df["Harga Perolehan Awal (Rp)"],
-        errors="coerce"
-    )
-
-    assets_df["Masa Manfaat (tahun)"] = pd.to_numeric(
-        assets_df["Masa Manfaat (tahun)"],
-        errors="coerce"
-    )
-
-    capitalizations_df["Jumlah"] = pd.to_numeric(
-        capitalizations_df["Jumlah"],
-        errors="coerce"
-    )
-
-    capitalizations_df["Tambahan Usia"] = pd.to_numeric(
-        capitalizations_df["Tambahan Usia"],
-        errors="coerce"
-    )
-
-    corrections_df["Jumlah"] = pd.to_numeric(
-        corrections_df["Jumlah"],
-        errors="coerce"
-    )
-
-    assets_df["Tanggal Perolehan"] = assets_df["Tanggal Perolehan"].apply(parse_mixed_excel_date)
-    capitalizations_df["Tanggal Kapitalisasi"] = capitalizations_df["Tanggal Kapitalisasi"].apply(parse_mixed_excel_date)
-    corrections_df["Tanggal Koreksi"] = corrections_df["Tanggal Koreksi"].apply(parse_mixed_excel_date)
-
-    aset_valid = assets_df.dropna(subset=["Kode Aset"])
-    duplicated_codes = aset_valid[aset_valid["Kode Aset"].duplicated()]["Kode Aset"].unique().tolist()
-
-    if duplicated_codes:
-        contoh = ", ".join(map(str, duplicated_codes[:50]))
-        raise ValueError(f"Terdapat duplikat Kode Aset pada Sheet 1: {contoh}")
-
-    return assets_df, capitalizations_df, corrections_df
-
-
-# =========================================================
-# HITUNG PENYUSUTAN
-# =========================================================
-
-def calculate_depreciation_monthly(
-    initial_cost,
-    acquisition_date,
-    useful_life_years,
-    reporting_date=REPORTING_DATE,
-    capitalizations=None,
-    corrections=None
-):
-    if capitalizations is None:
-        capitalizations = []
-
-    if corrections is None:
-        corrections = []
-
-    acquisition_date = parse_mixed_excel_date(acquisition_date)
-    reporting_date = parse_mixed_excel_date(reporting_date)
-
-    if pd.isna(acquisition_date) or pd.isna(reporting_date):
-        return []
-
-    if acquisition_date > reporting_date:
-        return []
-
-    original_life_months = int(float(useful_life_years) * 12)
-    remaining_life_months = original_life_months
-
-    book_value = float(initial_cost)
-    accumulated_dep = 0.0
-
-    cap_dict = {}
-
-    for cap in capitalizations:
-        cap_date = parse_mixed_excel_date(cap.get("Tanggal Kapitalisasi"))
-
-        if pd.notna(cap_date) and cap_date <= reporting_date:
-            key = (cap_date.year, cap_date.month)
-            cap_dict.setdefault(key, []).append(cap)
-
-    corr_dict = {}
-
-    for corr in corrections:
-        corr_date = parse_mixed_excel_date(corr.get("Tanggal Koreksi"))
-
-        if pd.notna(corr_date) and corr_date <= reporting_date:
-            key = (corr_date.year, corr_date.month)
-            corr_dict.setdefault(key, []).append(corr)
-
-    current_year = acquisition_date.year
-    current_month = acquisition_date.month
-
-    schedule = []
-
-    while (current_year < reporting_date.year) or (
-        current_year == reporting_date.year and current_month <= reporting_date.month
-    ):
-        current_key = (current_year, current_month)
-
-        kapitalisasi_bulan_ini = 0.0
-        koreksi_bulan_ini = 0.0
-        tambahan_usia_bulan_ini = 0
-
-        if current_key in cap_dict:
-            for cap in cap_dict[current_key]:
-                cap_amount = float(cap.get("Jumlah", 0) or 0)
-                tambahan_usia_tahun = float(cap.get("Tambahan Usia", 0) or 0)
-                tambahan_usia_bulan = int(tambahan_usia_tahun * 12)
-
-                kapitalisasi_bulan_ini += cap_amount
-                tambahan_usia_bulan_ini += tambahan_usia_bulan
-
-            book_value += kapitalisasi_bulan_ini
-
-            remaining_life_months = min(
-                remaining_life_months + tambahan_usia_bulan_ini,
-                original_life_months
+        def update_progress(value, text):
+            report_progress(job, 5 + value * 0.9, text)
+
+        with profile_stage(profiler, "Hitung penyusutan"):
+            processed = compute_depreciation_incremental(
+                assets_df,
+                capitalizations_df,
+                corrections_df,
+                previous=previous,
+                parallel=parallel,
+                progress_callback=update_progress,
+                profiler=profiler,
+                money_mode=money_mode,
+                spill_threshold_rows=spill_threshold_rows,
+                tracer=tracer
             )
 
-        if current_key in corr_dict:
-            for corr in corr_dict[current_key]:
-                corr_amount = float(corr.get("Jumlah", 0) or 0)
-                koreksi_bulan_ini += corr_amount
-
-            book_value = max(book_value - koreksi_bulan_ini, 0)
-
-        monthly_dep = 0.0
-
-        if remaining_life_months > 0 and book_value > 0:
-            monthly_dep = book_value / remaining_life_months
-            accumulated_dep += monthly_dep
-            book_value -= monthly_dep
-            remaining_life_months -= 1
-
-        schedule.append({
-            "Tahun": current_year,
-            "Bulan": current_month,
-            "Periode": f"{current_year}-{current_month:02d}",
-            "Kapitalisasi Bulan Ini": round(kapitalisasi_bulan_ini, 2),
-            "Tambahan Usia Bulan Ini": tambahan_usia_bulan_ini,
-            "Koreksi Bulan Ini": round(koreksi_bulan_ini, 2),
-            "Penyusutan Bulan Berjalan": round(monthly_dep, 2),
-            "Akumulasi Penyusutan": round(accumulated_dep, 2),
-            "Nilai Buku Akhir": round(book_value, 2),
-            "Sisa Masa Manfaat (Bulan)": remaining_life_months,
-            "Sisa Masa Manfaat (Tahun)": round(remaining_life_months / 12, 2),
-        })
-
-        current_month += 1
-
-        if current_month > 12:
-            current_month = 1
-            current_year += 1
-
-    return schedule
-
-
-def process_depreciation_data(assets_df, capitalizations_df, corrections_df):
-    skipped_rows = []
-    anomaly_rows = []
-    results = []
-    schedules_dict = {}
-
-    total_rows = len(assets_df)
-
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-
-    for idx, asset in assets_df.iterrows():
-        progress_value = int(((idx + 1) / max(total_rows, 1)) * 100)
-        progress_bar.progress(progress_value)
-        status_text.text(f"Memproses baris {idx + 1} dari {total_rows}...")
-
-        alasan = []
-
-        if pd.isna(asset["Kode Aset"]):
-            alasan.append("Kode Aset kosong/tidak valid")
-
-        if pd.isna(asset["Harga Perolehan Awal (Rp)"]):
-            alasan.append("Harga Perolehan kosong/tidak valid")
-
-        if pd.isna(asset["Tanggal Perolehan"]):
-            alasan.append("Tanggal Perolehan kosong/tidak valid")
-
-        if pd.isna(asset["Masa Manfaat (tahun)"]):
-            alasan.append("Masa Manfaat kosong/tidak valid")
-
-        if alasan:
-            skipped_rows.append({
-                "Baris Excel": idx + 2,
-                "Kode Aset": asset.get("Kode Aset", ""),
-                "Alasan": "; ".join(alasan)
-            })
-            continue
-
-        asset_code = str(asset["Kode Aset"]).strip()
-        initial_cost = float(asset["Harga Perolehan Awal (Rp)"])
-        acquisition_date = asset["Tanggal Perolehan"]
-        useful_life = float(asset["Masa Manfaat (tahun)"])
-
-        if initial_cost < 0:
-            skipped_rows.append({
-                "Baris Excel": idx + 2,
-                "Kode Aset": asset_code,
-                "Alasan": "Harga Perolehan negatif"
-            })
-            continue
-
-        if useful_life <= 0:
-            skipped_rows.append({
-                "Baris Excel": idx + 2,
-                "Kode Aset": asset_code,
-                "Alasan": "Masa Manfaat harus lebih dari 0"
-            })
-            continue
-
-        if acquisition_date > REPORTING_DATE:
-            skipped_rows.append({
-                "Baris Excel": idx + 2,
-                "Kode Aset": asset_code,
-                "Alasan": "Tanggal Perolehan setelah 31/12/2025"
-            })
-            continue
-
-        asset_caps = []
-
-        if not capitalizations_df.empty:
-            asset_cap_rows = capitalizations_df[
-                capitalizations_df["Kode Aset"] == asset_code
-            ].to_dict("records")
-
-            for cap in asset_cap_rows:
-                cap_date = parse_mixed_excel_date(cap.get("Tanggal Kapitalisasi"))
-
-                if pd.isna(cap_date):
-                    continue
-
-                if cap_date < acquisition_date:
-                    anomaly_rows.append({
-                        "Kode Aset": asset_code,
-                        "Jenis Anomali": "Kapitalisasi sebelum induk",
-                        "Tanggal Aset": acquisition_date.strftime("%d/%m/%Y"),
-                        "Tanggal Transaksi": cap_date.strftime("%d/%m/%Y"),
-                        "Keterangan": f"Tanggal kapitalisasi lebih awal dari tanggal perolehan aset induk. Nilai: {cap.get('Jumlah', 0)}"
-                    })
-                else:
-                    asset_caps.append(cap)
-
-        asset_corrs = []
+        # Hasil hitung sudah bisa dibaca sebelum cache & indeks selesai
+        set_partial_result(job, "processed", processed)
+        report_progress(job, 96, "Menyimpan hasil ke cache...")
 
-        if not corrections_df.empty:
-            asset_corr_rows = corrections_df[
-                corrections_df["Kode Aset"] == asset_code
-            ].to_dict("records")
+        try:
+            with profile_stage(profiler, "Simpan ke cache"):
+                save_processed_to_cache(cache_key, processed)
+        except Exception as cache_error:
+            outcome["cache_warning"] = str(cache_error)
 
-            for corr in asset_corr_rows:
-                corr_date = parse_mixed_excel_date(corr.get("Tanggal Koreksi"))
+    report_progress(job, 98, "Menyusun indeks pencarian...")
+    outcome["processed"] = attach_search_indexes(processed, profiler)
 
-                if pd.isna(corr_date):
-                    continue
+    return outcome
 
-                if corr_date < acquisition_date:
-                    anomaly_rows.append({
-                        "Kode Aset": asset_code,
-                        "Jenis Anomali": "Koreksi sebelum induk",
-                        "Tanggal Aset": acquisition_date.strftime("%d/%m/%Y"),
-                        "Tanggal Transaksi": corr_date.strftime("%d/%m/%Y"),
-                        "Keterangan": f"Tanggal koreksi lebih awal dari tanggal perolehan aset induk. Nilai: {corr.get('Jumlah', 0)}"
-                    })
-                else:
-                    asset_corrs.append(corr)
-
-        schedule = calculate_depreciation_monthly(
-            initial_cost=initial_cost,
-            acquisition_date=acquisition_date,
-            useful_life_years=useful_life,
-            reporting_date=REPORTING_DATE,
-            capitalizations=asset_caps,
-            corrections=asset_corrs
-        )
 
-        if schedule:
-            last_row = schedule[-1]
-            schedule_df = pd.DataFrame(schedule)
-
-            beban_penyusutan_2025 = schedule_df.loc[
-                schedule_df["Tahun"] == 2025,
-                "Penyusutan Bulan Berjalan"
-            ].sum()
-
-            results.append({
-                "Kode Aset": asset_code,
-                "Tanggal Pelaporan": REPORTING_DATE.strftime("%d/%m/%Y"),
-                "Periode Pelaporan": last_row["Periode"],
-                "Beban Penyusutan 2025": round(beban_penyusutan_2025, 2),
-                "Akumulasi Penyusutan": last_row["Akumulasi Penyusutan"],
-                "Nilai Buku Akhir": last_row["Nilai Buku Akhir"],
-                "Sisa Masa Manfaat (Bulan)": last_row["Sisa Masa Manfaat (Bulan)"],
-            })
-
-            schedules_dict[asset_code] = schedule
-
-    progress_bar.progress(100)
-    status_text.text("Proses selesai.")
-
-    return {
-        "results": results,
-        "schedules_dict": schedules_dict,
-        "skipped_rows": skipped_rows,
-        "anomaly_rows": anomaly_rows,
-        "total_rows": total_rows
-    }
+def run_export_job(job, profiler=None, **export_kwargs):
+    def update_progress(value, text):
+        report_progress(job, value, text)
 
+    with profile_stage(profiler, "Export Excel"):
+        return export_kkp_workbook_to_tempfile(progress_callback=update_progress, **export_kwargs)
 
-# =========================================================
-# EXPORT EXCEL FORMAT KKP: SHEET PER ASET
-# =========================================================
 
-def convert_df_to_excel_with_sheets(
-    results,
-    schedules,
-    skipped_rows=None,
-    anomaly_rows=None,
-    total_rows=0
-):
-    buffer = BytesIO()
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_progress(job_id, title):
+    # Hanya fragmen ini yang dijalankan ulang tiap JOB_POLL_SECONDS;
+    # setelah job selesai seluruh halaman di-rerun untuk mengambil hasilnya.
+    status = job_status(job_id)
 
-    results_df = pd.DataFrame(results)
+    if status is None or status["finished"]:
+        st.rerun()
 
-    skipped_df = pd.DataFrame(
-        skipped_rows if skipped_rows else [],
-        columns=["Baris Excel", "Kode Aset", "Alasan"]
+    st.progress(status["progress"], text=f"{title}: {status['message']}")
+    st.caption(
+        f"ID job: {status['id']} | status: {status['status']} | {status['elapsed']} detik. "
+        "Halaman boleh dipakai/ditutup; proses tetap berjalan di server."
     )
 
-    anomaly_df = pd.DataFrame(
-        anomaly_rows if anomaly_rows else [],
-        columns=["Kode Aset", "Jenis Anomali", "Tanggal Aset", "Tanggal Transaksi", "Keterangan"]
-    )
-
-    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-        workbook = writer.book
-
-        money_fmt = workbook.add_format({"num_format": "#,##0.00"})
-        int_fmt = workbook.add_format({"num_format": "0"})
-        bold_fmt = workbook.add_format({"bold": True})
-        header_fmt = workbook.add_format({
-            "bold": True,
-            "bg_color": "#D9EAF7",
-            "border": 1
-        })
-
-        # =====================================================
-        # SHEET RINGKASAN
-        # =====================================================
-        results_df.to_excel(writer, index=False, sheet_name="Ringkasan")
-
-        ws_ringkasan = writer.sheets["Ringkasan"]
-
-        ws_ringkasan.set_column("A:A", 20)
-        ws_ringkasan.set_column("B:C", 18)
-        ws_ringkasan.set_column("D:F", 22, money_fmt)
-        ws_ringkasan.set_column("G:G", 24, int_fmt)
-
-        for col_num, value in enumerate(results_df.columns):
-            ws_ringkasan.write(0, col_num, value, header_fmt)
-
-        # =====================================================
-        # SHEET DETAIL PER ASET
-        # =====================================================
-        used_sheet_names = {"Ringkasan", "Reviu Hasil"}
-
-        for asset_code, schedule in schedules.items():
-            schedule_df = pd.DataFrame(schedule)
-
-            base_sheet_name = safe_sheet_name(asset_code)
-            sheet_name = base_sheet_name
-
-            counter = 1
-
-            while sheet_name in used_sheet_names:
-                suffix = f"_{counter}"
-                sheet_name = safe_sheet_name(base_sheet_name[:31 - len(suffix)] + suffix)
-                counter += 1
-
-            used_sheet_names.add(sheet_name)
-
-            schedule_df.to_excel(
-                writer,
-                sheet_name=sheet_name,
-                startrow=2,
-                index=False
-            )
-
-            ws = writer.sheets[sheet_name]
-
-            ws.write(0, 0, "Kode Aset", bold_fmt)
-            ws.write(0, 1, asset_code)
-
-            ws.write(1, 0, "Tanggal Pelaporan", bold_fmt)
-            ws.write(1, 1, REPORTING_DATE.strftime("%d/%m/%Y"))
-
-            for col_num, value in enumerate(schedule_df.columns):
-                ws.write(2, col_num, value, header_fmt)
-
-            ws.set_column("A:A", 12)
-            ws.set_column("B:B", 10)
-            ws.set_column("C:C", 14)
-            ws.set_column("D:D", 24, money_fmt)
-            ws.set_column("E:E", 24, int_fmt)
-            ws.set_column("F:F", 22, money_fmt)
-            ws.set_column("G:G", 24, money_fmt)
-            ws.set_column("H:H", 24, money_fmt)
-            ws.set_column("I:I", 22, money_fmt)
-            ws.set_column("J:J", 24, int_fmt)
-            ws.set_column("K:K", 24)
-
-        # =====================================================
-        # SHEET REVIU HASIL
-        # =====================================================
-        ws_reviu = workbook.add_worksheet("Reviu Hasil")
-        writer.sheets["Reviu Hasil"] = ws_reviu
-
-        processed_rows = len(results)
-        skipped_count = len(skipped_rows) if skipped_rows else 0
-        anomaly_count = len(anomaly_rows) if anomaly_rows else 0
-
-        ws_reviu.write(0, 0, "Ringkasan Reviu", bold_fmt)
+    if st.button("⛔ Batalkan", key=f"cancel_{job_id}"):
+        cancel_job(job_id)
 
-        ws_reviu.write(2, 0, "Jumlah total baris", bold_fmt)
-        ws_reviu.write(2, 1, total_rows, int_fmt)
 
-        ws_reviu.write(3, 0, "Jumlah baris berhasil diproses", bold_fmt)
-        ws_reviu.write(3, 1, processed_rows, int_fmt)
+def page_number_input(label, n_pages, key, container=st):
+    # Nomor halaman lama bisa melebihi jumlah halaman setelah filter berubah
+    if st.session_state.get(key, 1) > n_pages:
+        st.session_state[key] = 1
 
-        ws_reviu.write(4, 0, "Jumlah baris dilewati", bold_fmt)
-        ws_reviu.write(4, 1, skipped_count, int_fmt)
+    return int(container.number_input(label, min_value=1, max_value=n_pages, step=1, key=key))
 
-        ws_reviu.write(5, 0, "Jumlah input aset anomali", bold_fmt)
-        ws_reviu.write(5, 1, anomaly_count, int_fmt)
 
-        start_row_skip = 8
+def show_paginated_table(df, rows, key, empty_message):
+    # Hanya irisan satu halaman yang dikirim ke browser; rows = nomor baris
+    # df hasil pencarian indeks Kode Aset
+    if len(rows) == 0:
+        st.info(empty_message)
+        return
 
-        ws_reviu.write(
-            start_row_skip,
-            0,
-            "Daftar Baris yang Dilewati",
-            bold_fmt
-        )
+    size_col, page_col, info_col = st.columns([1, 1, 2])
 
-        skipped_df.to_excel(
-            writer,
-            index=False,
-            sheet_name="Reviu Hasil",
-            startrow=start_row_skip + 1
-        )
+    with size_col:
+        page_size = st.selectbox("Baris per halaman", PAGE_SIZE_OPTIONS, index=1, key=f"{key}_page_size")
 
-        start_row_anom = start_row_skip + 3 + max(len(skipped_df), 1)
+    n_pages = max(1, math.ceil(len(rows) / page_size))
 
-        ws_reviu.write(
-            start_row_anom,
-            0,
-            "Daftar Input Aset Tidak Logis / Anomali",
-            bold_fmt
-        )
+    with page_col:
+        page = page_number_input("Halaman", n_pages, f"{key}_page")
 
-        anomaly_df.to_excel(
-            writer,
-            index=False,
-            sheet_name="Reviu Hasil",
-            startrow=start_row_anom + 1
-        )
+    with info_col:
+        st.caption(f"{len(rows):,} baris sesuai filter, halaman {page} dari {n_pages}")
 
-        ws_reviu.set_column("A:A", 22)
-        ws_reviu.set_column("B:B", 32)
-        ws_reviu.set_column("C:D", 20)
-        ws_reviu.set_column("E:E", 80)
+    start = (page - 1) * page_size
 
-    buffer.seek(0)
-    return buffer.getvalue()
+    st.dataframe(
+        df.iloc[rows[start:start + page_size]],
+        use_container_width=True,
+        hide_index=True
+    )
 
 
 # =========================================================
@@ -878,6 +462,14 @@ def app():
     if "last_uploaded_name" not in st.session_state:
         st.session_state["last_uploaded_name"] = None
 
+    if "bulanan_export_path" not in st.session_state:
+        st.session_state["bulanan_export_path"] = None
+
+    # Hasil proses terakhir sebagai dasar perhitungan ulang inkremental;
+    # sengaja tidak dihapus saat file baru diunggah (revisi file yang sama).
+    if "bulanan_incremental_base" not in st.session_state:
+        st.session_state["bulanan_incremental_base"] = None
+
     st.markdown("""
     <div class="title-wrap">
         <div class="title-icon">📉</div>
@@ -919,13 +511,14 @@ def app():
         <b>Saran agar browser tidak hang:</b><br>
         1. Jangan klik browse dari folder Downloads yang terlalu berat.<br>
         2. Pindahkan file Excel ke folder sederhana terlebih dahulu.<br>
-        3. Lebih aman gunakan <b>drag & drop</b> file Excel langsung ke kotak upload.
+        3. Lebih aman gunakan <b>drag & drop</b> file Excel langsung ke kotak upload.<br>
+        4. Format .xlsb juga didukung. File .csv / .parquet hanya berisi data aset (Sheet 1).
         </div>
         """, unsafe_allow_html=True)
 
         uploaded_file = st.file_uploader(
             "Drag & drop file Excel ke sini, atau klik untuk memilih file",
-            type=["xlsx"],
+            type=SUPPORTED_EXTENSIONS,
             accept_multiple_files=False,
             help="Untuk file besar, disarankan drag & drop langsung dari folder lokal biasa.",
             key="bulanan_uploader"
@@ -940,6 +533,8 @@ def app():
             if st.session_state["last_uploaded_name"] != uploaded_file.name:
                 st.session_state["processed_results"] = None
                 st.session_state["last_uploaded_name"] = uploaded_file.name
+                remove_export_file(st.session_state.get("bulanan_export_path"))
+                st.session_state["bulanan_export_path"] = None
 
             if file_size_mb > MAX_UPLOAD_MB:
                 st.warning(
@@ -947,6 +542,97 @@ def app():
                     "Proses mungkin lambat pada Streamlit Cloud."
                 )
 
+        st.markdown("---")
+        st.markdown("### ⚡ Kinerja")
+
+        cpu_count = available_cpu_count()
+
+        parallel_mode = st.checkbox(
+            "Proses paralel (multi-core)",
+            value=False,
+            help=(
+                f"Register dibagi per blok dan dihitung bersamaan di {cpu_count} core. "
+                "Disarankan untuk file dengan puluhan ribu aset."
+            ),
+            key="bulanan_parallel"
+        )
+
+        money_mode = st.radio(
+            "Aritmetika nilai uang",
+            options=[MONEY_MODE_FLOAT, MONEY_MODE_SEN],
+            format_func=lambda mode: {
+                MONEY_MODE_FLOAT: "Float (bawaan)",
+                MONEY_MODE_SEN: "Fixed-point sen (bulat)",
+            }[mode],
+            help=(
+                "Fixed-point: semua nilai dihitung sebagai bilangan bulat sen, pembulatan "
+                "setengah ke atas, sisa sen dialokasikan tepat di bulan terakhir sehingga "
+                "nilai buku habis tepat 0 dan Ringkasan = jumlah jadwal bulanan."
+            ),
+            key="bulanan_money_mode"
+        )
+
+        spill_mode = st.checkbox(
+            "Simpan jadwal besar di disk",
+            value=True,
+            help=(
+                f"Jadwal bulanan dengan {SPILL_MIN_ROWS:,} baris atau lebih ditulis ke file "
+                "memory-mapped di disk server, bukan di RAM (juga saat dihitung paralel, "
+                "memakai hasil sebelumnya, atau dimuat dari cache)."
+            ),
+            key="bulanan_spill"
+        )
+
+        profile_mode = st.checkbox(
+            "Catat performa proses",
+            value=False,
+            help=(
+                "Mencatat waktu, CPU dan memori puncak per tahap. "
+                "Ditampilkan di panel Performa dan sheet Reviu Hasil. "
+                "Pengukuran memori memperlambat proses; aktifkan hanya saat diagnosis."
+            ),
+            key="bulanan_profile"
+        )
+
+        trace_text = st.text_input(
+            "Lacak Kode Aset (trace)",
+            value="",
+            help=(
+                "Kode Aset yang dicatat per bulan (event, penyusutan, akumulasi, nilai buku, "
+                "sisa umur), pisahkan dengan koma atau titik koma. Kosongkan untuk mematikan trace."
+            ),
+            key="bulanan_trace"
+        )
+
+        st.markdown("### 📅 Tanggal Pelaporan")
+
+        reporting_date_options = [
+            date.strftime("%d/%m/%Y")
+            for date in month_end_dates(REPORTING_DATE.year)
+        ]
+
+        selected_reporting_dates = st.multiselect(
+            "Snapshot per tanggal",
+            options=reporting_date_options,
+            default=[REPORTING_DATE.strftime("%d/%m/%Y")],
+            help=(
+                "Akumulasi, nilai buku dan beban tahun berjalan untuk setiap tanggal "
+                "dibaca dari satu kali perhitungan, tanpa menghitung ulang register."
+            ),
+            key="bulanan_reporting_dates"
+        )
+
+        rollup_mode = st.checkbox(
+            "Rekap semesteran & tahunan",
+            value=False,
+            help=(
+                "Beban, akumulasi dan nilai buku per semester dan per tahun diturunkan dari "
+                "jadwal bulanan yang sama (tanpa menghitung ulang register) dan ikut "
+                "ditulis ke file Excel hasil."
+            ),
+            key="bulanan_rollup"
+        )
+
         st.markdown("---")
         st.markdown("### ℹ️ Format Data")
         st.markdown("""
@@ -979,10 +665,14 @@ def app():
 
         **Catatan penting**
         - Data tidak langsung diproses setelah upload.
+        - Perhitungan dan pembuatan file Excel berjalan di latar belakang dan bisa dibatalkan.
+          Jika tab tertutup, upload file yang sama untuk melanjutkan memantau proses.
         - Sheet kapitalisasi dan koreksi boleh kosong.
         - Kapitalisasi/koreksi sebelum tanggal perolehan induk akan dicatat sebagai anomali.
         - Tambahan usia diisi dalam tahun dan dikonversi ke bulan.
         - Format hasil Excel tetap untuk KKP: **Ringkasan + sheet masing-masing Kode Aset + Reviu Hasil**.
+        - Opsi **Rekap semesteran & tahunan** menambah sheet rekap per semester dan per tahun
+          yang diturunkan dari jadwal bulanan yang sama, tanpa menghitung ulang register.
         """)
 
     if uploaded_file is None:
@@ -1006,52 +696,145 @@ def app():
             "File tidak diproses otomatis. Klik tombol Proses Data setelah file berhasil dipilih."
         )
 
-    if not process_clicked and st.session_state["processed_results"] is None:
-        st.warning("File sudah dipilih. Klik **Proses Data** untuk mulai menghitung.")
-        return
-
     if process_clicked:
-        try:
-            with st.spinner("Membaca file Excel..."):
-                file_bytes = uploaded_file.getvalue()
-                assets_df, capitalizations_df, corrections_df, sheet_names = load_excel_from_bytes(file_bytes)
+        file_bytes = uploaded_file.getvalue()
+        cache_key = run_cache_key(file_bytes, money_mode)
+
+        # Job untuk file yang sama masih berjalan (mis. dari tab lain): sambungkan
+        job_id = find_job(PROCESS_JOB_KIND, cache_key)
+
+        if job_id is None:
+            job_id = submit_job(
+                PROCESS_JOB_KIND,
+                run_processing_job,
+                file_bytes,
+                uploaded_file.name,
+                cache_key,
+                parallel=parallel_mode,
+                previous=st.session_state["bulanan_incremental_base"],
+                profile=profile_mode,
+                money_mode=money_mode,
+                spill_threshold_rows=SPILL_MIN_ROWS if spill_mode else None,
+                trace_codes=parse_trace_codes(trace_text),
+                job_key=cache_key
+            )
 
-            st.success(f"File berhasil dibaca. Sheet terdeteksi: {', '.join(sheet_names)}")
+        st.session_state["bulanan_job_id"] = job_id
 
-            with st.spinner("Validasi dan normalisasi data..."):
-                assets_df, capitalizations_df, corrections_df = prepare_input_data(
-                    assets_df,
-                    capitalizations_df,
-                    corrections_df
-                )
+    elif st.session_state.get("bulanan_job_id") is None and st.session_state["processed_results"] is None:
+        # Tab sempat ditutup saat job berjalan: sambungkan lagi lewat file yang sama
+        running_id = find_job(PROCESS_JOB_KIND, run_cache_key(uploaded_file.getvalue(), money_mode))
 
-            with st.spinner("Menghitung penyusutan..."):
-                processed = process_depreciation_data(
-                    assets_df,
-                    capitalizations_df,
-                    corrections_df
-                )
+        if running_id is not None:
+            st.session_state["bulanan_job_id"] = running_id
 
-            st.session_state["processed_results"] = processed
+    job_id = st.session_state.get("bulanan_job_id")
+
+    if job_id is not None:
+        status = job_status(job_id)
 
-        except Exception as e:
-            st.error(f"❌ Error: {str(e)}")
+        if status is None:
+            st.session_state["bulanan_job_id"] = None
+            st.warning("Job perhitungan tidak ditemukan (server dimulai ulang atau job kedaluwarsa).")
             return
 
-    processed = st.session_state["processed_results"]
+        if not status["finished"]:
+            show_job_progress(job_id, "Perhitungan")
+            return
+
+        job = discard_job(job_id)
+        st.session_state["bulanan_job_id"] = None
+
+        if status["status"] == STATUS_CANCELLED:
+            st.warning("Perhitungan dibatalkan.")
+        elif status["status"] != STATUS_DONE:
+            st.error(f"❌ Error: {status['error']}")
+            return
+        else:
+            outcome = job["result"]
+            processed = outcome["processed"]
 
-    if processed is None:
+            if outcome["from_cache"]:
+                st.success(
+                    "Hasil untuk file ini sudah pernah dihitung dan dimuat dari cache. "
+                    "Perhitungan tidak diulang."
+                )
+            else:
+                st.success(
+                    f"File berhasil dibaca dan dihitung dalam {status['elapsed']} detik. "
+                    f"Sheet terdeteksi: {', '.join(outcome['sheet_names'])}"
+                )
+
+                with st.expander("⏱️ Waktu baca per sheet", expanded=False):
+                    st.dataframe(pd.DataFrame(outcome["read_timings"]), use_container_width=True, hide_index=True)
+
+            if outcome["cache_warning"]:
+                st.warning(f"Hasil tidak dapat disimpan ke cache: {outcome['cache_warning']}")
+
+            st.session_state["processed_results"] = processed
+            st.session_state["bulanan_incremental_base"] = processed
+            st.session_state["bulanan_profiler"] = outcome["profiler"]
+            st.session_state["bulanan_tracer"] = outcome["tracer"]
+            remove_export_file(st.session_state.get("bulanan_export_path"))
+            st.session_state["bulanan_export_path"] = None
+
+    if st.session_state["processed_results"] is None:
+        st.warning("File sudah dipilih. Klik **Proses Data** untuk mulai menghitung.")
         return
 
+    processed = st.session_state["processed_results"]
     results = processed["results"]
-    schedules_dict = processed["schedules_dict"]
+    schedule_store = processed["schedule_store"]
     skipped_rows = processed["skipped_rows"]
     anomaly_rows = processed["anomaly_rows"]
     total_rows = processed["total_rows"]
 
-    results_df = pd.DataFrame(results)
-    skipped_df = pd.DataFrame(skipped_rows)
-    anomaly_df = pd.DataFrame(anomaly_rows)
+    if schedule_store.get("spill") is not None:
+        # Folder jadwal masih dipakai sesi ini: jangan dibersihkan sebagai yatim
+        touch_spill_dir(schedule_store["spill"])
+        st.caption(
+            f"Jadwal bulanan ({int(schedule_store['offsets'][-1]):,} baris) disimpan di disk "
+            "server sebagai file memory-mapped."
+        )
+
+    snapshot_dates = [
+        pd.to_datetime(text, format="%d/%m/%Y")
+        for text in selected_reporting_dates or [REPORTING_DATE.strftime("%d/%m/%Y")]
+    ]
+
+    profiler = st.session_state.get("bulanan_profiler")
+
+    if processed.get("snapshot_dates") != snapshot_dates:
+        with profile_stage(profiler, f"Snapshot tanggal pelaporan ({len(snapshot_dates)} tanggal)"):
+            processed["snapshots"] = compute_reporting_snapshots(schedule_store, snapshot_dates)
+            processed["snapshot_df"] = pd.DataFrame(processed["snapshots"], columns=SNAPSHOT_COLUMNS)
+            processed["snapshot_index"] = build_code_index(processed["snapshot_df"]["Kode Aset"].tolist())
+
+        processed["snapshot_dates"] = snapshot_dates
+
+    snapshot_rows = processed["snapshots"]
+
+    rollups = []
+
+    if rollup_mode:
+        if processed.get("rollups") is None:
+            with profile_stage(profiler, "Rekap semesteran & tahunan"):
+                processed["rollups"] = compute_period_rollups(schedule_store)
+                processed["rollup_frames"] = {
+                    rollup["granularity"]: rollup_df(rollup)
+                    for rollup in processed["rollups"]
+                }
+                processed["rollup_indexes"] = {
+                    granularity: build_code_index(df["Kode Aset"].tolist())
+                    for granularity, df in processed["rollup_frames"].items()
+                }
+
+        rollups = processed["rollups"]
+
+    code_index = processed["code_index"]
+    results_df = processed["frames"]["results"]
+    skipped_df = processed["frames"]["skipped"]
+    anomaly_df = processed["frames"]["anomalies"]
 
     st.markdown("### Ringkasan Proses")
 
@@ -1069,6 +852,29 @@ def app():
     with c4:
         status_card("Anomali", len(anomaly_rows), "status-red")
 
+    if processed.get("reused_count"):
+        c5, c6, _, _ = st.columns(4)
+
+        with c5:
+            status_card("Dipakai Ulang", processed["reused_count"], "status-blue")
+
+        with c6:
+            status_card("Dihitung Ulang", processed.get("recomputed_count", 0), "status-green")
+
+    if profiler is not None:
+        with st.expander("⏱️ Performa", expanded=False):
+            st.dataframe(pd.DataFrame(stage_rows(profiler)), use_container_width=True, hide_index=True)
+            st.caption("Aset dengan baris jadwal terbanyak")
+            st.dataframe(pd.DataFrame(largest_schedule_assets(schedule_store)), use_container_width=True, hide_index=True)
+
+    tracer = st.session_state.get("bulanan_tracer")
+
+    if tracer is not None:
+        with st.expander("🔎 Trace Aset", expanded=False):
+            st.dataframe(trace_frame(tracer), use_container_width=True, hide_index=True)
+            st.download_button("📥 Download Trace (JSONL)", trace_bytes(tracer, TRACE_FORMAT_JSONL), "trace_penyusutan_bulanan.jsonl", "application/x-ndjson")
+            st.download_button("📥 Download Trace (biner .npz)", trace_bytes(tracer, TRACE_FORMAT_BINARY), "trace_penyusutan_bulanan.npz", "application/octet-stream")
+
     search_col1, search_col2 = st.columns([2, 1])
 
     with search_col1:
@@ -1090,44 +896,21 @@ def app():
             key="bulanan_filter_anomali"
         )
 
-    filtered_results_df = results_df.copy()
-    filtered_anomaly_df = anomaly_df.copy()
-
-    if search_kode and not filtered_results_df.empty:
-        filtered_results_df = filtered_results_df[
-            filtered_results_df["Kode Aset"].astype(str).str.contains(
-                search_kode,
-                case=False,
-                na=False
-            )
-        ]
-
-    if search_kode and not filtered_anomaly_df.empty:
-        filtered_anomaly_df = filtered_anomaly_df[
-            filtered_anomaly_df["Kode Aset"].astype(str).str.contains(
-                search_kode,
-                case=False,
-                na=False
-            )
-        ]
+    # Pencarian dilayani indeks Kode Aset: hasilnya nomor baris, bukan salinan DataFrame
+    result_rows = search_code_index(code_index["results"], search_kode)
+    anomaly_rows_found = search_code_index(code_index["anomalies"], search_kode)
+    anomaly_asset_codes = set(code_index["anomalies"]["codes"][anomaly_rows_found].tolist())
 
-    anomaly_asset_codes = set()
+    if filter_anomali == "Hanya Anomali":
+        result_rows = rows_with_codes(code_index["results"], result_rows, anomaly_asset_codes)
 
-    if not filtered_anomaly_df.empty and "Kode Aset" in filtered_anomaly_df.columns:
-        anomaly_asset_codes = set(filtered_anomaly_df["Kode Aset"].astype(str).tolist())
+    if filter_anomali == "Tanpa Anomali":
+        result_rows = rows_with_codes(code_index["results"], result_rows, anomaly_asset_codes, include=False)
 
-    if filter_anomali == "Hanya Anomali" and not filtered_results_df.empty:
-        filtered_results_df = filtered_results_df[
-            filtered_results_df["Kode Aset"].astype(str).isin(anomaly_asset_codes)
-        ]
-
-    if filter_anomali == "Tanpa Anomali" and not filtered_results_df.empty:
-        filtered_results_df = filtered_results_df[
-            ~filtered_results_df["Kode Aset"].astype(str).isin(anomaly_asset_codes)
-        ]
-
-    tab1, tab2, tab3, tab4 = st.tabs([
+    tab1, tab_snapshot, tab_rollup, tab2, tab3, tab4 = st.tabs([
         "📊 Hasil Perhitungan",
+        "📅 Snapshot Pelaporan",
+        "🗓️ Rekap Periode",
         "📝 Reviu Hasil",
         "📂 Detail per Aset",
         "📥 Export"
@@ -1136,14 +919,69 @@ def app():
     with tab1:
         st.markdown("#### Ringkasan Hasil")
 
-        if not filtered_results_df.empty:
-            st.dataframe(
-                filtered_results_df,
-                use_container_width=True,
-                hide_index=True
-            )
+        show_paginated_table(
+            results_df,
+            result_rows,
+            "bulanan_hasil",
+            "Tidak ada data hasil yang sesuai filter."
+        )
+
+    with tab_snapshot:
+        st.markdown("#### Snapshot per Tanggal Pelaporan")
+
+        snapshot_df = processed["snapshot_df"]
+        snapshot_rows_found = search_code_index(processed["snapshot_index"], search_kode)
+
+        if len(snapshot_rows_found):
+            total_df = snapshot_df.iloc[snapshot_rows_found].groupby("Tanggal Pelaporan", sort=False).agg({
+                "Kode Aset": "count",
+                "Beban Penyusutan Tahun Berjalan": "sum",
+                "Akumulasi Penyusutan": "sum",
+                "Nilai Buku Akhir": "sum",
+            }).rename(columns={"Kode Aset": "Jumlah Aset"}).reset_index()
+
+            st.dataframe(total_df, use_container_width=True, hide_index=True)
+
+        show_paginated_table(
+            snapshot_df,
+            snapshot_rows_found,
+            "bulanan_snapshot",
+            "Tidak ada data snapshot yang sesuai filter."
+        )
+
+    with tab_rollup:
+        st.markdown("#### Rekap Semesteran & Tahunan")
+
+        if not rollups:
+            st.info("Aktifkan **Rekap semesteran & tahunan** di panel kiri untuk menampilkan rekap.")
         else:
-            st.warning("Tidak ada data hasil yang sesuai filter.")
+            rollup_granularity = st.radio(
+                "Periode rekap",
+                options=ROLLUP_GRANULARITIES,
+                format_func=lambda granularity: ROLLUP_SHEET_NAMES[granularity],
+                horizontal=True,
+                key="bulanan_rollup_granularity"
+            )
+
+            rollup_frame = processed["rollup_frames"][rollup_granularity]
+            rollup_rows_found = search_code_index(processed["rollup_indexes"][rollup_granularity], search_kode)
+
+            if len(rollup_rows_found):
+                total_df = rollup_frame.iloc[rollup_rows_found].groupby("Periode", sort=True).agg({
+                    "Kode Aset": "count",
+                    "Beban Penyusutan Periode Ini": "sum",
+                    "Akumulasi Penyusutan": "sum",
+                    "Nilai Buku Akhir": "sum",
+                }).rename(columns={"Kode Aset": "Jumlah Aset"}).reset_index()
+
+                st.dataframe(total_df, use_container_width=True, hide_index=True)
+
+            show_paginated_table(
+                rollup_frame,
+                rollup_rows_found,
+                f"bulanan_rekap_{rollup_granularity}",
+                "Tidak ada data rekap yang sesuai filter."
+            )
 
     with tab2:
         left, right = st.columns(2)
@@ -1152,36 +990,24 @@ def app():
             st.markdown("#### Baris yang Dilewati")
 
             if not skipped_df.empty:
-                skipped_df_show = skipped_df.copy()
-
-                if search_kode and "Kode Aset" in skipped_df_show.columns:
-                    skipped_df_show = skipped_df_show[
-                        skipped_df_show["Kode Aset"].astype(str).str.contains(
-                            search_kode,
-                            case=False,
-                            na=False
-                        )
-                    ]
-
-                if not skipped_df_show.empty:
-                    st.dataframe(
-                        skipped_df_show,
-                        use_container_width=True,
-                        hide_index=True
-                    )
-                else:
-                    st.info("Tidak ada baris dilewati yang sesuai filter.")
+                show_paginated_table(
+                    skipped_df,
+                    search_code_index(code_index["skipped"], search_kode),
+                    "bulanan_dilewati",
+                    "Tidak ada baris dilewati yang sesuai filter."
+                )
             else:
                 st.success("Tidak ada baris yang dilewati.")
 
         with right:
             st.markdown("#### Input Aset Tidak Logis / Anomali")
 
-            if not filtered_anomaly_df.empty:
-                st.dataframe(
-                    filtered_anomaly_df,
-                    use_container_width=True,
-                    hide_index=True
+            if len(anomaly_rows_found):
+                show_paginated_table(
+                    anomaly_df,
+                    anomaly_rows_found,
+                    "bulanan_anomali",
+                    "Tidak ada input anomali yang sesuai filter."
                 )
             else:
                 st.success("Tidak ada input anomali yang sesuai filter.")
@@ -1193,31 +1019,26 @@ def app():
             "Untuk menjaga aplikasi tetap ringan, detail ditampilkan berdasarkan Kode Aset yang dipilih."
         )
 
-        detail_options = list(schedules_dict.keys())
-
-        if search_kode:
-            detail_options = [
-                x for x in detail_options
-                if search_kode.lower() in str(x).lower()
-            ]
+        # Kode yang diawali kata kunci tampil lebih dulu
+        detail_rows = search_code_index(code_index["schedules"], search_kode, prefix_first=True)
 
         if filter_anomali == "Hanya Anomali":
-            detail_options = [
-                x for x in detail_options
-                if str(x) in anomaly_asset_codes
-            ]
+            detail_rows = rows_with_codes(code_index["schedules"], detail_rows, anomaly_asset_codes)
 
         if filter_anomali == "Tanpa Anomali":
-            detail_options = [
-                x for x in detail_options
-                if str(x) not in anomaly_asset_codes
-            ]
-
-        if len(detail_options) > 5000:
-            st.warning(
-                "Kode aset terlalu banyak. Ketik sebagian Kode Aset pada kolom pencarian agar pilihan lebih ringan."
+            detail_rows = rows_with_codes(code_index["schedules"], detail_rows, anomaly_asset_codes, include=False)
+
+        if len(detail_rows) > DETAIL_OPTIONS_PER_PAGE:
+            n_pages = math.ceil(len(detail_rows) / DETAIL_OPTIONS_PER_PAGE)
+            page = page_number_input(
+                f"Halaman pilihan Kode Aset ({len(detail_rows):,} kode, {DETAIL_OPTIONS_PER_PAGE} per halaman)",
+                n_pages,
+                "bulanan_detail_page"
             )
-            detail_options = detail_options[:5000]
+            start = (page - 1) * DETAIL_OPTIONS_PER_PAGE
+            detail_rows = detail_rows[start:start + DETAIL_OPTIONS_PER_PAGE]
+
+        detail_options = code_index["schedules"]["codes"][detail_rows].tolist()
 
         if detail_options:
             selected_asset = st.selectbox(
@@ -1227,7 +1048,7 @@ def app():
             )
 
             if selected_asset:
-                detail_df = pd.DataFrame(schedules_dict[selected_asset])
+                detail_df = get_asset_schedule_df(schedule_store, selected_asset)
 
                 st.dataframe(
                     detail_df,
@@ -1241,44 +1062,125 @@ def app():
         st.markdown("#### Export Hasil Excel")
 
         st.warning(
-            "File Excel hasil baru dibuat setelah tombol di bawah diklik. "
-            "Format export tetap menggunakan sheet masing-masing Kode Aset untuk kebutuhan KKP."
+            "File Excel hasil baru dibuat setelah tombol di bawah diklik."
         )
 
-        jumlah_sheet_detail = len(schedules_dict)
-
-        st.info(
-            f"Estimasi sheet detail aset yang akan dibuat: {jumlah_sheet_detail} sheet. "
-            "Jika jumlah aset sangat banyak, proses export bisa memerlukan waktu lebih lama."
+        export_mode = st.radio(
+            "Format detail jadwal",
+            options=[EXPORT_MODE_SHEET_PER_ASSET, EXPORT_MODE_LONG_DETAIL],
+            format_func=lambda mode: {
+                EXPORT_MODE_SHEET_PER_ASSET: "Sheet per Kode Aset (format KKP)",
+                EXPORT_MODE_LONG_DETAIL: "Satu sheet Detail (tabel Excel) + sheet per aset anomali/pilihan",
+            }[mode],
+            key="bulanan_export_mode"
         )
 
+        selected_codes = []
+
+        if export_mode == EXPORT_MODE_LONG_DETAIL:
+            selected_text = st.text_area(
+                "Kode Aset yang tetap dibuat sheet tersendiri (opsional)",
+                placeholder="Pisahkan dengan koma, spasi, atau baris baru",
+                key="bulanan_export_selected_codes"
+            )
+            selected_codes = [
+                code for code in selected_text.replace(",", " ").split()
+                if code in schedule_store["positions"]
+            ]
+
+        jumlah_sheet_detail = len(asset_sheet_codes_for_export(
+            schedule_store,
+            anomaly_rows=anomaly_rows,
+            selected_codes=selected_codes,
+            export_mode=export_mode
+        ))
+
+        if rollups:
+            st.info(
+                "Sheet rekap: " + ", ".join(
+                    name for rollup in rollups for name in rollup_sheet_names(rollup)
+                ) + "."
+            )
+
+        if export_mode == EXPORT_MODE_LONG_DETAIL:
+            st.info(
+                f"Sheet Detail: {len(long_detail_sheet_names(schedule_store))} sheet tabel Excel "
+                f"(dapat difilter per Kode Aset dan Periode). Sheet per aset: {jumlah_sheet_detail} "
+                "(aset anomali dan pilihan)."
+            )
+        else:
+            st.info(
+                f"Estimasi sheet detail aset yang akan dibuat: {jumlah_sheet_detail} sheet. "
+                "Jika jumlah aset sangat banyak, gunakan format satu sheet Detail agar export lebih cepat."
+            )
+
         export_clicked = st.button(
             "📦 Siapkan File Excel Hasil",
             use_container_width=True,
             key="bulanan_export"
         )
 
-        if export_clicked:
-            with st.spinner("Membuat file Excel hasil dengan sheet per Kode Aset..."):
-                excel_buffer = convert_df_to_excel_with_sheets(
-                    results,
-                    schedules_dict,
-                    skipped_rows=skipped_rows,
-                    anomaly_rows=anomaly_rows,
-                    total_rows=total_rows
-                )
+        if export_clicked and st.session_state.get("bulanan_export_job_id") is None:
+            remove_export_file(st.session_state.get("bulanan_export_path"))
+            st.session_state["bulanan_export_path"] = None
+
+            performance = None
+
+            if profiler is not None:
+                performance = {
+                    "stages": stage_rows(profiler),
+                    "largest": largest_schedule_assets(schedule_store),
+                }
+
+            st.session_state["bulanan_export_job_id"] = submit_job(
+                EXPORT_JOB_KIND,
+                run_export_job,
+                profiler=profiler,
+                results=results,
+                schedule_store=schedule_store,
+                skipped_rows=skipped_rows,
+                anomaly_rows=anomaly_rows,
+                total_rows=total_rows,
+                snapshot_rows=snapshot_rows,
+                performance=performance,
+                export_mode=export_mode,
+                selected_codes=selected_codes,
+                rollups=rollups
+            )
 
-            st.success("File Excel hasil berhasil dibuat.")
+        export_job_id = st.session_state.get("bulanan_export_job_id")
 
-            st.download_button(
-                "📥 Download Hasil Excel",
-                excel_buffer,
-                "hasil_penyusutan_bulanan_2025.xlsx",
-                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True,
-                key="bulanan_download_hasil"
-            )
+        if export_job_id is not None:
+            export_status = job_status(export_job_id)
+
+            if export_status is not None and not export_status["finished"]:
+                show_job_progress(export_job_id, "Export Excel")
+            else:
+                export_job = discard_job(export_job_id)
+                st.session_state["bulanan_export_job_id"] = None
+
+                if export_status is None:
+                    st.warning("Job export tidak ditemukan (server dimulai ulang atau job kedaluwarsa).")
+                elif export_status["status"] == STATUS_DONE:
+                    st.session_state["bulanan_export_path"] = export_job["result"]
+                    st.success(f"File Excel hasil berhasil dibuat dalam {export_status['elapsed']} detik.")
+                elif export_status["status"] == STATUS_CANCELLED:
+                    st.warning("Export dibatalkan.")
+                else:
+                    st.error(f"❌ Export gagal: {export_status['error']}")
 
+        export_path = st.session_state.get("bulanan_export_path")
+
+        if export_path and os.path.exists(export_path):
+            with open(export_path, "rb") as export_file:
+                st.download_button(
+                    "📥 Download Hasil Excel",
+                    export_file,
+                    "hasil_penyusutan_bulanan_2025.xlsx",
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True,
+                    key="bulanan_download_hasil"
+                )
 
 if __name__ == "__main__":
     app()
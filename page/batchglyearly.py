@@ -3,84 +3,153 @@ import pandas as pd
 from datetime import datetime
 from io import BytesIO
 
-# Fungsi Helper: Menghitung Depresiasi
+import numpy as np
+
+from page.susutcore import (
+    PERIOD_ANNUAL,
+    depreciation_kernel,
+    kernel_last_values,
+    kernel_schedule_records,
+    period_index,
+    register_event_tables,
+    round_money,
+    whole_periods,
+)
+from page.parseangka import parse_number_column
+from page.susutperf import largest_asset_rows, new_profiler, profile_stage, stage_rows
+from page.susuttrace import TRACE_FORMAT_BINARY, TRACE_FORMAT_JSONL, kernel_trace, new_tracer, parse_trace_codes, trace_bytes, trace_frame
+
+# Fungsi Helper: Menghitung Depresiasi (satu aset, kernel bersama page.susutcore)
 def calculate_depreciation(initial_cost, acquisition_year, useful_life, reporting_year, capitalizations=None, corrections=None):
     if capitalizations is None:
         capitalizations = []
     if corrections is None:
         corrections = []
 
-    # Organize capitalizations and corrections by year
-    cap_dict = {}
-    for cap in capitalizations:
-        year = cap.get("Tahun")
-        if year is not None:
-            cap_dict.setdefault(year, []).append(cap)
-
-    corr_dict = {}
-    for corr in corrections:
-        year = corr.get("Tahun")
-        if year is not None:
-            corr_dict.setdefault(year, []).append(corr)
-
-    book_value = initial_cost
-    remaining_life = useful_life
-    current_year = acquisition_year
-    original_life = useful_life  # Simpan masa manfaat awal
-    accumulated_dep = 0
-    schedule = []
-
-    while current_year <= reporting_year:
-        # Proses kapitalisasi
-        if current_year in cap_dict:
-            for cap in cap_dict[current_year]:
-                if cap.get("Tahun") > reporting_year:
-                    continue
-                # Update nilai buku
-                book_value += cap.get("Jumlah", 0)
-                
-                # Update masa manfaat dengan batasan tidak melebihi masa manfaat awal
-                life_extension = cap.get("Tambahan Usia", 0)
-                remaining_life = min(remaining_life + life_extension, original_life)  # Batas maksimal: original_life
-
-        # Proses koreksi
-        if current_year in corr_dict:
-            for corr in corr_dict[current_year]:
-                if corr.get("Tahun") > reporting_year:
-                    continue
-                book_value = max(book_value - corr.get("Jumlah", 0), 0)  # Minimal 0
-
-        # Hitung penyusutan hanya jika ada sisa masa manfaat
-        annual_dep = 0
-        if remaining_life > 0:
-            annual_dep = book_value / remaining_life
-            accumulated_dep += annual_dep
-            book_value -= annual_dep
-            remaining_life -= 1
-
-        # Catat ke schedule
-        schedule.append({
-            "year": current_year,
-            "depreciation": round(annual_dep, 2),
-            "accumulated": round(accumulated_dep, 2),
-            "book_value": round(book_value, 2),
-            "sisa_mm": remaining_life,
-        })
-
-        # Debugging (opsional)
-        print(f"Year: {current_year}, Book Value: {book_value}, Remaining Life: {remaining_life}, Annual Depreciation: {annual_dep}")
-
-        current_year += 1
-
-    return schedule
+    caps_df = pd.DataFrame(capitalizations, columns=["Tahun", "Jumlah", "Tambahan Usia"]).assign(**{"Nama Aset": ""})
+    corrs_df = pd.DataFrame(corrections, columns=["Tahun", "Jumlah"]).assign(**{"Nama Aset": ""})
+
+    schedule = run_yearly_kernel(
+        [initial_cost], [acquisition_year], [useful_life], [reporting_year],
+        *year_events(caps_df, corrs_df, [""])
+    )
+
+    return kernel_schedule_records(schedule, PERIOD_ANNUAL)[0]
+
+def year_events(capitalizations_df, corrections_df, asset_names):
+    # Indeks periode tahunan = tahun itu sendiri
+    return register_event_tables(
+        capitalizations_df, corrections_df, "Nama Aset", asset_names,
+        pd.to_numeric(capitalizations_df["Tahun"], errors="coerce"),
+        pd.to_numeric(corrections_df["Tahun"], errors="coerce"),
+        PERIOD_ANNUAL
+    )
+
+def run_yearly_kernel(initial_costs, acquisition_years, useful_lives, reporting_years, cap_events, corr_events, trace=None):
+    # Aturan halaman ini: kapitalisasi/koreksi diterapkan baris demi baris,
+    # koreksi tidak membuat nilai buku negatif, dan penyusutan tetap
+    # dihitung selama sisa masa manfaat > 0
+    return depreciation_kernel(
+        np.asarray(initial_costs, dtype=float),
+        period_index(acquisition_years, granularity=PERIOD_ANNUAL),
+        period_index(reporting_years, granularity=PERIOD_ANNUAL),
+        np.asarray(useful_lives, dtype=np.int64),
+        capitalizations=cap_events,
+        corrections=corr_events,
+        per_row_events=True,
+        clamp_corrections=True,
+        require_book_value=False,
+        trace=trace
+    )
+
+# Fungsi Helper: Membaca Tiga Sheet Input (Aset, Kapitalisasi, Koreksi)
+def load_input_sheets(file):
+    excel_data = pd.ExcelFile(file)
+
+    assets_df = excel_data.parse(sheet_name=0)
+    capitalizations_df = excel_data.parse(sheet_name=1)
+    corrections_df = excel_data.parse(sheet_name=2)
+
+    return assets_df, capitalizations_df, corrections_df
+
+REQUIRED_ASSET_COLUMNS = {"Nama Aset", "Harga Perolehan Awal (Rp)", "Tahun Perolehan", "Masa Manfaat (tahun)", "Tahun Pelaporan"}
+
+def has_required_asset_columns(assets_df):
+    return REQUIRED_ASSET_COLUMNS.issubset(assets_df.columns)
+
+# Fungsi Helper: Normalisasi Nama Aset dan Kolom Numerik
+def prepare_input_data(assets_df, capitalizations_df, corrections_df):
+    # Baca dan konversi kolom "Nama Aset" ke string
+    assets_df["Nama Aset"] = assets_df["Nama Aset"].astype(str)
+    capitalizations_df["Nama Aset"] = capitalizations_df["Nama Aset"].astype(str)
+    corrections_df["Nama Aset"] = corrections_df["Nama Aset"].astype(str)
+
+    if not has_required_asset_columns(assets_df):
+        raise ValueError("Kolom di Sheet 1 tidak valid!")
+
+    # Konversi tipe data numerik; nilai uang boleh berformat Indonesia (Rp, titik ribuan, koma desimal)
+    assets_df["Harga Perolehan Awal (Rp)"] = parse_number_column(assets_df["Harga Perolehan Awal (Rp)"], "Harga Perolehan Awal (Rp)")
+    numeric_columns = ["Tahun Perolehan", "Masa Manfaat (tahun)", "Tahun Pelaporan"]
+    for col in numeric_columns:
+        assets_df[col] = pd.to_numeric(assets_df[col], errors="coerce")
+    if "Jumlah" in capitalizations_df.columns:
+        capitalizations_df["Jumlah"] = parse_number_column(capitalizations_df["Jumlah"], "Jumlah (Sheet Kapitalisasi)")
+    if "Jumlah" in corrections_df.columns:
+        corrections_df["Jumlah"] = parse_number_column(corrections_df["Jumlah"], "Jumlah (Sheet Koreksi)")
+
+    return assets_df, capitalizations_df, corrections_df
+
+# Fungsi Helper: Hitung Jadwal dan Ringkasan Seluruh Aset
+def compute_depreciation(assets_df, capitalizations_df, corrections_df, profiler=None, tracer=None):
+    asset_names = assets_df["Nama Aset"].astype(str).tolist()
+    reporting_years = whole_periods(assets_df["Tahun Pelaporan"], "Tahun Pelaporan")
+
+    # Kapitalisasi dan koreksi dipetakan ke posisi aset (berdasarkan Nama Aset) sekaligus
+    with profile_stage(profiler, "Petakan kapitalisasi & koreksi"):
+        cap_events, corr_events = year_events(capitalizations_df, corrections_df, asset_names)
+
+    with profile_stage(profiler, f"Kernel penyusutan ({len(asset_names)} aset)"):
+        schedule = run_yearly_kernel(
+            assets_df["Harga Perolehan Awal (Rp)"].to_numpy(dtype=float),
+            whole_periods(assets_df["Tahun Perolehan"], "Tahun Perolehan"),
+            whole_periods(assets_df["Masa Manfaat (tahun)"], "Masa Manfaat (tahun)"),
+            reporting_years,
+            cap_events,
+            corr_events,
+            trace=kernel_trace(tracer, asset_names, "tahunan", PERIOD_ANNUAL)
+        )
+
+    with profile_stage(profiler, "Susun jadwal & ringkasan"):
+        records = kernel_schedule_records(schedule, PERIOD_ANNUAL)
+        last_dep = round_money(kernel_last_values(schedule, "penyusutan"))
+        last_acc = round_money(kernel_last_values(schedule, "akumulasi"))
+        last_bv = round_money(kernel_last_values(schedule, "nilai_buku"))
+
+        results = pd.DataFrame({
+            "Nama Aset": asset_names,
+            "Tahun Pelaporan": reporting_years,
+            "Penyusutan": last_dep,
+            "Akumulasi": last_acc,
+            "Nilai Buku": last_bv,
+        }).to_dict("records")
+        schedules = dict(zip(asset_names, records))
+
+    return results, schedules
 
 # Fungsi Helper: Konversi DataFrame ke Excel dengan Multiple Sheets
-def convert_df_to_excel_with_sheets(results, schedules):
+def convert_df_to_excel_with_sheets(results, schedules, performance=None):
     buffer = BytesIO()
     with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
         # Sheet Ringkasan
         results_df = pd.DataFrame(results)
         results_df.to_excel(writer, index=False, sheet_name="Ringkasan")
+        # Sheet Reviu Hasil berisi performa proses (hanya jika dicatat)
+        if performance:
+            pd.DataFrame(performance["stages"]).to_excel(writer, sheet_name="Reviu Hasil", startrow=1, index=False)
+            writer.sheets["Reviu Hasil"].write(0, 0, "Performa Proses per Tahap")
+            largest_row = len(performance["stages"]) + 4
+            pd.DataFrame(performance["largest"]).to_excel(writer, sheet_name="Reviu Hasil", startrow=largest_row, index=False)
+            writer.sheets["Reviu Hasil"].write(largest_row - 1, 0, "Aset dengan Baris Jadwal Terbanyak")
         
         # Sheet per Aset
         for asset_name, schedule in schedules.items():
@@ -118,57 +187,42 @@ def app():
     if st.button("⬇️ Download Template Excel"):
         st.markdown("[Download](https://docs.google.com/spreadsheets/d/1b4bueqvZ0vDn7DtKgNK-uVQojLGMM8vQ/edit?usp=drive_link)")
 
+    profile_mode = st.checkbox(
+        "Catat performa proses",
+        value=False,
+        help="Mencatat waktu, CPU dan memori puncak per tahap (termasuk tahap kernel penyusutan).",
+        key=f"{__name__}_profile"
+    )
+    trace_codes = st.text_input(
+        "Lacak aset (trace)",
+        value="",
+        help="Nama Aset yang dicatat per periode, pisahkan dengan koma atau titik koma. Kosongkan untuk mematikan trace.",
+        key=f"{__name__}_trace"
+    )
+
     uploaded_file = st.file_uploader("📤 Unggah File Excel", type=["xlsx"])
     if uploaded_file is not None:
+        profiler = new_profiler(enabled=profile_mode)
+        tracer = new_tracer(parse_trace_codes(trace_codes))
         try:
-            excel_data = pd.ExcelFile(uploaded_file)
-            
-            # Baca dan konversi kolom "Nama Aset" ke string
-            assets_df = excel_data.parse(sheet_name=0)
-            capitalizations_df = excel_data.parse(sheet_name=1)
-            corrections_df = excel_data.parse(sheet_name=2)
-            
-            assets_df["Nama Aset"] = assets_df["Nama Aset"].astype(str)
-            capitalizations_df["Nama Aset"] = capitalizations_df["Nama Aset"].astype(str)
-            corrections_df["Nama Aset"] = corrections_df["Nama Aset"].astype(str)
+            with profile_stage(profiler, "Baca file"):
+                assets_df, capitalizations_df, corrections_df = load_input_sheets(uploaded_file)
 
             # Validasi kolom dan tipe data
-            required_assets = {"Nama Aset", "Harga Perolehan Awal (Rp)", "Tahun Perolehan", "Masa Manfaat (tahun)", "Tahun Pelaporan"}
-            if not required_assets.issubset(assets_df.columns):
+            if not has_required_asset_columns(assets_df):
                 st.error("Kolom di Sheet 1 tidak valid!")
                 return
 
-            # Konversi tipe data numerik
-            numeric_columns = ["Harga Perolehan Awal (Rp)", "Tahun Perolehan", "Masa Manfaat (tahun)", "Tahun Pelaporan"]
-            for col in numeric_columns:
-                assets_df[col] = pd.to_numeric(assets_df[col], errors="coerce")
-            
-            # Proses perhitungan
-            results = []
-            schedules = {}
-            for _, asset in assets_df.iterrows():
-                asset_name = str(asset["Nama Aset"])  # Pastikan string
-                initial_cost = asset["Harga Perolehan Awal (Rp)"]
-                acquisition_year = int(asset["Tahun Perolehan"])
-                useful_life = int(asset["Masa Manfaat (tahun)"])
-                reporting_year = int(asset["Tahun Pelaporan"])
-
-                # Filter data kapitalisasi dan koreksi
-                asset_caps = capitalizations_df[capitalizations_df["Nama Aset"] == asset_name].to_dict("records")
-                asset_corrs = corrections_df[corrections_df["Nama Aset"] == asset_name].to_dict("records")
-
-                schedule = calculate_depreciation(
-                    initial_cost, acquisition_year, useful_life, reporting_year, asset_caps, asset_corrs
+            with profile_stage(profiler, "Validasi & normalisasi input"):
+                assets_df, capitalizations_df, corrections_df = prepare_input_data(
+                    assets_df, capitalizations_df, corrections_df
                 )
 
-                results.append({
-                    "Nama Aset": asset_name,
-                    "Tahun Pelaporan": reporting_year,
-                    "Penyusutan": schedule[-1]["depreciation"] if schedule else 0,
-                    "Akumulasi": schedule[-1]["accumulated"] if schedule else 0,
-                    "Nilai Buku": schedule[-1]["book_value"] if schedule else 0,
-                })
-                schedules[asset_name] = schedule
+            # Proses perhitungan
+            with profile_stage(profiler, "Hitung penyusutan"):
+                results, schedules = compute_depreciation(
+                    assets_df, capitalizations_df, corrections_df, profiler=profiler, tracer=tracer
+                )
 
             # Tampilkan hasil
             results_df = pd.DataFrame(results)
@@ -179,13 +233,30 @@ def app():
             }))
 
             # Download hasil
-            excel_buffer = convert_df_to_excel_with_sheets(results, schedules)
+            performance = None
+            if profiler is not None:
+                performance = {
+                    "stages": stage_rows(profiler),
+                    "largest": largest_asset_rows(list(schedules), [len(schedule) for schedule in schedules.values()], key_label="Nama Aset"),
+                }
+            with profile_stage(profiler, "Export Excel"):
+                excel_buffer = convert_df_to_excel_with_sheets(results, schedules, performance)
             st.download_button(
                 "📥 Download Hasil",
                 excel_buffer,
                 "hasil_penyusutan.xlsx",
                 "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
+            if profiler is not None:
+                with st.expander("⏱️ Performa", expanded=False):
+                    st.dataframe(pd.DataFrame(stage_rows(profiler)), use_container_width=True, hide_index=True)
+                    st.caption("Aset dengan baris jadwal terbanyak")
+                    st.dataframe(pd.DataFrame(performance["largest"]), use_container_width=True, hide_index=True)
+            if tracer is not None:
+                with st.expander("🔎 Trace Aset", expanded=False):
+                    st.dataframe(trace_frame(tracer), use_container_width=True, hide_index=True)
+                    st.download_button("📥 Download Trace (JSONL)", trace_bytes(tracer, TRACE_FORMAT_JSONL), "trace_penyusutan.jsonl", "application/x-ndjson")
+                    st.download_button("📥 Download Trace (biner .npz)", trace_bytes(tracer, TRACE_FORMAT_BINARY), "trace_penyusutan.npz", "application/octet-stream")
 
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
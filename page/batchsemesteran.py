@@ -1,108 +1,175 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
 from io import BytesIO
 import requests
 
-# Fungsi Helper: Konversi Tanggal ke Semester
-def convert_date_to_semester(date_str):
-    try:
-        date = datetime.strptime(date_str, "%d/%m/%Y")
-    except ValueError:
-        raise ValueError(f"Tanggal tidak valid: {date_str}")
-    year = date.year
-    month = date.month
-    semester = 1 if 1 <= month <= 6 else 2
-    return (year, semester)
-
-# Fungsi Helper: Menghitung Depresiasi Semesteran
+import numpy as np
+
+from page.susutcore import (
+    PERIOD_SEMESTER,
+    depreciation_kernel,
+    kernel_last_values,
+    kernel_schedule_records,
+    parse_date_cells,
+    period_parts,
+    register_event_tables,
+    round_money,
+    row_periods,
+    semester_periods,
+    whole_periods,
+)
+from page.parseangka import parse_number_column
+from page.susutperf import largest_asset_rows, new_profiler, profile_stage, stage_rows
+from page.susuttrace import TRACE_FORMAT_BINARY, TRACE_FORMAT_JSONL, kernel_trace, new_tracer, parse_trace_codes, trace_bytes, trace_frame
+
+# Fungsi Helper: Menghitung Depresiasi Semesteran (satu aset, kernel bersama page.susutcore)
 def calculate_depreciation(initial_cost, acquisition_date, useful_life, reporting_date, capitalizations=None, corrections=None):
     if capitalizations is None:
         capitalizations = []
     if corrections is None:
         corrections = []
-    useful_life_semesters = useful_life * 2
-    original_life_semesters = useful_life_semesters
-    acquisition_year, acquisition_semester = convert_date_to_semester(acquisition_date)
-    reporting_year, reporting_semester = convert_date_to_semester(reporting_date)
-    cap_dict = {}
-    for cap in capitalizations:
-        key = convert_date_to_semester(cap["Tanggal"])
-        cap_dict.setdefault(key, []).append(cap)
-    corr_dict = {}
-    for corr in corrections:
-        key = convert_date_to_semester(corr["Tanggal"])
-        corr_dict.setdefault(key, []).append(corr)
-    book_value = initial_cost
-    remaining_life = useful_life_semesters
-    current_year, current_semester = acquisition_year, acquisition_semester
-    accumulated_dep = 0
-    schedule = []
-    while (current_year < reporting_year) or (current_year == reporting_year and current_semester <= reporting_semester):
-        key = (current_year, current_semester)
-        if key in cap_dict:
-            for cap in cap_dict[key]:
-                book_value += cap.get("Jumlah", 0)
-                life_extension = cap.get("Tambahan Usia", 0) * 2
-                remaining_life = min(remaining_life + life_extension, original_life_semesters)
-        if key in corr_dict:
-            for corr in corr_dict[key]:
-                book_value = max(book_value - corr.get("Jumlah", 0), 0)
-        semester_dep = 0
-        if remaining_life > 0:
-            semester_dep = book_value / remaining_life
-            accumulated_dep += semester_dep
-            book_value -= semester_dep
-            remaining_life -= 1
-        schedule.append({
-            "year": current_year,
-            "semester": current_semester,
-            "depreciation": round(semester_dep, 2),
-            "accumulated": round(accumulated_dep, 2),
-            "book_value": round(book_value, 2),
-            "sisa_mm": remaining_life,
-        })
-        if current_semester == 1:
-            current_semester = 2
-        else:
-            current_semester = 1
-            current_year += 1
-    return schedule
-
-# Fungsi Helper: Memastikan Format Tanggal
-def ensure_date_format(date_value):
-    if isinstance(date_value, pd.Timestamp):
-        return date_value.strftime("%d/%m/%Y")
-    elif isinstance(date_value, str):
-        try:
-            parsed_date = datetime.strptime(date_value, "%m/%d/%y")
-            return parsed_date.strftime("%d/%m/%Y")
-        except ValueError:
-            try:
-                parsed_date = datetime.strptime(date_value, "%d/%m/%Y")
-                return parsed_date.strftime("%d/%m/%Y")
-            except ValueError:
-                raise ValueError(f"Format tanggal tidak valid: {date_value}")
-    else:
-        raise ValueError(f"Tipe data tanggal tidak valid: {type(date_value)}")
-
-# Fungsi konversi angka Indonesia ke float
-def convert_indonesian_number(number_str):
-    if isinstance(number_str, (int, float)):
-        return float(number_str)
-    return float(
-        str(number_str)
-        .replace(".", "")  # Hapus pemisah ribuan
-        .replace(",", ".")  # Ganti desimal koma dengan titik
+    caps_df = pd.DataFrame(capitalizations, columns=["Tanggal", "Jumlah", "Tambahan Usia"]).assign(**{"Nama Aset": ""})
+    corrs_df = pd.DataFrame(corrections, columns=["Tanggal", "Jumlah"]).assign(**{"Nama Aset": ""})
+    schedule = run_semester_kernel(
+        [initial_cost],
+        semester_periods([acquisition_date]),
+        [useful_life],
+        semester_periods([reporting_date]),
+        *semester_events(caps_df, corrs_df, [""])
+    )
+    return kernel_schedule_records(schedule, PERIOD_SEMESTER)[0]
+
+def semester_events(capitalizations_df, corrections_df, asset_names):
+    return register_event_tables(
+        capitalizations_df, corrections_df, "Nama Aset", asset_names,
+        semester_periods(capitalizations_df["Tanggal"]),
+        semester_periods(corrections_df["Tanggal"]),
+        PERIOD_SEMESTER
+    )
+
+def run_semester_kernel(initial_costs, acquisition_periods, useful_lives, reporting_periods, cap_events, corr_events, trace=None):
+    # Aturan halaman ini: kapitalisasi/koreksi diterapkan baris demi baris,
+    # koreksi tidak membuat nilai buku negatif, dan penyusutan tetap
+    # dihitung selama sisa masa manfaat > 0
+    return depreciation_kernel(
+        np.asarray(initial_costs, dtype=float),
+        whole_periods(acquisition_periods, "Tanggal Perolehan"),
+        whole_periods(reporting_periods, "Tanggal Pelaporan"),
+        np.asarray(useful_lives, dtype=np.int64) * 2,
+        capitalizations=cap_events,
+        corrections=corr_events,
+        per_row_events=True,
+        clamp_corrections=True,
+        require_book_value=False,
+        trace=trace
     )
 
+# Fungsi Helper: Membaca Tiga Sheet Input (Aset, Kapitalisasi, Koreksi)
+def load_input_sheets(file):
+    excel_data = pd.ExcelFile(file)
+    # Baca data dan proses rename kolom
+    assets_df = excel_data.parse(sheet_name=0)
+    assets_df.rename(columns={
+        "TANGGAL PEROLEHAN": "Tanggal Perolehan",
+        "Tahun Pelaporan": "Tanggal Pelaporan"
+    }, inplace=True)
+    capitalizations_df = excel_data.parse(sheet_name=1)
+    capitalizations_df.rename(columns={"Tahun": "Tanggal"}, inplace=True)
+    corrections_df = excel_data.parse(sheet_name=2)
+    corrections_df.rename(columns={"Tahun": "Tanggal"}, inplace=True)
+    return assets_df, capitalizations_df, corrections_df
+
+REQUIRED_ASSET_COLUMNS = {
+    "Nama Aset", 
+    "Harga Perolehan Awal (Rp)", 
+    "Tanggal Perolehan", 
+    "Masa Manfaat (tahun)", 
+    "Tanggal Pelaporan"
+}
+
+def has_required_asset_columns(assets_df):
+    return REQUIRED_ASSET_COLUMNS.issubset(assets_df.columns)
+
+# Fungsi Helper: Normalisasi Angka, Tanggal, dan Nama Aset
+def prepare_input_data(assets_df, capitalizations_df, corrections_df):
+    if not has_required_asset_columns(assets_df):
+        raise ValueError("Kolom di Sheet 1 tidak valid! Pastikan kolom sesuai template.")
+    # Proses data numerik dengan format Indonesia
+    assets_df["Harga Perolehan Awal (Rp)"] = parse_number_column(assets_df["Harga Perolehan Awal (Rp)"], "Harga Perolehan Awal (Rp)")
+    assets_df["Masa Manfaat (tahun)"] = pd.to_numeric(assets_df["Masa Manfaat (tahun)"], errors="coerce")
+    # Konversi tanggal
+    assets_df["Tanggal Perolehan"] = parse_date_cells(assets_df["Tanggal Perolehan"])
+    assets_df["Tanggal Pelaporan"] = parse_date_cells(assets_df["Tanggal Pelaporan"])
+    # Pastikan kolom "Nama Aset" selalu string
+    assets_df["Nama Aset"] = assets_df["Nama Aset"].astype(str)
+    # Proses sheet kapitalisasi
+    capitalizations_df["Tanggal"] = parse_date_cells(capitalizations_df["Tanggal"])
+    capitalizations_df["Jumlah"] = parse_number_column(capitalizations_df["Jumlah"], "Jumlah (Sheet Kapitalisasi)")
+    capitalizations_df["Nama Aset"] = capitalizations_df["Nama Aset"].astype(str)
+    # Proses sheet koreksi
+    corrections_df["Tanggal"] = parse_date_cells(corrections_df["Tanggal"])
+    corrections_df["Jumlah"] = parse_number_column(corrections_df["Jumlah"], "Jumlah (Sheet Koreksi)")
+    corrections_df["Nama Aset"] = corrections_df["Nama Aset"].astype(str)
+    return assets_df, capitalizations_df, corrections_df
+
+# Fungsi Helper: Hitung Jadwal dan Ringkasan Seluruh Aset
+def compute_depreciation(assets_df, capitalizations_df, corrections_df, profiler=None, tracer=None):
+    asset_names = assets_df["Nama Aset"].astype(str).tolist()
+    reporting_periods = semester_periods(assets_df["Tanggal Pelaporan"])
+    # Kapitalisasi dan koreksi dipetakan ke posisi aset (berdasarkan Nama Aset) sekaligus
+    with profile_stage(profiler, "Petakan kapitalisasi & koreksi"):
+        cap_events, corr_events = semester_events(capitalizations_df, corrections_df, asset_names)
+    with profile_stage(profiler, f"Kernel penyusutan ({len(asset_names)} aset)"):
+        schedule = run_semester_kernel(
+            assets_df["Harga Perolehan Awal (Rp)"].to_numpy(dtype=float),
+            semester_periods(assets_df["Tanggal Perolehan"]),
+            whole_periods(assets_df["Masa Manfaat (tahun)"], "Masa Manfaat (tahun)"),
+            reporting_periods,
+            cap_events,
+            corr_events,
+            trace=kernel_trace(tracer, asset_names, "semesteran", PERIOD_SEMESTER)
+        )
+    with profile_stage(profiler, "Susun jadwal & ringkasan"):
+        records = kernel_schedule_records(schedule, PERIOD_SEMESTER)
+        # Total penyusutan tahun pelaporan (semester I + semester II), dijumlah
+        # dari angka per semester yang sudah dibulatkan
+        offsets = schedule["offsets"]
+        lengths = np.diff(offsets)
+        row_asset = np.repeat(np.arange(len(asset_names)), lengths)
+        row_years, _ = period_parts(
+            row_periods(offsets, schedule["start_period"], np.arange(int(offsets[-1]))), PERIOD_SEMESTER
+        )
+        reporting_years, _ = period_parts(reporting_periods.astype(np.int64), PERIOD_SEMESTER)
+        in_year = row_years == reporting_years[row_asset]
+        depreciation_in_reporting_year = np.bincount(
+            row_asset[in_year],
+            weights=round_money(schedule["penyusutan"])[in_year],
+            minlength=len(asset_names)
+        )
+        results = pd.DataFrame({
+            "Nama Aset": asset_names,
+            "Tanggal Pelaporan": assets_df["Tanggal Pelaporan"].dt.strftime("%d/%m/%Y").tolist(),
+            "Penyusutan": round_money(depreciation_in_reporting_year),
+            "Akumulasi": round_money(kernel_last_values(schedule, "akumulasi")),
+            "Nilai Buku": round_money(kernel_last_values(schedule, "nilai_buku")),
+        }).to_dict("records")
+        schedules = dict(zip(asset_names, records))
+    return results, schedules
+
 # Fungsi Helper: Konversi DataFrame ke Excel dengan Beberapa Sheet
-def convert_df_to_excel_with_sheets(results, schedules):
+def convert_df_to_excel_with_sheets(results, schedules, performance=None):
     output = BytesIO()
     writer = pd.ExcelWriter(output, engine='xlsxwriter')
     # Menulis sheet Hasil Ringkasan
     results_df = pd.DataFrame(results)
     results_df.to_excel(writer, sheet_name="Hasil Ringkasan", index=False)
+    # Sheet Reviu Hasil berisi performa proses (hanya jika dicatat)
+    if performance:
+        pd.DataFrame(performance["stages"]).to_excel(writer, sheet_name="Reviu Hasil", startrow=1, index=False)
+        writer.sheets["Reviu Hasil"].write(0, 0, "Performa Proses per Tahap")
+        largest_row = len(performance["stages"]) + 4
+        pd.DataFrame(performance["largest"]).to_excel(writer, sheet_name="Reviu Hasil", startrow=largest_row, index=False)
+        writer.sheets["Reviu Hasil"].write(largest_row - 1, 0, "Aset dengan Baris Jadwal Terbanyak")
     # Menulis sheet untuk setiap aset
     for asset_name, schedule in schedules.items():
         schedule_df = pd.DataFrame(schedule)
@@ -151,88 +218,68 @@ def app():
         except Exception as e:
             st.error(f"❌ Gagal mengunduh template: {str(e)}")
 
+    profile_mode = st.checkbox(
+        "Catat performa proses",
+        value=False,
+        help="Mencatat waktu, CPU dan memori puncak per tahap (termasuk tahap kernel penyusutan).",
+        key=f"{__name__}_profile"
+    )
+    trace_codes = st.text_input(
+        "Lacak aset (trace)",
+        value="",
+        help="Nama Aset yang dicatat per periode, pisahkan dengan koma atau titik koma. Kosongkan untuk mematikan trace.",
+        key=f"{__name__}_trace"
+    )
+
     uploaded_file = st.file_uploader("📤 Unggah File Excel", type=["xlsx"])
     if uploaded_file is not None:
+        profiler = new_profiler(enabled=profile_mode)
+        tracer = new_tracer(parse_trace_codes(trace_codes))
         try:
-            excel_data = pd.ExcelFile(uploaded_file)
-            # Baca data dan proses rename kolom
-            assets_df = excel_data.parse(sheet_name=0)
-            assets_df.rename(columns={
-                "TANGGAL PEROLEHAN": "Tanggal Perolehan",
-                "Tahun Pelaporan": "Tanggal Pelaporan"
-            }, inplace=True)
+            with profile_stage(profiler, "Baca file"):
+                assets_df, capitalizations_df, corrections_df = load_input_sheets(uploaded_file)
             # Validasi kolom
-            required_assets = {
-                "Nama Aset", 
-                "Harga Perolehan Awal (Rp)", 
-                "Tanggal Perolehan", 
-                "Masa Manfaat (tahun)", 
-                "Tanggal Pelaporan"
-            }
-            if not required_assets.issubset(assets_df.columns):
+            if not has_required_asset_columns(assets_df):
                 st.error("Kolom di Sheet 1 tidak valid! Pastikan kolom sesuai template.")
                 return
-            # Proses data numerik dengan format Indonesia
-            assets_df["Harga Perolehan Awal (Rp)"] = assets_df["Harga Perolehan Awal (Rp)"].apply(convert_indonesian_number)
-            assets_df["Masa Manfaat (tahun)"] = pd.to_numeric(assets_df["Masa Manfaat (tahun)"], errors="coerce")
-            # Konversi tanggal
-            assets_df["Tanggal Perolehan"] = assets_df["Tanggal Perolehan"].apply(ensure_date_format)
-            assets_df["Tanggal Pelaporan"] = assets_df["Tanggal Pelaporan"].apply(ensure_date_format)
-            # Pastikan kolom "Nama Aset" selalu string
-            assets_df["Nama Aset"] = assets_df["Nama Aset"].astype(str)
-            # Proses sheet kapitalisasi
-            capitalizations_df = excel_data.parse(sheet_name=1)
-            capitalizations_df.rename(columns={"Tahun": "Tanggal"}, inplace=True)
-            capitalizations_df["Tanggal"] = capitalizations_df["Tanggal"].apply(ensure_date_format)
-            capitalizations_df["Jumlah"] = capitalizations_df["Jumlah"].apply(convert_indonesian_number)
-            capitalizations_df["Nama Aset"] = capitalizations_df["Nama Aset"].astype(str)
-            # Proses sheet koreksi
-            corrections_df = excel_data.parse(sheet_name=2)
-            corrections_df.rename(columns={"Tahun": "Tanggal"}, inplace=True)
-            corrections_df["Tanggal"] = corrections_df["Tanggal"].apply(ensure_date_format)
-            corrections_df["Jumlah"] = corrections_df["Jumlah"].apply(convert_indonesian_number)
-            corrections_df["Nama Aset"] = corrections_df["Nama Aset"].astype(str)
-            results = []
-            schedules = {}
-            for _, asset in assets_df.iterrows():
-                asset_name = str(asset["Nama Aset"])  # Pastikan string
-                initial_cost = asset["Harga Perolehan Awal (Rp)"]
-                acquisition_date = asset["Tanggal Perolehan"]
-                useful_life = int(asset["Masa Manfaat (tahun)"])
-                reporting_date = asset["Tanggal Pelaporan"]
-                # Filter kapitalisasi dan koreksi berdasarkan nama aset
-                asset_caps = capitalizations_df[capitalizations_df["Nama Aset"] == asset_name].to_dict("records")
-                asset_corrs = corrections_df[corrections_df["Nama Aset"] == asset_name].to_dict("records")
-                schedule = calculate_depreciation(
-                    initial_cost, acquisition_date, useful_life, reporting_date, asset_caps, asset_corrs
+            with profile_stage(profiler, "Validasi & normalisasi input"):
+                assets_df, capitalizations_df, corrections_df = prepare_input_data(
+                    assets_df, capitalizations_df, corrections_df
                 )
-                # Hitung total penyusutan untuk tahun pelaporan (semester I + semester II)
-                reporting_year, _ = convert_date_to_semester(reporting_date)
-                depreciation_in_reporting_year = sum(
-                    entry["depreciation"] for entry in schedule
-                    if entry["year"] == reporting_year
+            with profile_stage(profiler, "Hitung penyusutan"):
+                results, schedules = compute_depreciation(
+                    assets_df, capitalizations_df, corrections_df, profiler=profiler, tracer=tracer
                 )
-                results.append({
-                    "Nama Aset": asset_name,
-                    "Tanggal Pelaporan": reporting_date,
-                    "Penyusutan": round(depreciation_in_reporting_year, 2),
-                    "Akumulasi": schedule[-1]["accumulated"] if schedule else 0,
-                    "Nilai Buku": schedule[-1]["book_value"] if schedule else 0,
-                })
-                schedules[asset_name] = schedule
             results_df = pd.DataFrame(results)
             st.dataframe(results_df.style.format({
                 "Penyusutan": "{:,.2f}".format,
                 "Akumulasi": "{:,.2f}".format,
                 "Nilai Buku": "{:,.2f}".format,
             }))
-            excel_buffer = convert_df_to_excel_with_sheets(results, schedules)
+            performance = None
+            if profiler is not None:
+                performance = {
+                    "stages": stage_rows(profiler),
+                    "largest": largest_asset_rows(list(schedules), [len(schedule) for schedule in schedules.values()], key_label="Nama Aset"),
+                }
+            with profile_stage(profiler, "Export Excel"):
+                excel_buffer = convert_df_to_excel_with_sheets(results, schedules, performance)
             st.download_button(
                 "📥 Download Hasil",
                 excel_buffer,
                 "hasil_penyusutan.xlsx",
                 "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
+            if profiler is not None:
+                with st.expander("⏱️ Performa", expanded=False):
+                    st.dataframe(pd.DataFrame(stage_rows(profiler)), use_container_width=True, hide_index=True)
+                    st.caption("Aset dengan baris jadwal terbanyak")
+                    st.dataframe(pd.DataFrame(performance["largest"]), use_container_width=True, hide_index=True)
+            if tracer is not None:
+                with st.expander("🔎 Trace Aset", expanded=False):
+                    st.dataframe(trace_frame(tracer), use_container_width=True, hide_index=True)
+                    st.download_button("📥 Download Trace (JSONL)", trace_bytes(tracer, TRACE_FORMAT_JSONL), "trace_penyusutan.jsonl", "application/x-ndjson")
+                    st.download_button("📥 Download Trace (biner .npz)", trace_bytes(tracer, TRACE_FORMAT_BINARY), "trace_penyusutan.npz", "application/octet-stream")
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
 
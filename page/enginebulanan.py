@@ -0,0 +1,3068 @@
+import pandas as pd
+import numpy as np
+import xlsxwriter
+import re
+import os
+import shutil
+import tempfile
+import json
+import time
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from page.susutio import read_register_tables
+from page.susutcore import (
+    PERIOD_ANNUAL,
+    PERIOD_MONTHLY,
+    PERIOD_SEMESTER,
+    PERIODS_PER_YEAR,
+    cumulative_sen,
+    depreciation_kernel,
+    event_table,
+    period_index,
+    period_parts,
+    round_money,
+    row_periods,
+)
+from page.susutperf import (
+    STAGE_COLUMNS,
+    begin_stage,
+    end_stage,
+    largest_asset_rows,
+    profile_stage,
+)
+from page.susutxlsx import ROWS_PER_WRITE, row_template, splice_table_sheets, xml_text
+from page.susutspill import (
+    adopt_spill_dir,
+    borrow_spill_dir,
+    create_spill_dir,
+    detach_spill_dir,
+    release_spill_dir,
+    spill_allocate,
+    spill_discard,
+    spill_open,
+)
+from page.susuttrace import TRACE_FORMAT_JSONL, kernel_trace, new_tracer, trace_mask, write_trace
+from page.susutcache import (
+    file_content_hash,
+    make_cache_key,
+    save_cached_run,
+    load_cached_run,
+    cache_entry_dir,
+)
+
+# Mesin penyusutan bulanan tanpa Streamlit: dipakai halaman batchbulanan
+# dan runner baris perintah (batch_penyusutan.py).
+
+REPORTING_DATE = pd.Timestamp("2025-12-31")
+
+# Naikkan setiap kali aturan perhitungan berubah agar hasil lama tidak dipakai ulang
+# (bulanan-2: jalur cepat hanya untuk mode sen, lihat JALUR CEPAT)
+ENGINE_VERSION = "bulanan-2"
+
+# =========================================================
+# HELPER
+# =========================================================
+
+def parse_mixed_excel_date(value):
+    if pd.isna(value):
+        return pd.NaT
+
+    if isinstance(value, pd.Timestamp):
+        return value
+
+    text = str(value).strip().replace("\xa0", "").replace("  ", " ")
+
+    if text == "" or text.lower() in ["nan", "none", "nat"]:
+        return pd.NaT
+
+    try:
+        num = float(text)
+        if num > 1000 and text.replace(".", "", 1).isdigit():
+            return pd.Timestamp("1899-12-30") + pd.to_timedelta(int(num), unit="D")
+    except Exception:
+        pass
+
+    if re.match(r"^\d{4}[-/]\d{1,2}[-/]\d{1,2}", text):
+        return pd.to_datetime(text, errors="coerce", yearfirst=True)
+
+    return pd.to_datetime(text, errors="coerce", dayfirst=True)
+
+
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+EMPTY_DATE_TEXTS = ["", "nan", "none", "nat"]
+
+SERIAL_DATE_PATTERN = r"^(?:\d+\.?\d*|\.\d+)$"
+ISO_DATE_PATTERN = r"^(\d{4})[-/](\d{1,2})[-/](\d{1,2})$"
+DMY_DATE_PATTERN = r"^(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})$"
+
+
+def _dates_from_parts(parts, year_col, month_col, day_col):
+    return pd.to_datetime(
+        pd.DataFrame({
+            "year": parts[year_col].astype("int64"),
+            "month": parts[month_col].astype("int64"),
+            "day": parts[day_col].astype("int64"),
+        }),
+        errors="coerce"
+    )
+
+
+def parse_mixed_excel_dates(values):
+    # Versi kolom dari parse_mixed_excel_date. Sel dikelompokkan menjadi
+    # Timestamp, serial Excel, teks ISO (yyyy-mm-dd) dan teks dd/mm/yyyy;
+    # tiap kelompok dikonversi dengan satu panggilan. Sel yang tidak masuk
+    # kelompok mana pun (atau gagal di jalur cepat) tetap diproses per sel
+    # dengan parse_mixed_excel_date agar hasilnya selalu sama.
+    values = pd.Series(values)
+
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype("datetime64[ns]")
+
+    result = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    raw = values.astype(object)
+
+    is_timestamp = raw.map(lambda v: isinstance(v, datetime))
+    missing = raw.isna() & ~is_timestamp
+
+    if is_timestamp.any():
+        result[is_timestamp] = pd.to_datetime(raw[is_timestamp].tolist())
+
+    pending = ~(is_timestamp | missing)
+
+    text = (
+        raw[pending].astype(str)
+        .str.strip()
+        .str.replace("\xa0", "", regex=False)
+        .str.replace("  ", " ", regex=False)
+    )
+
+    empty = text.str.lower().isin(EMPTY_DATE_TEXTS)
+    text = text[~empty]
+
+    unresolved = pd.Series(False, index=values.index)
+
+    # Serial Excel: angka > 1000 dihitung dari 30/12/1899
+    serial_like = text.str.match(SERIAL_DATE_PATTERN)
+    serial_num = pd.to_numeric(text[serial_like], errors="coerce")
+    serial = serial_num[serial_num > 1000]
+
+    if not serial.empty:
+        result[serial.index] = EXCEL_EPOCH + pd.to_timedelta(np.trunc(serial.to_numpy()), unit="D")
+
+    text = text.drop(serial.index)
+
+    iso_parts = text.str.extract(ISO_DATE_PATTERN)
+    iso_rows = iso_parts.dropna().index
+
+    if len(iso_rows):
+        iso_dates = _dates_from_parts(iso_parts.loc[iso_rows], 0, 1, 2)
+        result[iso_rows] = iso_dates
+        unresolved[iso_dates[iso_dates.isna()].index] = True
+
+    text = text.drop(iso_rows)
+
+    dmy_parts = text.str.extract(DMY_DATE_PATTERN)
+    dmy_rows = dmy_parts.dropna().index
+
+    if len(dmy_rows):
+        dmy_dates = _dates_from_parts(dmy_parts.loc[dmy_rows], 2, 1, 0)
+        result[dmy_rows] = dmy_dates
+        unresolved[dmy_dates[dmy_dates.isna()].index] = True
+
+    unresolved[text.drop(dmy_rows).index] = True
+
+    if unresolved.any():
+        result[unresolved] = pd.to_datetime(
+            [parse_mixed_excel_date(v) for v in values[unresolved]]
+        )
+
+    return result
+
+
+def normalize_kode_aset(value):
+    if pd.isna(value):
+        return pd.NA
+
+    text = str(value).strip().replace("\xa0", "")
+
+    if text == "" or text.lower() in ["nan", "none"]:
+        return pd.NA
+
+    try:
+        num = float(text)
+        if num.is_integer():
+            return str(int(num))
+    except Exception:
+        pass
+
+    return text
+
+
+def safe_sheet_name(name):
+    text = str(name)
+
+    for ch in ["/", "\\", ":", "*", "?", "[", "]"]:
+        text = text.replace(ch, "_")
+
+    text = text.strip()
+
+    if not text:
+        text = "Sheet"
+
+    return text[:31]
+
+
+def get_empty_capitalization_df():
+    return pd.DataFrame(columns=[
+        "Kode Aset",
+        "Tanggal Kapitalisasi",
+        "Jumlah",
+        "Tambahan Usia"
+    ])
+
+
+def get_empty_correction_df():
+    return pd.DataFrame(columns=[
+        "Kode Aset",
+        "Tanggal Koreksi",
+        "Jumlah"
+    ])
+
+
+# =========================================================
+# BACA FILE INPUT
+# =========================================================
+
+INPUT_COLUMNS = [
+    ["Kode Aset", "Harga Perolehan Awal (Rp)", "Tanggal Perolehan", "Masa Manfaat (tahun)"],
+    ["Kode Aset", "Tanggal Kapitalisasi", "Jumlah", "Tambahan Usia"],
+    ["Kode Aset", "Tanggal Koreksi", "Jumlah"],
+]
+
+# Kode aset dibaca sebagai teks agar kode panjang tidak berubah jadi float
+INPUT_DTYPE_HINTS = {"Kode Aset": str}
+
+
+def read_register_from_bytes(file_bytes, file_name="data.xlsx"):
+    # Hanya kolom yang dipakai prepare_input_data yang dibaca.
+    # Hasil: assets_df, capitalizations_df, corrections_df, sheet_names, timings
+    tables, sheet_names, timings = read_register_tables(
+        file_bytes,
+        file_name,
+        INPUT_COLUMNS,
+        dtype_hints=INPUT_DTYPE_HINTS
+    )
+
+    assets_df, capitalizations_df, corrections_df = tables
+
+    if capitalizations_df is None:
+        capitalizations_df = get_empty_capitalization_df()
+
+    if corrections_df is None:
+        corrections_df = get_empty_correction_df()
+
+    return assets_df, capitalizations_df, corrections_df, sheet_names, timings
+
+
+def read_register_file(path):
+    with open(path, "rb") as f:
+        return read_register_from_bytes(f.read(), os.path.basename(path))
+
+
+# =========================================================
+# VALIDASI DAN NORMALISASI DATA
+# =========================================================
+
+def prepare_input_data(assets_df, capitalizations_df, corrections_df):
+    required_assets = {
+        "Kode Aset",
+        "Harga Perolehan Awal (Rp)",
+        "Tanggal Perolehan",
+        "Masa Manfaat (tahun)"
+    }
+
+    if not required_assets.issubset(assets_df.columns):
+        raise ValueError(
+            "Kolom di Sheet 1 tidak valid. Wajib: "
+            "Kode Aset, Harga Perolehan Awal (Rp), Tanggal Perolehan, Masa Manfaat (tahun)."
+        )
+
+    if capitalizations_df is None or capitalizations_df.empty:
+        capitalizations_df = get_empty_capitalization_df()
+    else:
+        required_caps = {
+            "Kode Aset",
+            "Tanggal Kapitalisasi",
+            "Jumlah",
+            "Tambahan Usia"
+        }
+
+        if not required_caps.issubset(capitalizations_df.columns):
+            raise ValueError(
+                "Kolom di Sheet 2 tidak valid. Wajib: "
+                "Kode Aset, Tanggal Kapitalisasi, Jumlah, Tambahan Usia."
+            )
+
+    if corrections_df is None or corrections_df.empty:
+        corrections_df = get_empty_correction_df()
+    else:
+        required_corrs = {
+            "Kode Aset",
+            "Tanggal Koreksi",
+            "Jumlah"
+        }
+
+        if not required_corrs.issubset(corrections_df.columns):
+            raise ValueError(
+                "Kolom di Sheet 3 tidak valid. Wajib: "
+                "Kode Aset, Tanggal Koreksi, Jumlah."
+            )
+
+    assets_df = assets_df.copy()
+    capitalizations_df = capitalizations_df.copy()
+    corrections_df = corrections_df.copy()
+
+    assets_df["Kode Aset"] = assets_df["Kode Aset"].apply(normalize_kode_aset)
+    capitalizations_df["Kode Aset"] = capitalizations_df["Kode Aset"].apply(normalize_kode_aset)
+    corrections_df["Kode Aset"] = corrections_df["Kode Aset"].apply(normalize_kode_aset)
+
+    assets_df["Harga Perolehan Awal (Rp)"] = pd.to_numeric(
+        assets_df["Harga Perolehan Awal (Rp)"],
+        errors="coerce"
+    )
+
+    assets_df["Masa Manfaat (tahun)"] = pd.to_numeric(
+        assets_df["Masa Manfaat (tahun)"],
+        errors="coerce"
+    )
+
+    capitalizations_df["Jumlah"] = pd.to_numeric(
+        capitalizations_df["Jumlah"],
+        errors="coerce"
+    )
+
+    capitalizations_df["Tambahan Usia"] = pd.to_numeric(
+        capitalizations_df["Tambahan Usia"],
+        errors="coerce"
+    )
+
+    corrections_df["Jumlah"] = pd.to_numeric(
+        corrections_df["Jumlah"],
+        errors="coerce"
+    )
+
+    # Tanggal di-parse sekali di sini; tahap berikutnya memakai hasilnya langsung
+    assets_df["Tanggal Perolehan"] = parse_mixed_excel_dates(assets_df["Tanggal Perolehan"])
+    capitalizations_df["Tanggal Kapitalisasi"] = parse_mixed_excel_dates(capitalizations_df["Tanggal Kapitalisasi"])
+    corrections_df["Tanggal Koreksi"] = parse_mixed_excel_dates(corrections_df["Tanggal Koreksi"])
+
+    aset_valid = assets_df.dropna(subset=["Kode Aset"])
+    duplicated_codes = aset_valid[aset_valid["Kode Aset"].duplicated()]["Kode Aset"].unique().tolist()
+
+    if duplicated_codes:
+        contoh = ", ".join(map(str, duplicated_codes[:50]))
+        raise ValueError(f"Terdapat duplikat Kode Aset pada Sheet 1: {contoh}")
+
+    return assets_df, capitalizations_df, corrections_df
+
+
+# =========================================================
+# ARITMETIKA UANG: FLOAT ATAU FIXED-POINT SEN (INT64)
+# =========================================================
+# MONEY_MODE_FLOAT (bawaan): float rupiah, dibulatkan 2 desimal saat
+# ditampilkan; mesin per aset dan mesin batch memakai urutan operasi yang
+# sama sehingga identik sampai ke sen. Jalur cepat tidak dipakai.
+#
+# MONEY_MODE_SEN: semua nilai uang dihitung sebagai bilangan bulat sen
+# (1/100 rupiah) int64 dengan aturan:
+#   - harga perolehan, kapitalisasi dan koreksi dibulatkan ke sen terdekat
+#     (setengah sen menjauhi nol) per baris input;
+#   - sejak perolehan / bulan event terakhir (kapitalisasi atau koreksi)
+#     dengan nilai buku B dan sisa umur R, akumulasi penyusutan j bulan
+#     berikutnya = pembulatan setengah ke atas dari B * j / R; penyusutan
+#     bulan = selisih dua akumulasi berurutan. Sisa pembagian tidak hilang:
+#     bulan ke-R menghabiskan nilai buku tepat ke 0.
+# Mesin batch dan jalur cepat memakai aturan yang sama sehingga identik
+# sampai ke sen (perulangan per aset acuannya ada di tests/referensi.py).
+# Hasil tetap dikembalikan dalam rupiah (sen / 100) agar format Ringkasan,
+# jadwal dan export tidak berubah.
+
+MONEY_MODE_FLOAT = "float"
+MONEY_MODE_SEN = "sen"
+MONEY_MODES = [MONEY_MODE_FLOAT, MONEY_MODE_SEN]
+
+
+def _decimal_sen(value):
+    return int(Decimal(repr(value)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def to_sen(values):
+    # Rupiah (float) -> sen int64, setengah sen menjauhi nol. Nilai yang
+    # berada tepat di batas setengah sen (mis. 0.285) dibulatkan dari
+    # representasi desimalnya, bukan dari hasil x * 100 yang bisa meleset.
+    values = np.asarray(values, dtype=float)
+
+    if np.isnan(values).any():
+        raise ValueError("Nilai uang kosong/tidak valid tidak dapat dihitung dalam mode sen.")
+
+    scaled = values * 100.0
+    sen = np.sign(scaled) * np.floor(np.abs(scaled) + 0.5)
+
+    frac = np.abs(scaled - np.trunc(scaled))
+    ambiguous = np.abs(frac - 0.5) <= np.abs(scaled) * 2.0 ** -50
+
+    if ambiguous.any():
+        sen[ambiguous] = [_decimal_sen(v) for v in values[ambiguous].tolist()]
+
+    return sen.astype(np.int64)
+
+
+# =========================================================
+# ARRAY JADWAL: DI RAM ATAU MEMORY-MAPPED (SPILL KE DISK)
+# =========================================================
+# Array sepanjang jadwal (satu elemen per aset x bulan) dibuat lewat
+# _allocate_rows dan diolah per blok SPILL_BLOCK_ROWS baris, sehingga
+# dengan spill (lihat page.susutspill) tidak ada salinan penuh di RAM.
+
+# Register dengan perkiraan baris jadwal >= ini disimpan ke disk
+SPILL_MIN_ROWS = 5000000
+SPILL_BLOCK_ROWS = 1 << 20
+
+
+def _allocate_rows(spill, name, length, dtype):
+    if spill is None:
+        return np.zeros(length, dtype=dtype)
+
+    return spill_allocate(spill, name, length, dtype)
+
+
+def _fill_by_blocks(target, func, *sources):
+    # target[i] = func(sources[i]) per blok; func harus elementwise
+    for lo in range(0, len(target), SPILL_BLOCK_ROWS):
+        hi = min(lo + SPILL_BLOCK_ROWS, len(target))
+        target[lo:hi] = func(*(source[lo:hi] for source in sources))
+
+
+def estimate_schedule_rows(
+    assets_df,
+    capitalizations_df,
+    corrections_df,
+    closed_form=True,
+    money_mode=MONEY_MODE_FLOAT
+):
+    # Perkiraan jumlah baris jadwal mesin bulanan (aset jalur cepat tidak
+    # punya baris), dipakai untuk memutuskan spill sebelum menghitung
+    dates = pd.DatetimeIndex(parse_mixed_excel_dates(assets_df["Tanggal Perolehan"]))
+    in_range = ~dates.isna() & np.asarray(dates <= REPORTING_DATE)
+
+    if uses_closed_form(closed_form, money_mode):
+        event_codes = pd.concat([
+            capitalizations_df["Kode Aset"],
+            corrections_df["Kode Aset"],
+        ]).dropna().unique()
+        in_range &= assets_df["Kode Aset"].isin(event_codes).to_numpy()
+
+    end_month = REPORTING_DATE.year * 12 + REPORTING_DATE.month - 1
+
+    return int((end_month - to_month_index(dates[in_range]) + 1).sum())
+
+
+def to_month_index(dates):
+    dates = pd.DatetimeIndex(dates)
+    return dates.year.to_numpy(dtype=np.int64) * 12 + dates.month.to_numpy(dtype=np.int64) - 1
+
+
+def _prepare_batch_events(asset_idx, dates, reporting_date, start_month, end_month):
+    # Event yang dipakai: tanggal valid, <= tanggal pelaporan, dan jatuh
+    # pada bulan yang memang dilalui jadwal aset tersebut.
+    asset_idx = np.asarray(asset_idx, dtype=np.int64)
+    dates = pd.DatetimeIndex(parse_mixed_excel_dates(dates))
+
+    valid = ~dates.isna()
+    valid &= np.asarray(dates <= reporting_date)
+
+    month = np.full(len(asset_idx), -1, dtype=np.int64)
+    month[valid] = to_month_index(dates[valid])
+
+    valid &= start_month[asset_idx] >= 0
+    valid &= month >= start_month[asset_idx]
+    valid &= month <= end_month
+
+    return valid, month
+
+
+def calculate_depreciation_monthly_batch(
+    initial_costs,
+    acquisition_dates,
+    useful_life_years,
+    reporting_date=REPORTING_DATE,
+    cap_asset_idx=None,
+    cap_dates=None,
+    cap_amounts=None,
+    cap_life_years=None,
+    corr_asset_idx=None,
+    corr_dates=None,
+    corr_amounts=None,
+    asset_mask=None,
+    progress_callback=None,
+    money_mode=MONEY_MODE_FLOAT,
+    spill=None,
+    trace=None
+):
+    # Penyusutan bulanan banyak aset sekaligus, di atas kernel bersama
+    # page.susutcore.depreciation_kernel dengan periode bulan. Urutan operasi
+    # float sama dengan perulangan per aset (tests/referensi.py), sehingga
+    # hasilnya identik sampai ke sen.
+    #
+    # Kapitalisasi/koreksi diberikan sebagai array sejajar dengan
+    # *_asset_idx = posisi aset (0..n-1) pada array aset.
+    #
+    # Hasil berupa dict kolom datar (panjang = total bulan seluruh aset)
+    # dengan "offsets": baris aset i ada di offsets[i]:offsets[i + 1].
+    # asset_mask (opsional) membatasi aset yang dihitung; aset lain
+    # mendapat jadwal kosong. money_mode: lihat MONEY_MODE_SEN.
+    # spill (page.susutspill): kolom jadwal ditulis ke file memory-mapped.
+    # trace: hook kernel_trace (page.susuttrace) untuk aset yang dilacak.
+    reporting_date = parse_mixed_excel_date(reporting_date)
+    sen_mode = money_mode == MONEY_MODE_SEN
+
+    initial_costs = np.asarray(initial_costs, dtype=float)
+    useful_life_years = np.asarray(useful_life_years, dtype=float)
+    acquisition_dates = pd.DatetimeIndex(parse_mixed_excel_dates(acquisition_dates))
+
+    n_assets = len(initial_costs)
+    end_month = reporting_date.year * 12 + reporting_date.month - 1
+
+    # Aset tanpa tanggal atau diperoleh setelah tanggal pelaporan -> jadwal kosong
+    has_schedule = ~acquisition_dates.isna()
+    has_schedule &= np.asarray(acquisition_dates <= reporting_date)
+
+    if asset_mask is not None:
+        has_schedule &= np.asarray(asset_mask, dtype=bool)
+
+    start_month = np.full(n_assets, -1, dtype=np.int64)
+    start_month[has_schedule] = to_month_index(acquisition_dates[has_schedule])
+
+    original_life = np.zeros(n_assets, dtype=np.int64)
+    original_life[has_schedule] = np.trunc(useful_life_years[has_schedule] * 12).astype(np.int64)
+
+    def events(asset_idx, dates, amounts, life_years=None):
+        if asset_idx is None or len(asset_idx) == 0:
+            return None
+
+        valid, month = _prepare_batch_events(asset_idx, dates, reporting_date, start_month, end_month)
+        amounts = np.asarray(amounts, dtype=float)[valid]
+        extensions = None
+
+        if life_years is not None:
+            life_years = np.asarray(life_years, dtype=float)[valid]
+
+            if np.isnan(life_years).any():
+                raise ValueError("Tambahan Usia kapitalisasi kosong/tidak valid.")
+
+            extensions = np.trunc(life_years * 12).astype(np.int64)
+
+        if sen_mode:
+            # Dibulatkan per baris event, lalu dijumlah per bulan sebagai sen
+            amounts = to_sen(amounts)
+
+        return event_table(np.asarray(asset_idx, dtype=np.int64)[valid], month[valid], amounts, extensions)
+
+    # Kolom kernel -> file kerja spill. Kolom uang mode sen disimpan dengan
+    # awalan "sen_" lalu dikonversi ke file rupiah terpisah.
+    work_prefix = "sen_" if sen_mode else ""
+    int_dtypes = {
+        "tambahan_usia": SCHEDULE_STORE_DTYPES["Tambahan Usia Bulan Ini"],
+        "sisa_umur": SCHEDULE_STORE_DTYPES["Sisa Masa Manfaat (Bulan)"],
+    }
+
+    def allocate(name, length, dtype):
+        if name in int_dtypes:
+            return _allocate_rows(spill, name, length, int_dtypes[name])
+
+        return _allocate_rows(spill, work_prefix + name, length, dtype)
+
+    kernel = depreciation_kernel(
+        to_sen(np.where(has_schedule, initial_costs, 0)) if sen_mode else initial_costs,
+        start_month,
+        end_month,
+        original_life,
+        capitalizations=events(cap_asset_idx, cap_dates, cap_amounts, cap_life_years),
+        corrections=events(corr_asset_idx, corr_dates, corr_amounts),
+        integer_money=sen_mode,
+        allocate=allocate,
+        progress_callback=progress_callback,
+        trace=trace
+    )
+
+    offsets = kernel["offsets"]
+    total_rows = int(offsets[-1])
+
+    # Kolom uang: nama kolom kernel -> nama kolom hasil
+    money_columns = {
+        "kapitalisasi": "Kapitalisasi Bulan Ini",
+        "koreksi": "Koreksi Bulan Ini",
+        "penyusutan": "Penyusutan Bulan Berjalan",
+        "akumulasi": "Akumulasi Penyusutan",
+        "nilai_buku": "Nilai Buku Akhir",
+    }
+    out_life = kernel["sisa_umur"]
+
+    out_year = _allocate_rows(spill, "tahun", total_rows, SCHEDULE_STORE_DTYPES["Tahun"])
+    out_month = _allocate_rows(spill, "bulan", total_rows, SCHEDULE_STORE_DTYPES["Bulan"])
+
+    for lo in range(0, total_rows, SPILL_BLOCK_ROWS):
+        block = slice(lo, min(lo + SPILL_BLOCK_ROWS, total_rows))
+        months = row_periods(offsets, kernel["start_period"], np.arange(block.start, block.stop))
+        out_year[block] = months // 12
+        out_month[block] = months % 12 + 1
+
+    result = {
+        "offsets": offsets,
+        "Tahun": out_year,
+        "Bulan": out_month,
+        "Tambahan Usia Bulan Ini": kernel["tambahan_usia"],
+        "Sisa Masa Manfaat (Bulan)": out_life,
+    }
+
+    for name, column in money_columns.items():
+        values = kernel.pop(name)
+
+        if sen_mode:
+            # sen / 100 adalah float terdekat dari nilai 2 desimal itu,
+            # sama dengan hasil round(x, 2)
+            result[column] = _allocate_rows(spill, name, total_rows, np.float64)
+            _fill_by_blocks(result[column], lambda v: v / 100, values)
+
+            if spill is not None:
+                del values
+                spill_discard(spill, work_prefix + name)
+        else:
+            _fill_by_blocks(values, round_money, values)
+            result[column] = values
+
+    result["Sisa Masa Manfaat (Tahun)"] = _allocate_rows(spill, "sisa_tahun", total_rows, np.float64)
+    _fill_by_blocks(result["Sisa Masa Manfaat (Tahun)"], lambda v: round_money(v / 12), out_life)
+
+    return result
+
+
+SCHEDULE_COLUMNS = [
+    "Tahun",
+    "Bulan",
+    "Periode",
+    "Kapitalisasi Bulan Ini",
+    "Tambahan Usia Bulan Ini",
+    "Koreksi Bulan Ini",
+    "Penyusutan Bulan Berjalan",
+    "Akumulasi Penyusutan",
+    "Nilai Buku Akhir",
+    "Sisa Masa Manfaat (Bulan)",
+    "Sisa Masa Manfaat (Tahun)",
+]
+
+
+# =========================================================
+# JALUR CEPAT: ASET TANPA KAPITALISASI / KOREKSI
+# =========================================================
+# Tanpa event, aturan penyusutan bulanan menjadi beban tetap
+# Harga Perolehan / masa manfaat (bulan) sejak bulan perolehan sampai masa
+# manfaat habis. Angka Ringkasan dihitung langsung (O(1) per aset); jadwal
+# bulanan dibentuk dari rumus yang sama hanya saat dilihat/diekspor, jadi
+# Ringkasan dan detail selalu konsisten.
+#
+# Hanya untuk MONEY_MODE_SEN: di sana akumulasi bulan ke-j sudah berupa
+# rumus (lihat cumulative_sen) sehingga identik dengan perulangan per
+# bulan. Pada mode float, perulangan membagi nilai buku float yang terus
+# berkurang dan menjumlah beban yang dibulatkan per bulan; hasil itu tidak
+# punya bentuk tertutup (rumus Harga / masa manfaat bisa meleset beberapa
+# sen per tahun), jadi semua aset mode float lewat mesin bulanan.
+
+
+def uses_closed_form(closed_form=True, money_mode=MONEY_MODE_FLOAT):
+    return bool(closed_form) and money_mode == MONEY_MODE_SEN
+
+
+def closed_form_reporting_summary(
+    initial_costs,
+    acquisition_dates,
+    useful_life_years,
+    reporting_date=REPORTING_DATE
+):
+    reporting_date = parse_mixed_excel_date(reporting_date)
+
+    initial_costs = np.asarray(initial_costs, dtype=float)
+    useful_life_years = np.asarray(useful_life_years, dtype=float)
+    acquisition_dates = pd.DatetimeIndex(parse_mixed_excel_dates(acquisition_dates))
+
+    end_month = reporting_date.year * 12 + reporting_date.month - 1
+
+    has_schedule = ~acquisition_dates.isna()
+    has_schedule &= np.asarray(acquisition_dates <= reporting_date)
+
+    start_month = np.full(len(initial_costs), end_month, dtype=np.int64)
+    start_month[has_schedule] = to_month_index(acquisition_dates[has_schedule])
+
+    life_months = np.zeros(len(initial_costs), dtype=np.int64)
+    life_months[has_schedule] = np.trunc(useful_life_years[has_schedule] * 12).astype(np.int64)
+
+    values = closed_form_values_at(initial_costs, start_month, life_months, end_month)
+
+    return {
+        "has_schedule": has_schedule,
+        "start_month": start_month,
+        "life_months": life_months,
+        "end_month": end_month,
+        **values,
+    }
+
+
+def closed_form_values_at(initial_costs, start_month, life_months, end_month):
+    # Angka Ringkasan jalur cepat (mode sen) pada bulan end_month
+    # (indeks tahun*12+bulan-1)
+    costs = to_sen(initial_costs)
+    start_month = np.asarray(start_month, dtype=np.int64)
+    life_months = np.asarray(life_months, dtype=np.int64)
+
+    depreciating = (costs > 0) & (life_months > 0)
+    safe_life = np.where(depreciating, life_months, 1)
+
+    def accumulated_at(month):
+        used = np.clip(month - start_month + 1, 0, life_months)
+        return np.where(depreciating, cumulative_sen(costs, safe_life, used), 0)
+
+    accumulated = accumulated_at(end_month)
+    used_months = np.where(depreciating, np.minimum(end_month - start_month + 1, life_months), 0)
+
+    # Beban tahun berjalan = selisih akumulasi akhir bulan ini dan akhir tahun lalu
+    year_start = max((end_month // 12) * 12, 0)
+
+    return {
+        "Akumulasi Penyusutan": accumulated / 100,
+        "Nilai Buku Akhir": (costs - accumulated) / 100,
+        "Sisa Masa Manfaat (Bulan)": life_months - used_months,
+        "beban": (accumulated - accumulated_at(year_start - 1)) / 100,
+    }
+
+
+def closed_form_schedule_columns(initial_cost, start_month, life_months, end_month):
+    # Jadwal bulanan satu aset jalur cepat, format kolom sama dengan mesin batch
+    return closed_form_schedule_block([initial_cost], [start_month], [life_months], end_month)
+
+
+def closed_form_schedule_block(initial_costs, start_months, life_months, end_month):
+    # Jadwal bulanan beberapa aset jalur cepat sekaligus, berurutan aset demi
+    # aset (bulan start_month s.d. end_month masing-masing)
+    initial_costs = np.asarray(initial_costs, dtype=float)
+    start_months = np.asarray(start_months, dtype=np.int64)
+    life_months = np.asarray(life_months, dtype=np.int64)
+
+    lengths = np.maximum(end_month - start_months + 1, 0)
+    asset = np.repeat(np.arange(len(initial_costs)), lengths)
+    first_row = np.cumsum(lengths) - lengths
+
+    elapsed = np.arange(int(lengths.sum()), dtype=np.int64) - first_row[asset] + 1
+    months = start_months[asset] + elapsed - 1
+    life = life_months[asset]
+    n_rows = len(months)
+
+    cost = to_sen(initial_costs)[asset]
+    depreciating = (cost > 0) & (life > 0)
+    safe_life = np.where(depreciating, life, 1)
+    used = np.where(depreciating, np.minimum(elapsed, life), 0)
+
+    accumulated = np.where(depreciating, cumulative_sen(cost, safe_life, used), 0)
+    previous = np.where(
+        depreciating,
+        cumulative_sen(cost, safe_life, np.minimum(elapsed - 1, life)),
+        0
+    )
+
+    return {
+        "Tahun": months // 12,
+        "Bulan": months % 12 + 1,
+        "Kapitalisasi Bulan Ini": np.zeros(n_rows),
+        "Tambahan Usia Bulan Ini": np.zeros(n_rows, dtype=np.int64),
+        "Koreksi Bulan Ini": np.zeros(n_rows),
+        "Penyusutan Bulan Berjalan": (accumulated - previous) / 100,
+        "Akumulasi Penyusutan": accumulated / 100,
+        "Nilai Buku Akhir": (cost - accumulated) / 100,
+        "Sisa Masa Manfaat (Bulan)": life - used,
+    }
+
+
+# =========================================================
+# PENYIMPANAN JADWAL BERBENTUK KOLOM (COMPACT)
+# =========================================================
+# Jadwal semua aset disimpan sebagai array bertipe per kolom + indeks
+# offset per aset, bukan list dict per bulan. "Periode" dan "Sisa Masa
+# Manfaat (Tahun)" diturunkan saat dibaca. DataFrame/record hanya dibuat
+# untuk aset yang diminta (Detail per Aset atau export).
+
+SCHEDULE_STORE_DTYPES = {
+    "Tahun": np.int16,
+    "Bulan": np.int8,
+    "Kapitalisasi Bulan Ini": np.float64,
+    "Tambahan Usia Bulan Ini": np.int32,
+    "Koreksi Bulan Ini": np.float64,
+    "Penyusutan Bulan Berjalan": np.float64,
+    "Akumulasi Penyusutan": np.float64,
+    "Nilai Buku Akhir": np.float64,
+    "Sisa Masa Manfaat (Bulan)": np.int32,
+}
+
+# Nama file kolom store di folder spill (sama dengan yang ditulis mesin batch)
+SPILL_COLUMN_FILES = {
+    "Tahun": "tahun",
+    "Bulan": "bulan",
+    "Kapitalisasi Bulan Ini": "kapitalisasi",
+    "Tambahan Usia Bulan Ini": "tambahan_usia",
+    "Koreksi Bulan Ini": "koreksi",
+    "Penyusutan Bulan Berjalan": "penyusutan",
+    "Akumulasi Penyusutan": "akumulasi",
+    "Nilai Buku Akhir": "nilai_buku",
+    "Sisa Masa Manfaat (Bulan)": "sisa_umur",
+}
+
+
+CLOSED_FORM_FIELDS = {
+    "cost": np.float64,
+    "start_month": np.int64,
+    "life_months": np.int64,
+}
+
+
+def build_schedule_store(
+    batch,
+    asset_codes,
+    closed_form=None,
+    closed_form_costs=None,
+    money_mode=MONEY_MODE_FLOAT,
+    spill=None
+):
+    # batch: hasil mesin untuk asset_codes (aset jalur cepat berjadwal kosong).
+    # closed_form: hasil closed_form_reporting_summary untuk asset_codes yang
+    # sama; aset dengan has_schedule di sana disimpan sebagai parameter saja.
+    # money_mode dicatat bersama store (jalur cepat hanya ada pada mode sen).
+    # spill: folder memory-mapped kolom batch; kolom dipakai tanpa disalin.
+    lengths = np.diff(batch["offsets"])
+    n_assets = len(lengths)
+
+    if closed_form is None:
+        is_closed_form = np.zeros(n_assets, dtype=bool)
+        closed_values = {
+            field: np.zeros(n_assets, dtype=dtype)
+            for field, dtype in CLOSED_FORM_FIELDS.items()
+        }
+        end_month = None
+    else:
+        is_closed_form = np.asarray(closed_form["has_schedule"], dtype=bool) & (lengths == 0)
+        closed_values = {
+            "cost": np.asarray(closed_form_costs, dtype=np.float64),
+            "start_month": closed_form["start_month"],
+            "life_months": closed_form["life_months"],
+        }
+        end_month = closed_form["end_month"]
+
+    keep = (lengths > 0) | is_closed_form
+
+    offsets = np.zeros(int(keep.sum()) + 1, dtype=np.int64)
+    np.cumsum(lengths[keep], out=offsets[1:])
+
+    codes = [code for code, kept in zip(asset_codes, keep) if kept]
+
+    return {
+        "codes": codes,
+        "positions": {code: i for i, code in enumerate(codes)},
+        "offsets": offsets,
+        "columns": {
+            col: np.asarray(batch[col]).astype(dtype, copy=False)
+            for col, dtype in SCHEDULE_STORE_DTYPES.items()
+        },
+        "is_closed_form": is_closed_form[keep],
+        "closed_form": {
+            field: closed_values[field][keep].astype(dtype)
+            for field, dtype in CLOSED_FORM_FIELDS.items()
+        },
+        "end_month": end_month,
+        "money_mode": money_mode,
+        "spill": spill,
+    }
+
+
+def empty_schedule_store():
+    return {
+        "codes": [],
+        "positions": {},
+        "offsets": np.zeros(1, dtype=np.int64),
+        "columns": {
+            col: np.zeros(0, dtype=dtype)
+            for col, dtype in SCHEDULE_STORE_DTYPES.items()
+        },
+        "is_closed_form": np.zeros(0, dtype=bool),
+        "closed_form": {
+            field: np.zeros(0, dtype=dtype)
+            for field, dtype in CLOSED_FORM_FIELDS.items()
+        },
+        "end_month": None,
+        "money_mode": MONEY_MODE_FLOAT,
+        "spill": None,
+    }
+
+
+def merge_schedule_stores(stores, spill=None):
+    # Gabungkan beberapa store (mis. hasil blok paralel) sesuai urutannya.
+    # spill: kolom hasil ditulis ke folder ini per blok, bukan np.concatenate
+    merged = empty_schedule_store()
+
+    if not stores:
+        return merged
+
+    codes = []
+    offsets = [np.zeros(1, dtype=np.int64)]
+    row_base = 0
+
+    for store in stores:
+        codes.extend(store["codes"])
+        offsets.append(store["offsets"][1:] + row_base)
+        row_base += int(store["offsets"][-1])
+
+        if store["end_month"] is not None:
+            merged["end_month"] = store["end_month"]
+
+        if store["codes"]:
+            merged["money_mode"] = store.get("money_mode", MONEY_MODE_FLOAT)
+
+    merged["codes"] = codes
+    merged["positions"] = {code: i for i, code in enumerate(codes)}
+    merged["offsets"] = np.concatenate(offsets)
+
+    if spill is None:
+        merged["columns"] = {
+            col: np.concatenate([store["columns"][col] for store in stores])
+            for col in SCHEDULE_STORE_DTYPES
+        }
+    else:
+        merged["columns"] = {
+            col: _allocate_rows(spill, SPILL_COLUMN_FILES[col], row_base, dtype)
+            for col, dtype in SCHEDULE_STORE_DTYPES.items()
+        }
+        base = 0
+
+        for store in stores:
+            rows = int(store["offsets"][-1])
+
+            for col, values in merged["columns"].items():
+                _fill_by_blocks(values[base:base + rows], lambda v: v, store["columns"][col])
+
+            base += rows
+
+    merged["spill"] = spill
+    merged["is_closed_form"] = np.concatenate([store["is_closed_form"] for store in stores])
+    merged["closed_form"] = {
+        field: np.concatenate([store["closed_form"][field] for store in stores])
+        for field in CLOSED_FORM_FIELDS
+    }
+
+    return merged
+
+
+def schedule_store_codes(store):
+    return store["codes"]
+
+
+def get_asset_schedule_columns(store, asset_code):
+    i = store["positions"][asset_code]
+
+    if store["is_closed_form"][i]:
+        return closed_form_schedule_columns(
+            float(store["closed_form"]["cost"][i]),
+            int(store["closed_form"]["start_month"][i]),
+            int(store["closed_form"]["life_months"][i]),
+            store["end_month"]
+        )
+
+    lo, hi = int(store["offsets"][i]), int(store["offsets"][i + 1])
+
+    return {
+        col: store["columns"][col][lo:hi]
+        for col in SCHEDULE_STORE_DTYPES
+    }
+
+
+def get_asset_schedule_rows(store, asset_code):
+    # Baris jadwal satu aset sebagai tuple sesuai urutan SCHEDULE_COLUMNS
+    values = get_asset_schedule_columns(store, asset_code)
+
+    tahun = values["Tahun"].tolist()
+    bulan = values["Bulan"].tolist()
+    sisa_bulan = values["Sisa Masa Manfaat (Bulan)"]
+
+    derived = {
+        "Periode": [f"{t}-{b:02d}" for t, b in zip(tahun, bulan)],
+        "Sisa Masa Manfaat (Tahun)": round_money(sisa_bulan / 12).tolist(),
+    }
+
+    columns = [
+        derived[col] if col in derived else values[col].tolist()
+        for col in SCHEDULE_COLUMNS
+    ]
+
+    return list(zip(*columns))
+
+
+def get_asset_schedule_records(store, asset_code):
+    return [
+        dict(zip(SCHEDULE_COLUMNS, row))
+        for row in get_asset_schedule_rows(store, asset_code)
+    ]
+
+
+def get_asset_schedule_df(store, asset_code):
+    return pd.DataFrame(
+        get_asset_schedule_rows(store, asset_code),
+        columns=SCHEDULE_COLUMNS
+    )
+
+
+def batch_reporting_summary(batch, reporting_year):
+    # Angka Ringkasan per aset: baris terakhir + total beban tahun pelaporan.
+    # Baris tahun pelaporan selalu di ujung jadwal tiap aset, jadi beban
+    # dijumlah per bulan (maks. 12 langkah, urutan Jan -> Des) tanpa array
+    # sepanjang jadwal.
+    offsets = batch["offsets"]
+    lengths = np.diff(offsets)
+    last_row = offsets[1:] - 1
+    has_schedule = lengths > 0
+
+    months_in_year = np.zeros(len(lengths), dtype=np.int64)
+
+    if len(batch["Tahun"]):
+        safe_last = np.where(has_schedule, last_row, 0)
+        months_in_year = np.where(
+            has_schedule & (batch["Tahun"][safe_last] == reporting_year),
+            np.minimum(lengths, batch["Bulan"][safe_last].astype(np.int64)),
+            0
+        )
+
+    first_in_year = offsets[1:] - months_in_year
+    dep = batch["Penyusutan Bulan Berjalan"]
+    beban = np.zeros(len(lengths), dtype=np.float64)
+
+    for step in range(int(months_in_year.max(initial=0))):
+        active = np.flatnonzero(months_in_year > step)
+        beban[active] += dep[first_in_year[active] + step]
+
+    return {
+        "has_schedule": has_schedule,
+        "last_row": last_row,
+        "beban": round_money(beban),
+    }
+
+
+# =========================================================
+# SNAPSHOT BEBERAPA TANGGAL PELAPORAN (SATU KALI HITUNG)
+# =========================================================
+# Mesin menghitung timeline sampai REPORTING_DATE satu kali; angka per
+# tanggal pelaporan interim (mis. 30/06, 30/09, 31/12) dibaca dari baris
+# bulan tersebut di schedule_store. Hasilnya sama dengan menghitung ulang
+# jadwal dengan tanggal pelaporan = tanggal itu.
+
+SNAPSHOT_COLUMNS = [
+    "Tanggal Pelaporan",
+    "Kode Aset",
+    "Periode Pelaporan",
+    "Beban Penyusutan Tahun Berjalan",
+    "Akumulasi Penyusutan",
+    "Nilai Buku Akhir",
+    "Sisa Masa Manfaat (Bulan)",
+]
+
+
+def month_end_dates(year):
+    return [
+        (pd.Timestamp(year, month, 1) + pd.offsets.MonthEnd(0))
+        for month in range(1, 13)
+    ]
+
+
+def normalize_reporting_dates(reporting_dates):
+    # Hanya tanggal akhir bulan s.d. REPORTING_DATE: transaksi di bulan yang
+    # sama selalu jatuh sebelum tanggal pelaporan, jadi baris bulan itu utuh.
+    dates = []
+
+    for value in reporting_dates or [REPORTING_DATE]:
+        date = parse_mixed_excel_date(value)
+
+        if pd.isna(date):
+            raise ValueError(f"Tanggal pelaporan tidak valid: {value}")
+
+        date = pd.Timestamp(date).normalize()
+
+        if not date.is_month_end:
+            raise ValueError(f"Tanggal pelaporan harus akhir bulan: {date.strftime('%d/%m/%Y')}")
+
+        if date > REPORTING_DATE:
+            raise ValueError(
+                f"Tanggal pelaporan {date.strftime('%d/%m/%Y')} melewati "
+                f"{REPORTING_DATE.strftime('%d/%m/%Y')}."
+            )
+
+        if date not in dates:
+            dates.append(date)
+
+    return sorted(dates)
+
+
+def compute_reporting_snapshots(schedule_store, reporting_dates=None):
+    # Hasil: list record SNAPSHOT_COLUMNS, urut per tanggal lalu per aset
+    dates = normalize_reporting_dates(reporting_dates)
+    store = schedule_store
+    columns = store["columns"]
+
+    offsets = store["offsets"]
+    lengths = np.diff(offsets)
+    is_closed_form = store["is_closed_form"]
+    closed = store["closed_form"]
+    n_assets = len(lengths)
+
+    # Hanya array per aset; kolom jadwal (mungkin memory-mapped) dibaca per
+    # baris yang dibutuhkan
+    total_rows = int(offsets[-1])
+    has_rows = lengths > 0
+    start_month = schedule_start_months(store)
+    dep = columns["Penyusutan Bulan Berjalan"]
+
+    snapshots = []
+
+    for date in dates:
+        month = date.year * 12 + date.month - 1
+        in_view = start_month <= month
+
+        # Aset mesin bulanan: baris bulan pelaporan + total beban tahun berjalan
+        row = np.clip(offsets[:-1] + (month - start_month), 0, max(total_rows - 1, 0))
+
+        beban = np.zeros(n_assets, dtype=np.float64)
+
+        for t in range(date.year * 12, month + 1):
+            step = t - start_month
+            active = np.flatnonzero(has_rows & (step >= 0) & (step < lengths))
+            beban[active] += dep[offsets[:-1][active] + step[active]]
+
+        beban = round_money(beban)
+
+        closed_values = closed_form_values_at(
+            closed["cost"],
+            closed["start_month"],
+            closed["life_months"],
+            month
+        )
+
+        def pick(engine_values, closed_key):
+            return np.where(is_closed_form, closed_values[closed_key], engine_values)
+
+        values = {
+            "Beban Penyusutan Tahun Berjalan": pick(beban, "beban"),
+            "Akumulasi Penyusutan": pick(
+                columns["Akumulasi Penyusutan"][row] if total_rows else np.zeros(n_assets),
+                "Akumulasi Penyusutan"
+            ),
+            "Nilai Buku Akhir": pick(
+                columns["Nilai Buku Akhir"][row] if total_rows else np.zeros(n_assets),
+                "Nilai Buku Akhir"
+            ),
+            "Sisa Masa Manfaat (Bulan)": pick(
+                columns["Sisa Masa Manfaat (Bulan)"][row] if total_rows else np.zeros(n_assets, dtype=np.int64),
+                "Sisa Masa Manfaat (Bulan)"
+            ),
+        }
+
+        date_text = date.strftime("%d/%m/%Y")
+        period = f"{date.year}-{date.month:02d}"
+
+        for i in np.flatnonzero(in_view):
+            snapshots.append({
+                "Tanggal Pelaporan": date_text,
+                "Kode Aset": store["codes"][i],
+                "Periode Pelaporan": period,
+                "Beban Penyusutan Tahun Berjalan": float(values["Beban Penyusutan Tahun Berjalan"][i]),
+                "Akumulasi Penyusutan": float(values["Akumulasi Penyusutan"][i]),
+                "Nilai Buku Akhir": float(values["Nilai Buku Akhir"][i]),
+                "Sisa Masa Manfaat (Bulan)": int(values["Sisa Masa Manfaat (Bulan)"][i]),
+            })
+
+    return snapshots
+
+
+# =========================================================
+# REKAP SEMESTERAN / TAHUNAN DARI JADWAL BULANAN
+# =========================================================
+# Jadwal bulanan hanya dihitung sekali; rekap per semester dan per tahun
+# diturunkan dengan penjumlahan per kelompok (aset x periode). Beban,
+# kapitalisasi, koreksi dan tambahan usia dijumlahkan; akumulasi, nilai
+# buku dan sisa masa manfaat diambil dari bulan terakhir periode (bulan
+# pelaporan untuk periode berjalan). Baris dibaca per blok aset, aset jalur
+# cepat dibentuk dari rumusnya, jadi jadwal yang di-spill tidak dimuat utuh.
+
+ROLLUP_GRANULARITIES = [PERIOD_SEMESTER, PERIOD_ANNUAL]
+ROLLUP_SHEET_NAMES = {
+    PERIOD_SEMESTER: "Rekap Semesteran",
+    PERIOD_ANNUAL: "Rekap Tahunan",
+}
+
+ROLLUP_STORE_DTYPES = {
+    "Kapitalisasi Periode Ini": np.float64,
+    "Tambahan Usia Periode Ini": np.int32,
+    "Koreksi Periode Ini": np.float64,
+    "Beban Penyusutan Periode Ini": np.float64,
+    "Akumulasi Penyusutan": np.float64,
+    "Nilai Buku Akhir": np.float64,
+    "Sisa Masa Manfaat (Bulan)": np.int32,
+}
+
+ROLLUP_VALUE_COLUMNS = list(ROLLUP_STORE_DTYPES) + ["Sisa Masa Manfaat (Tahun)"]
+
+ROLLUP_COLUMNS = {
+    PERIOD_SEMESTER: ["Kode Aset", "Tahun", "Semester", "Periode"] + ROLLUP_VALUE_COLUMNS,
+    PERIOD_ANNUAL: ["Kode Aset", "Tahun", "Periode"] + ROLLUP_VALUE_COLUMNS,
+}
+
+
+def schedule_start_months(store):
+    # Bulan pertama jadwal per aset (indeks tahun*12+bulan-1)
+    columns = store["columns"]
+    offsets = store["offsets"]
+    lengths = np.diff(offsets)
+    total_rows = int(offsets[-1])
+
+    first_row = np.minimum(offsets[:-1], max(total_rows - 1, 0))
+    first_month = (
+        columns["Tahun"][first_row].astype(np.int64) * 12
+        + columns["Bulan"][first_row].astype(np.int64) - 1
+        if total_rows else 0
+    )
+
+    return np.where(
+        store["is_closed_form"] | (lengths == 0),
+        store["closed_form"]["start_month"],
+        first_month
+    ).astype(np.int64)
+
+
+def _asset_row_blocks(row_counts, block_rows=SPILL_BLOCK_ROWS):
+    # Rentang aset [lo, hi) berisi sekitar block_rows baris jadwal
+    ends = np.cumsum(row_counts)
+    lo = 0
+
+    while lo < len(row_counts):
+        base = int(ends[lo - 1]) if lo else 0
+        hi = max(int(np.searchsorted(ends, base + block_rows, side="right")), lo + 1)
+        yield lo, hi
+        lo = hi
+
+
+def schedule_block_columns(store, lo, hi, row_counts=None):
+    # Kolom jadwal aset lo..hi-1 berurutan; aset jalur cepat dibentuk dari rumusnya
+    if row_counts is None:
+        row_counts = schedule_row_counts(store)
+
+    closed = store["is_closed_form"][lo:hi]
+    row_lo, row_hi = int(store["offsets"][lo]), int(store["offsets"][hi])
+
+    if not closed.any():
+        return {
+            col: np.asarray(store["columns"][col][row_lo:row_hi])
+            for col in SCHEDULE_STORE_DTYPES
+        }
+
+    engine_rows = np.repeat(~closed, row_counts[lo:hi])
+    params = store["closed_form"]
+    generated = closed_form_schedule_block(
+        params["cost"][lo:hi][closed],
+        params["start_month"][lo:hi][closed],
+        params["life_months"][lo:hi][closed],
+        store["end_month"]
+    )
+
+    block = {}
+
+    for col, dtype in SCHEDULE_STORE_DTYPES.items():
+        values = np.zeros(len(engine_rows), dtype=dtype)
+        values[engine_rows] = store["columns"][col][row_lo:row_hi]
+        values[~engine_rows] = generated[col]
+        block[col] = values
+
+    return block
+
+
+def compute_period_rollup(schedule_store, granularity=PERIOD_ANNUAL):
+    # Hasil: dict kolom ROLLUP_STORE_DTYPES + "asset" (posisi di store),
+    # "Tahun" dan "Semester", satu baris per aset x periode, urut per aset
+    store = schedule_store
+    per_year = PERIODS_PER_YEAR[granularity]
+    row_counts = schedule_row_counts(store)
+
+    # Bulan jadwal tiap aset berurutan tanpa celah, jadi jumlah periode
+    # per aset diketahui dari bulan pertama dan terakhirnya
+    first_month = schedule_start_months(store)
+    last_month = first_month + row_counts - 1
+    n_periods = np.where(
+        row_counts > 0,
+        last_month * per_year // 12 - first_month * per_year // 12 + 1,
+        0
+    )
+    n_rows = int(n_periods.sum())
+
+    rollup = {
+        "granularity": granularity,
+        "codes": store["codes"],
+        "asset": np.repeat(np.arange(len(row_counts), dtype=np.int64), n_periods),
+        "period": np.zeros(n_rows, dtype=np.int64),
+        **{
+            col: np.zeros(n_rows, dtype=dtype)
+            for col, dtype in ROLLUP_STORE_DTYPES.items()
+        },
+    }
+
+    out = 0
+
+    for lo, hi in _asset_row_blocks(row_counts):
+        block = schedule_block_columns(store, lo, hi, row_counts)
+        n_block = len(block["Tahun"])
+
+        if n_block == 0:
+            continue
+
+        asset = np.repeat(np.arange(lo, hi), row_counts[lo:hi])
+        period = period_index(block["Tahun"], block["Bulan"], granularity)
+
+        new_group = np.ones(n_block, dtype=bool)
+        new_group[1:] = (asset[1:] != asset[:-1]) | (period[1:] != period[:-1])
+        group = np.cumsum(new_group) - 1
+        starts = np.flatnonzero(new_group)
+        last_row = np.append(starts[1:] - 1, n_block - 1)
+        span = slice(out, out + len(starts))
+
+        def total(col):
+            # bincount menjumlah berurutan, sama seperti beban di Ringkasan
+            return np.bincount(group, weights=block[col], minlength=len(starts))
+
+        rollup["period"][span] = period[starts]
+        rollup["Kapitalisasi Periode Ini"][span] = round_money(total("Kapitalisasi Bulan Ini"))
+        rollup["Tambahan Usia Periode Ini"][span] = np.rint(total("Tambahan Usia Bulan Ini"))
+        rollup["Koreksi Periode Ini"][span] = round_money(total("Koreksi Bulan Ini"))
+        rollup["Beban Penyusutan Periode Ini"][span] = round_money(total("Penyusutan Bulan Berjalan"))
+
+        for col in ["Akumulasi Penyusutan", "Nilai Buku Akhir", "Sisa Masa Manfaat (Bulan)"]:
+            rollup[col][span] = block[col][last_row]
+
+        out += len(starts)
+
+    rollup["Tahun"], rollup["Semester"] = period_parts(rollup["period"], granularity)
+
+    return rollup
+
+
+def compute_period_rollups(schedule_store, granularities=None):
+    return [
+        compute_period_rollup(schedule_store, granularity)
+        for granularity in granularities or ROLLUP_GRANULARITIES
+    ]
+
+
+def rollup_rows(rollup, lo=0, hi=None):
+    # Baris rekap lo..hi-1 sebagai tuple sesuai urutan ROLLUP_COLUMNS
+    hi = len(rollup["period"]) if hi is None else hi
+    granularity = rollup["granularity"]
+    codes = rollup["codes"]
+
+    tahun = rollup["Tahun"][lo:hi].tolist()
+    semester = rollup["Semester"][lo:hi].tolist()
+
+    derived = {
+        "Kode Aset": [codes[i] for i in rollup["asset"][lo:hi].tolist()],
+        "Tahun": tahun,
+        "Semester": semester,
+        "Periode": (
+            [f"{t}-S{s}" for t, s in zip(tahun, semester)]
+            if granularity == PERIOD_SEMESTER else [str(t) for t in tahun]
+        ),
+        "Sisa Masa Manfaat (Tahun)": round_money(rollup["Sisa Masa Manfaat (Bulan)"][lo:hi] / 12).tolist(),
+    }
+
+    columns = [
+        derived[col] if col in derived else rollup[col][lo:hi].tolist()
+        for col in ROLLUP_COLUMNS[granularity]
+    ]
+
+    return list(zip(*columns))
+
+
+def rollup_df(rollup):
+    return pd.DataFrame(rollup_rows(rollup), columns=ROLLUP_COLUMNS[rollup["granularity"]])
+
+
+# =========================================================
+# INDEKS PENCARIAN KODE ASET
+# =========================================================
+# Dibangun satu kali saat hasil tersedia. Kode disimpan sebagai array teks
+# huruf kecil (pencarian substring dengan np.char.find, tanpa menyalin
+# DataFrame) dan salinan terurut untuk pencarian awalan (searchsorted).
+# Hasil pencarian berupa nomor baris tabel asal sehingga tabel cukup
+# diiris per halaman.
+
+def build_code_index(codes):
+    codes = np.asarray(["" if code is None else str(code) for code in codes], dtype=str)
+    lowered = np.char.lower(codes)
+    order = np.argsort(lowered, kind="stable")
+
+    return {
+        "codes": codes,
+        "lowered": lowered,
+        "order": order,
+        "sorted": lowered[order],
+    }
+
+
+def _prefix_rows(index, query):
+    lo = np.searchsorted(index["sorted"], query, side="left")
+    hi = np.searchsorted(index["sorted"], query + "\U0010ffff", side="left")
+
+    return index["order"][lo:hi]
+
+
+def search_code_index(index, query, prefix_first=False):
+    # Semua baris yang Kode Aset-nya memuat query (tanpa membedakan huruf
+    # besar/kecil), urut baris asal. prefix_first=True: kode yang diawali
+    # query tampil lebih dulu (urut kode), lalu sisa kecocokan substring.
+    query = str(query or "").strip().lower()
+    n_rows = len(index["codes"])
+
+    if not query:
+        return np.arange(n_rows)
+
+    if n_rows == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    prefix = _prefix_rows(index, query)
+
+    if len(prefix) == n_rows:
+        rows = np.arange(n_rows)
+    else:
+        rows = np.flatnonzero(np.char.find(index["lowered"], query) >= 0)
+
+    if not prefix_first:
+        return rows
+
+    return np.concatenate([prefix, rows[~np.isin(rows, prefix)]])
+
+
+def rows_with_codes(index, rows, codes, include=True):
+    # Saring nomor baris berdasarkan himpunan kode (filter anomali)
+    mask = np.isin(index["codes"][rows], np.asarray(list(codes), dtype=str))
+
+    return rows[mask] if include else rows[~mask]
+
+
+def build_result_indexes(processed):
+    def codes_of(rows):
+        return [row.get("Kode Aset") for row in rows]
+
+    return {
+        "results": build_code_index(codes_of(processed["results"])),
+        "anomalies": build_code_index(codes_of(processed["anomaly_rows"])),
+        "skipped": build_code_index(codes_of(processed["skipped_rows"])),
+        "schedules": build_code_index(schedule_store_codes(processed["schedule_store"])),
+    }
+
+
+# =========================================================
+# VALIDASI BARIS & ANOMALI (SEBELUM MESIN)
+# =========================================================
+
+ASSET_MISSING_REASONS = [
+    ("Kode Aset", "Kode Aset kosong/tidak valid"),
+    ("Harga Perolehan Awal (Rp)", "Harga Perolehan kosong/tidak valid"),
+    ("Tanggal Perolehan", "Tanggal Perolehan kosong/tidak valid"),
+    ("Masa Manfaat (tahun)", "Masa Manfaat kosong/tidak valid"),
+]
+
+
+def _float_values(values):
+    return pd.Series(values).to_numpy(dtype=float, na_value=np.nan)
+
+
+def _skip_reasons(assets_df):
+    # Satu alasan per baris ("" = baris valid). Kolom kosong digabung dengan
+    # "; "; pemeriksaan nilai hanya untuk baris yang lengkap, alasan
+    # pertama yang cocok saja (urutan sama dengan pemeriksaan per baris).
+    n_rows = len(assets_df)
+    missing_text = np.full(n_rows, "", dtype=object)
+    any_missing = np.zeros(n_rows, dtype=bool)
+
+    for column, reason in ASSET_MISSING_REASONS:
+        missing = assets_df[column].isna().to_numpy()
+        missing_text[missing] = [
+            f"{text}; {reason}" if text else reason
+            for text in missing_text[missing]
+        ]
+        any_missing |= missing
+
+    costs = _float_values(assets_df["Harga Perolehan Awal (Rp)"])
+    lives = _float_values(assets_df["Masa Manfaat (tahun)"])
+    dates = assets_df["Tanggal Perolehan"]
+
+    with np.errstate(invalid="ignore"):
+        return np.select(
+            [
+                any_missing,
+                costs < 0,
+                lives <= 0,
+                (dates > REPORTING_DATE).to_numpy(),
+            ],
+            [
+                missing_text,
+                "Harga Perolehan negatif",
+                "Masa Manfaat harus lebih dari 0",
+                f"Tanggal Perolehan setelah {REPORTING_DATE.strftime('%d/%m/%Y')}",
+            ],
+            default=""
+        )
+
+
+def _join_events(events_df, date_column, valid_assets):
+    # Satu join event <-> aset valid lewat Kode Aset. Urutan hasil: per aset
+    # (urutan baris aset), lalu urutan baris event; sama dengan membaca
+    # event per aset, sehingga urutan penjumlahan di mesin tidak berubah.
+    if events_df is None or events_df.empty:
+        return None
+
+    events = events_df[events_df["Kode Aset"].notna() & events_df[date_column].notna()]
+    events = events.assign(_urutan_event=np.arange(len(events)))
+
+    joined = events.merge(valid_assets, on="Kode Aset", how="inner", sort=False)
+
+    if joined.empty:
+        return None
+
+    return joined.sort_values(["_posisi_aset", "_urutan_event"], kind="stable")
+
+
+def _anomaly_rows(joined, date_column, kind, note):
+    return [
+        {
+            "Kode Aset": code,
+            "Jenis Anomali": kind,
+            "Tanggal Aset": asset_date,
+            "Tanggal Transaksi": event_date,
+            "Keterangan": f"{note} Nilai: {amount}"
+        }
+        for code, asset_date, event_date, amount in zip(
+            joined["Kode Aset"].tolist(),
+            joined["_tanggal_aset"].dt.strftime("%d/%m/%Y").tolist(),
+            joined[date_column].dt.strftime("%d/%m/%Y").tolist(),
+            joined["Jumlah"].tolist(),
+        )
+    ]
+
+
+def validate_register_rows(assets_df, capitalizations_df, corrections_df):
+    # Validasi seluruh register sekaligus (mask boolean per kolom) dan
+    # deteksi kapitalisasi/koreksi sebelum tanggal perolehan induk lewat satu
+    # join per tabel event. Hasil: skipped_rows & anomaly_rows (format sama
+    # dengan Reviu Hasil) serta array aset bersih + event untuk mesin.
+    # Event dengan Jumlah kosong/tidak valid juga dicatat sebagai anomali dan
+    # tidak dihitung (di kedua money_mode), bukan menggagalkan register.
+    reasons = _skip_reasons(assets_df)
+    skipped = reasons != ""
+
+    skipped_rows = pd.DataFrame({
+        "Baris Excel": assets_df.index.to_numpy()[skipped] + 2,
+        "Kode Aset": assets_df["Kode Aset"].to_numpy()[skipped],
+        "Alasan": reasons[skipped],
+    }).to_dict("records")
+
+    valid = assets_df[~skipped]
+    codes = valid["Kode Aset"].astype(str).str.strip()
+
+    valid_assets = pd.DataFrame({
+        "Kode Aset": codes.to_numpy(),
+        "_posisi_aset": np.arange(len(valid)),
+        "_tanggal_aset": valid["Tanggal Perolehan"].to_numpy(),
+    })
+
+    anomaly_parts = []
+    events = {}
+
+    for name, events_df, date_column, kind, label, value_columns in [
+        ("cap", capitalizations_df, "Tanggal Kapitalisasi", "Kapitalisasi", "kapitalisasi", ["Jumlah", "Tambahan Usia"]),
+        ("corr", corrections_df, "Tanggal Koreksi", "Koreksi", "koreksi", ["Jumlah"]),
+    ]:
+        joined = _join_events(events_df, date_column, valid_assets)
+
+        if joined is None:
+            events[name] = {"asset_idx": [], "date": [], "amount": [], "life": []}
+            continue
+
+        before_parent = (joined[date_column] < joined["_tanggal_aset"]).to_numpy()
+        invalid_amount = ~before_parent & joined["Jumlah"].isna().to_numpy()
+        anomalies = joined[before_parent]
+        invalid = joined[invalid_amount]
+        used = joined[~before_parent & ~invalid_amount]
+
+        anomaly_parts.append((
+            anomalies["_posisi_aset"].to_numpy(),
+            _anomaly_rows(
+                anomalies, date_column, f"{kind} sebelum induk",
+                f"Tanggal {label} lebih awal dari tanggal perolehan aset induk."
+            )
+        ))
+        anomaly_parts.append((
+            invalid["_posisi_aset"].to_numpy(),
+            _anomaly_rows(
+                invalid, date_column, f"Jumlah {label} tidak valid",
+                f"Jumlah {label} kosong/tidak valid; baris ini tidak dihitung."
+            )
+        ))
+
+        events[name] = {
+            "asset_idx": used["_posisi_aset"].to_numpy(),
+            "date": used[date_column].to_numpy(),
+            "amount": _float_values(used["Jumlah"]),
+            "life": _float_values(used[value_columns[-1]]) if name == "cap" else [],
+        }
+
+    # Anomali per aset: kapitalisasi dulu, lalu koreksi
+    anomaly_positions = np.concatenate([part[0] for part in anomaly_parts] or [np.zeros(0, dtype=np.int64)])
+    anomaly_records = [row for part in anomaly_parts for row in part[1]]
+    anomaly_rows = [anomaly_records[i] for i in np.argsort(anomaly_positions, kind="stable")]
+
+    return {
+        "skipped_rows": skipped_rows,
+        "anomaly_rows": anomaly_rows,
+        "codes": codes.tolist(),
+        "costs": _float_values(valid["Harga Perolehan Awal (Rp)"]),
+        "dates": valid["Tanggal Perolehan"].to_numpy(),
+        "lives": _float_values(valid["Masa Manfaat (tahun)"]),
+        "cap_events": events["cap"],
+        "corr_events": events["corr"],
+    }
+
+
+def compute_depreciation_chunk(
+    assets_df,
+    capitalizations_df,
+    corrections_df,
+    progress_callback=None,
+    closed_form=True,
+    profiler=None,
+    money_mode=MONEY_MODE_FLOAT,
+    spill_threshold_rows=None,
+    tracer=None
+):
+    # Inti perhitungan tanpa Streamlit: validasi baris & anomali (sekaligus
+    # untuk seluruh tabel), lalu mesin batch hanya untuk baris bersih. Bisa
+    # dipanggil untuk seluruh register atau satu potongan baris (mode
+    # paralel). progress_callback(persen, teks) bersifat opsional.
+    # closed_form=False memaksa semua aset lewat mesin bulanan; jalur cepat
+    # hanya berlaku pada MONEY_MODE_SEN (lihat JALUR CEPAT).
+    # profiler (lihat page.susutperf) mencatat waktu/memori per tahap.
+    # money_mode: MONEY_MODE_FLOAT atau MONEY_MODE_SEN (fixed-point).
+    # spill_threshold_rows: jadwal dengan baris >= nilai ini ditulis ke disk
+    # (memory-mapped, lihat page.susutspill); None = selalu di RAM.
+    # tracer (page.susuttrace.new_tracer): Kode Aset yang dilacak per bulan;
+    # aset ini selalu lewat mesin bulanan agar setiap bulannya tercatat.
+    results = []
+    total_rows = len(assets_df)
+
+    if progress_callback is not None:
+        progress_callback(0, f"Memvalidasi {total_rows} baris...")
+
+    with profile_stage(profiler, "Validasi baris & anomali"):
+        validated = validate_register_rows(assets_df, capitalizations_df, corrections_df)
+
+    skipped_rows = validated["skipped_rows"]
+    anomaly_rows = validated["anomaly_rows"]
+    valid_codes = validated["codes"]
+    valid_costs = validated["costs"]
+    valid_dates = validated["dates"]
+    valid_lives = validated["lives"]
+    cap_events = validated["cap_events"]
+    corr_events = validated["corr_events"]
+
+    if progress_callback is not None:
+        progress_callback(
+            50,
+            f"{len(valid_codes)} baris valid, {len(skipped_rows)} dilewati, {len(anomaly_rows)} anomali."
+        )
+
+    def update_engine_progress(done, total):
+        if progress_callback is not None and (done == total or done % 12 == 0):
+            progress_callback(
+                50 + int(done / max(total, 1) * 50),
+                f"Menghitung jadwal penyusutan aset dengan kapitalisasi/koreksi..."
+            )
+
+    # Mode sen: aset tanpa kapitalisasi/koreksi memakai jalur cepat (rumus
+    # tertutup); mesin bulanan hanya menghitung aset yang memiliki event.
+    has_events = np.zeros(len(valid_codes), dtype=bool)
+    has_events[cap_events["asset_idx"]] = True
+    has_events[corr_events["asset_idx"]] = True
+
+    if uses_closed_form(closed_form, money_mode):
+        use_closed_form = ~has_events & ~trace_mask(tracer, valid_codes)
+    else:
+        use_closed_form = np.zeros(len(valid_codes), dtype=bool)
+
+    spill = None
+
+    if (
+        spill_threshold_rows is not None
+        and estimate_schedule_rows(assets_df, capitalizations_df, corrections_df, closed_form, money_mode)
+        >= spill_threshold_rows
+    ):
+        spill = create_spill_dir()
+
+    begin_stage(profiler, f"Mesin bulanan ({int((~use_closed_form).sum())} aset)")
+
+    batch = calculate_depreciation_monthly_batch(
+        initial_costs=valid_costs,
+        acquisition_dates=valid_dates,
+        useful_life_years=valid_lives,
+        reporting_date=REPORTING_DATE,
+        cap_asset_idx=cap_events["asset_idx"],
+        cap_dates=cap_events["date"],
+        cap_amounts=cap_events["amount"],
+        cap_life_years=cap_events["life"],
+        corr_asset_idx=corr_events["asset_idx"],
+        corr_dates=corr_events["date"],
+        corr_amounts=corr_events["amount"],
+        asset_mask=~use_closed_form,
+        progress_callback=update_engine_progress,
+        money_mode=money_mode,
+        spill=spill,
+        trace=kernel_trace(
+            tracer, valid_codes, "bulanan", PERIOD_MONTHLY,
+            integer_money=money_mode == MONEY_MODE_SEN
+        )
+    )
+
+    end_stage(profiler)
+    begin_stage(profiler, f"Jalur cepat & Ringkasan ({int(use_closed_form.sum())} aset jalur cepat)")
+
+    summary = batch_reporting_summary(batch, REPORTING_DATE.year)
+
+    closed = closed_form_reporting_summary(
+        np.where(use_closed_form, valid_costs, 0),
+        valid_dates,
+        valid_lives,
+        REPORTING_DATE
+    )
+    closed["has_schedule"] &= use_closed_form
+
+    end_period = f"{REPORTING_DATE.year}-{REPORTING_DATE.month:02d}"
+
+    for i, asset_code in enumerate(valid_codes):
+        if closed["has_schedule"][i]:
+            results.append({
+                "Kode Aset": asset_code,
+                "Tanggal Pelaporan": REPORTING_DATE.strftime("%d/%m/%Y"),
+                "Periode Pelaporan": end_period,
+                "Beban Penyusutan 2025": float(closed["beban"][i]),
+                "Akumulasi Penyusutan": float(closed["Akumulasi Penyusutan"][i]),
+                "Nilai Buku Akhir": float(closed["Nilai Buku Akhir"][i]),
+                "Sisa Masa Manfaat (Bulan)": int(closed["Sisa Masa Manfaat (Bulan)"][i]),
+            })
+            continue
+
+        if not summary["has_schedule"][i]:
+            continue
+
+        last = summary["last_row"][i]
+
+        results.append({
+            "Kode Aset": asset_code,
+            "Tanggal Pelaporan": REPORTING_DATE.strftime("%d/%m/%Y"),
+            "Periode Pelaporan": f"{batch['Tahun'][last]}-{batch['Bulan'][last]:02d}",
+            "Beban Penyusutan 2025": float(summary["beban"][i]),
+            "Akumulasi Penyusutan": float(batch["Akumulasi Penyusutan"][last]),
+            "Nilai Buku Akhir": float(batch["Nilai Buku Akhir"][last]),
+            "Sisa Masa Manfaat (Bulan)": int(batch["Sisa Masa Manfaat (Bulan)"][last]),
+        })
+
+    end_stage(profiler)
+
+    with profile_stage(profiler, "Susun schedule store"):
+        schedule_store = build_schedule_store(
+            batch,
+            valid_codes,
+            closed_form=closed,
+            closed_form_costs=valid_costs,
+            money_mode=money_mode,
+            spill=spill
+        )
+
+    return {
+        "results": results,
+        "schedule_store": schedule_store,
+        "skipped_rows": skipped_rows,
+        "anomaly_rows": anomaly_rows,
+        "total_rows": total_rows
+    }
+
+
+# =========================================================
+# MODE PARALEL (PROCESS POOL)
+# =========================================================
+
+MIN_PARALLEL_CHUNK_ROWS = 2000
+CHUNKS_PER_WORKER = 4
+
+
+def available_cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def split_depreciation_chunks(assets_df, capitalizations_df, corrections_df, n_chunks):
+    # Potong tabel aset per blok baris berurutan; tiap blok hanya membawa
+    # kapitalisasi/koreksi milik Kode Aset di dalamnya agar pickling ringan.
+    n_chunks = max(1, min(n_chunks, len(assets_df)))
+    bounds = np.linspace(0, len(assets_df), n_chunks + 1).astype(int)
+
+    chunks = []
+
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        chunk_assets = assets_df.iloc[lo:hi]
+        codes = chunk_assets["Kode Aset"].dropna().astype(str).str.strip()
+
+        chunks.append((
+            chunk_assets,
+            capitalizations_df[capitalizations_df["Kode Aset"].isin(codes)],
+            corrections_df[corrections_df["Kode Aset"].isin(codes)],
+        ))
+
+    return chunks
+
+
+def merge_depreciation_chunks(chunk_results, total_rows, spill=None):
+    # Gabungkan hasil blok sesuai urutan baris asli; spill: lihat merge_schedule_stores
+    merged = {
+        "results": [],
+        "schedule_store": None,
+        "skipped_rows": [],
+        "anomaly_rows": [],
+        "total_rows": total_rows
+    }
+
+    for chunk in chunk_results:
+        merged["results"].extend(chunk["results"])
+        merged["skipped_rows"].extend(chunk["skipped_rows"])
+        merged["anomaly_rows"].extend(chunk["anomaly_rows"])
+
+    merged["schedule_store"] = merge_schedule_stores(
+        [chunk["schedule_store"] for chunk in chunk_results],
+        spill=spill
+    )
+
+    return merged
+
+
+def detach_spilled_store(store):
+    # Di proses worker: kolom di disk tidak ikut di-pickle (akan tersalin
+    # utuh); yang dikirim hanya folder-nya, lihat attach_spilled_store
+    if store.get("spill") is None:
+        return store
+
+    return {**store, "columns": None, "spill": detach_spill_dir(store["spill"])}
+
+
+def attach_spilled_store(store):
+    # Di proses utama: folder dari worker diambil alih dan kolomnya di-map
+    if store["columns"] is not None:
+        return store
+
+    spill = adopt_spill_dir(store["spill"]["path"])
+
+    return {
+        **store,
+        "columns": {col: spill_open(spill, name) for col, name in SPILL_COLUMN_FILES.items()},
+        "spill": spill,
+    }
+
+
+def _compute_traced_chunk(assets_df, capitalizations_df, corrections_df, trace_codes=None, **kwargs):
+    # Untuk proses worker: tracer tidak bisa diubah lintas proses, jadi
+    # baris trace blok ini ikut dikembalikan bersama hasilnya
+    tracer = new_tracer(trace_codes)
+    processed = compute_depreciation_chunk(
+        assets_df, capitalizations_df, corrections_df, tracer=tracer, **kwargs
+    )
+    processed["schedule_store"] = detach_spilled_store(processed["schedule_store"])
+    return processed, [] if tracer is None else tracer["chunks"]
+
+
+def compute_depreciation_parallel(
+    assets_df,
+    capitalizations_df,
+    corrections_df,
+    max_workers=None,
+    progress_callback=None,
+    money_mode=MONEY_MODE_FLOAT,
+    spill_threshold_rows=None,
+    tracer=None
+):
+    max_workers = max_workers or available_cpu_count()
+    n_chunks = min(
+        max_workers * CHUNKS_PER_WORKER,
+        max(1, len(assets_df) // MIN_PARALLEL_CHUNK_ROWS)
+    )
+
+    if max_workers <= 1 or n_chunks <= 1:
+        return compute_depreciation_chunk(
+            assets_df,
+            capitalizations_df,
+            corrections_df,
+            progress_callback=progress_callback,
+            money_mode=money_mode,
+            spill_threshold_rows=spill_threshold_rows,
+            tracer=tracer
+        )
+
+    # Register besar: tiap blok menulis jadwalnya ke folder spill sendiri
+    # (hanya nama folder yang dikirim balik), lalu digabung per blok baris
+    # ke satu folder spill baru
+    spill = (
+        spill_threshold_rows is not None
+        and estimate_schedule_rows(assets_df, capitalizations_df, corrections_df, money_mode=money_mode)
+        >= spill_threshold_rows
+    )
+
+    chunks = split_depreciation_chunks(assets_df, capitalizations_df, corrections_df, n_chunks)
+    chunk_results = [None] * len(chunks)
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        futures = {
+            executor.submit(
+                _compute_traced_chunk, *chunk,
+                trace_codes=None if tracer is None else sorted(tracer["codes"]),
+                money_mode=money_mode,
+                spill_threshold_rows=0 if spill else None
+            ): i
+            for i, chunk in enumerate(chunks)
+        }
+
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                processed, trace_chunks = future.result()
+                processed["schedule_store"] = attach_spilled_store(processed["schedule_store"])
+                chunk_results[futures[future]] = processed
+
+                if tracer is not None:
+                    tracer["chunks"].extend(trace_chunks)
+
+                if progress_callback is not None:
+                    progress_callback(
+                        int(done / len(chunks) * 100),
+                        f"Blok {done} dari {len(chunks)} selesai ({max_workers} proses)..."
+                    )
+        except BaseException:
+            # Gagal / dibatalkan lewat progress_callback: blok yang belum
+            # mulai tidak perlu dijalankan
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    if not spill:
+        return merge_depreciation_chunks(chunk_results, len(assets_df))
+
+    merged = merge_depreciation_chunks(chunk_results, len(assets_df), spill=create_spill_dir())
+
+    for chunk in chunk_results:
+        release_spill_dir(chunk["schedule_store"]["spill"])
+
+    return merged
+
+
+# =========================================================
+# PERHITUNGAN ULANG INKREMENTAL (FINGERPRINT PER ASET)
+# =========================================================
+
+FINGERPRINT_ASSET_COLUMNS = [
+    "Kode Aset",
+    "Harga Perolehan Awal (Rp)",
+    "Tanggal Perolehan",
+    "Masa Manfaat (tahun)",
+]
+FINGERPRINT_CAP_COLUMNS = ["Tanggal Kapitalisasi", "Jumlah", "Tambahan Usia"]
+FINGERPRINT_CORR_COLUMNS = ["Tanggal Koreksi", "Jumlah"]
+
+
+def _event_fingerprints(events_df, value_columns, asset_codes):
+    # Satu hash per Kode Aset dari seluruh baris event-nya. Nomor urut baris
+    # dalam aset ikut di-hash karena urutan event memengaruhi penjumlahan.
+    result = np.zeros(len(asset_codes), dtype=np.uint64)
+
+    if events_df is None or events_df.empty:
+        return result
+
+    code_positions = {code: i for i, code in enumerate(asset_codes) if code is not None}
+
+    events = events_df.dropna(subset=["Kode Aset"])
+    positions = events["Kode Aset"].map(code_positions).fillna(-1).to_numpy(dtype=np.int64)
+    matched = positions >= 0
+
+    if not matched.any():
+        return result
+
+    events = events[matched]
+    hashed = events[value_columns].copy()
+    hashed["urutan"] = events.groupby("Kode Aset", sort=False).cumcount()
+
+    row_hash = pd.util.hash_pandas_object(hashed, index=False).to_numpy()
+    np.bitwise_xor.at(result, positions[matched], row_hash)
+
+    return result
+
+
+def compute_asset_fingerprints(assets_df, capitalizations_df, corrections_df, salt=""):
+    # Fingerprint per baris aset: isi baris aset + seluruh kapitalisasi dan
+    # koreksinya + salt (versi mesin, tanggal pelaporan, mode hitung).
+    asset_hash = pd.util.hash_pandas_object(
+        assets_df[FINGERPRINT_ASSET_COLUMNS],
+        index=False
+    ).to_numpy()
+
+    codes = assets_df["Kode Aset"].astype(object).where(assets_df["Kode Aset"].notna(), None).tolist()
+
+    combined = pd.DataFrame({
+        "aset": asset_hash,
+        "kapitalisasi": _event_fingerprints(capitalizations_df, FINGERPRINT_CAP_COLUMNS, codes),
+        "koreksi": _event_fingerprints(corrections_df, FINGERPRINT_CORR_COLUMNS, codes),
+        "salt": str(salt),
+    })
+
+    return pd.Series(
+        pd.util.hash_pandas_object(combined, index=False).to_numpy(),
+        index=assets_df.index
+    )
+
+
+def run_fingerprint_salt(closed_form=True, money_mode=MONEY_MODE_FLOAT):
+    salt = f"{ENGINE_VERSION}|{REPORTING_DATE.date()}|closed_form={closed_form}"
+
+    # Mode float tanpa akhiran agar cache & fingerprint lama tetap berlaku
+    if money_mode != MONEY_MODE_FLOAT:
+        salt += f"|uang={money_mode}"
+
+    return salt
+
+
+def select_schedule_store(stores, asset_codes, spill=None):
+    # Ambil aset dari daftar store dengan urutan sesuai asset_codes; kode
+    # yang ada di beberapa store diambil dari store terakhir. Baris disalin per blok SPILL_BLOCK_ROWS sehingga
+    # store di disk tidak dimuat utuh; spill: kolom hasil ditulis ke sini.
+    location = {
+        code: (source, position)
+        for source, store in enumerate(stores)
+        for code, position in store["positions"].items()
+    }
+    sources = np.asarray([location[code][0] for code in asset_codes], dtype=np.int64)
+    positions = np.asarray([location[code][1] for code in asset_codes], dtype=np.int64)
+
+    lo = np.zeros(len(positions), dtype=np.int64)
+    lengths = np.zeros(len(positions), dtype=np.int64)
+    is_closed_form = np.zeros(len(positions), dtype=bool)
+    closed_form = {
+        field: np.zeros(len(positions), dtype=dtype)
+        for field, dtype in CLOSED_FORM_FIELDS.items()
+    }
+
+    for source, store in enumerate(stores):
+        picked = sources == source
+        lo[picked] = store["offsets"][:-1][positions[picked]]
+        lengths[picked] = store["offsets"][1:][positions[picked]] - lo[picked]
+        is_closed_form[picked] = store["is_closed_form"][positions[picked]]
+
+        for field, values in closed_form.items():
+            values[picked] = store["closed_form"][field][positions[picked]]
+
+    offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    total_rows = int(offsets[-1])
+
+    columns = {
+        col: _allocate_rows(spill, SPILL_COLUMN_FILES[col], total_rows, dtype)
+        for col, dtype in SCHEDULE_STORE_DTYPES.items()
+    }
+
+    for block_lo in range(0, total_rows, SPILL_BLOCK_ROWS):
+        rows = np.arange(block_lo, min(block_lo + SPILL_BLOCK_ROWS, total_rows))
+        asset = np.searchsorted(offsets, rows, side="right") - 1
+        source_rows = lo[asset] + rows - offsets[asset]
+
+        for source, store in enumerate(stores):
+            picked = sources[asset] == source
+
+            if not picked.any():
+                continue
+
+            for col, values in columns.items():
+                values[rows[picked]] = store["columns"][col][source_rows[picked]]
+
+    codes = list(asset_codes)
+
+    return {
+        "codes": codes,
+        "positions": {code: i for i, code in enumerate(codes)},
+        "offsets": offsets,
+        "columns": columns,
+        "is_closed_form": is_closed_form,
+        "closed_form": closed_form,
+        "end_month": next((store["end_month"] for store in stores if store["end_month"] is not None), None),
+        "money_mode": next(
+            (store.get("money_mode", MONEY_MODE_FLOAT) for store in stores if store["codes"]),
+            MONEY_MODE_FLOAT
+        ),
+        "spill": spill,
+    }
+
+
+def compute_depreciation_incremental(
+    assets_df,
+    capitalizations_df,
+    corrections_df,
+    previous=None,
+    parallel=False,
+    max_workers=None,
+    progress_callback=None,
+    profiler=None,
+    money_mode=MONEY_MODE_FLOAT,
+    spill_threshold_rows=None,
+    tracer=None
+):
+    # Hanya aset yang fingerprint-nya berubah (atau belum pernah dihitung)
+    # yang masuk mesin; aset lain memakai Ringkasan, anomali dan jadwal dari
+    # hasil sebelumnya. Baris tanpa Kode Aset dan baris yang dilewati selalu
+    # divalidasi ulang agar nomor Baris Excel tetap akurat.
+    # Jadwal gabungan lama + baru ditulis ke disk bila register mencapai
+    # spill_threshold_rows; jadwal lama yang di disk dibaca per blok.
+    # Aset yang dilacak (tracer) selalu dihitung ulang agar trace-nya lengkap.
+    begin_stage(profiler, "Fingerprint aset")
+
+    fingerprints = compute_asset_fingerprints(
+        assets_df,
+        capitalizations_df,
+        corrections_df,
+        salt=run_fingerprint_salt(money_mode=money_mode)
+    )
+
+    codes = assets_df["Kode Aset"]
+    previous_fingerprints = (previous or {}).get("fingerprints") or {}
+    previous_results = {
+        row["Kode Aset"]: row
+        for row in (previous or {}).get("results", [])
+    }
+
+    reusable = np.array([
+        pd.notna(code)
+        and code in previous_results
+        and previous_fingerprints.get(code) == fp
+        for code, fp in zip(codes.tolist(), fingerprints.tolist())
+    ], dtype=bool)
+    reusable &= ~trace_mask(tracer, codes.tolist())
+
+    changed_assets = assets_df[~reusable]
+    changed_codes = changed_assets["Kode Aset"].dropna()
+    changed_caps = capitalizations_df[capitalizations_df["Kode Aset"].isin(changed_codes)]
+    changed_corrs = corrections_df[corrections_df["Kode Aset"].isin(changed_codes)]
+
+    end_stage(profiler)
+
+    if parallel:
+        # Tahap di dalam proses worker tidak ikut tercatat
+        with profile_stage(profiler, "Hitung paralel (process pool)"):
+            fresh = compute_depreciation_parallel(
+                changed_assets,
+                changed_caps,
+                changed_corrs,
+                max_workers=max_workers,
+                progress_callback=progress_callback,
+                money_mode=money_mode,
+                spill_threshold_rows=spill_threshold_rows,
+                tracer=tracer
+            )
+    else:
+        fresh = compute_depreciation_chunk(
+            changed_assets,
+            changed_caps,
+            changed_corrs,
+            progress_callback=progress_callback,
+            profiler=profiler,
+            money_mode=money_mode,
+            spill_threshold_rows=spill_threshold_rows,
+            tracer=tracer
+        )
+
+    begin_stage(profiler, "Gabung dengan hasil sebelumnya")
+
+    reused_codes = codes[reusable].tolist()
+
+    # Gabungkan kembali sesuai urutan baris asli
+    row_order = {code: i for i, code in enumerate(codes.tolist()) if pd.notna(code)}
+
+    results = [previous_results[code] for code in reused_codes] + fresh["results"]
+    results.sort(key=lambda row: row_order[row["Kode Aset"]])
+
+    reused_set = set(reused_codes)
+    anomaly_rows = [
+        row for row in previous.get("anomaly_rows", [])
+        if row["Kode Aset"] in reused_set
+    ] if reused_codes else []
+    anomaly_rows += fresh["anomaly_rows"]
+    anomaly_rows.sort(key=lambda row: row_order[row["Kode Aset"]])
+
+    if reused_codes:
+        spill = None
+
+        if (
+            spill_threshold_rows is not None
+            and estimate_schedule_rows(assets_df, capitalizations_df, corrections_df, money_mode=money_mode)
+            >= spill_threshold_rows
+        ):
+            spill = create_spill_dir()
+
+        schedule_store = select_schedule_store(
+            [previous["schedule_store"], fresh["schedule_store"]],
+            [row["Kode Aset"] for row in results],
+            spill=spill
+        )
+        release_spill_dir(fresh["schedule_store"].get("spill"))
+    else:
+        schedule_store = fresh["schedule_store"]
+
+    result_codes = {row["Kode Aset"] for row in results}
+
+    end_stage(profiler)
+
+    return {
+        "results": results,
+        "schedule_store": schedule_store,
+        "skipped_rows": fresh["skipped_rows"],
+        "anomaly_rows": anomaly_rows,
+        "total_rows": len(assets_df),
+        "fingerprints": {
+            code: fp
+            for code, fp in zip(codes.tolist(), fingerprints.tolist())
+            if code in result_codes
+        },
+        "reused_count": len(reused_codes),
+        "recomputed_count": len(fresh["results"]),
+    }
+
+
+# =========================================================
+# CACHE HASIL DI DISK (LINTAS SESI)
+# =========================================================
+
+CACHE_NAMESPACE = "batchbulanan"
+
+
+def run_cache_key(file_bytes, money_mode=MONEY_MODE_FLOAT):
+    # Isi file + versi mesin + tanggal pelaporan + mode hitung
+    return make_cache_key(file_content_hash(file_bytes), run_fingerprint_salt(money_mode=money_mode))
+
+
+def save_processed_to_cache(cache_key, processed):
+    store = processed["schedule_store"]
+
+    tables = {
+        "results": pd.DataFrame(processed["results"], columns=RINGKASAN_COLUMNS),
+        "skipped": pd.DataFrame(processed["skipped_rows"], columns=SKIPPED_COLUMNS),
+        "anomalies": pd.DataFrame(processed["anomaly_rows"], columns=ANOMALY_COLUMNS),
+        "fingerprints": pd.DataFrame({
+            "Kode Aset": list((processed.get("fingerprints") or {}).keys()),
+            "fingerprint": np.asarray(
+                list((processed.get("fingerprints") or {}).values()),
+                dtype=np.uint64
+            ),
+        }),
+    }
+
+    arrays = {
+        "codes": np.asarray(store["codes"], dtype=str),
+        "offsets": store["offsets"],
+        "is_closed_form": store["is_closed_form"],
+    }
+    arrays.update({f"cf::{field}": values for field, values in store["closed_form"].items()})
+
+    # Kolom jadwal sebagai file .npy terpisah: jadwal di disk (spill) ditulis
+    # per blok dari memmap-nya dan bisa dimuat kembali tanpa masuk RAM
+    mapped_arrays = {
+        f"jadwal_{name}": store["columns"][col]
+        for col, name in SPILL_COLUMN_FILES.items()
+    }
+
+    meta = {
+        "total_rows": int(processed["total_rows"]),
+        "end_month": None if store["end_month"] is None else int(store["end_month"]),
+        "engine_version": ENGINE_VERSION,
+        "money_mode": store.get("money_mode", MONEY_MODE_FLOAT),
+    }
+
+    return save_cached_run(
+        CACHE_NAMESPACE, cache_key,
+        tables=tables, arrays=arrays, meta=meta, mapped_arrays=mapped_arrays
+    )
+
+
+def load_processed_from_cache(cache_key, spill_threshold_rows=None):
+    # Jadwal dengan baris >= spill_threshold_rows tetap dibaca memory-mapped
+    # dari folder cache (sama seperti spill); lainnya dimuat ke RAM
+    cached = load_cached_run(CACHE_NAMESPACE, cache_key)
+
+    if cached is None:
+        return None
+
+    tables, arrays, meta = cached
+    codes = arrays["codes"].tolist()
+    mapped = (
+        spill_threshold_rows is not None
+        and int(arrays["offsets"][-1]) >= spill_threshold_rows
+    )
+
+    def column(col):
+        # Entri lama menyimpan kolom jadwal di dalam npz
+        if f"col::{col}" in arrays:
+            return arrays[f"col::{col}"]
+
+        values = arrays[f"jadwal_{SPILL_COLUMN_FILES[col]}"]
+        return values if mapped else np.array(values)
+
+    schedule_store = {
+        "codes": codes,
+        "positions": {code: i for i, code in enumerate(codes)},
+        "offsets": arrays["offsets"],
+        "columns": {col: column(col) for col in SCHEDULE_STORE_DTYPES},
+        "is_closed_form": arrays["is_closed_form"],
+        "closed_form": {
+            field: arrays[f"cf::{field}"]
+            for field in CLOSED_FORM_FIELDS
+        },
+        "end_month": meta["end_month"],
+        "money_mode": meta.get("money_mode", MONEY_MODE_FLOAT),
+        "spill": borrow_spill_dir(cache_entry_dir(CACHE_NAMESPACE, cache_key)) if mapped else None,
+    }
+
+    fingerprints = tables["fingerprints"]
+
+    def to_records(df):
+        return df.astype(object).where(df.notna(), None).to_dict("records")
+
+    return {
+        "results": to_records(tables["results"]),
+        "schedule_store": schedule_store,
+        "skipped_rows": to_records(tables["skipped"]),
+        "anomaly_rows": to_records(tables["anomalies"]),
+        "total_rows": meta["total_rows"],
+        "fingerprints": dict(zip(
+            fingerprints["Kode Aset"].tolist(),
+            fingerprints["fingerprint"].tolist()
+        )),
+        "from_cache": True,
+    }
+
+
+# =========================================================
+# EXPORT EXCEL STREAMING (CONSTANT MEMORY)
+# =========================================================
+
+RINGKASAN_COLUMNS = [
+    "Kode Aset",
+    "Tanggal Pelaporan",
+    "Periode Pelaporan",
+    "Beban Penyusutan 2025",
+    "Akumulasi Penyusutan",
+    "Nilai Buku Akhir",
+    "Sisa Masa Manfaat (Bulan)",
+]
+SKIPPED_COLUMNS = ["Baris Excel", "Kode Aset", "Alasan"]
+ANOMALY_COLUMNS = ["Kode Aset", "Jenis Anomali", "Tanggal Aset", "Tanggal Transaksi", "Keterangan"]
+
+# Mode export: satu sheet per aset (format KKP lama) atau satu sheet
+# "Detail" berformat panjang (Kode Aset x Periode) dengan sheet per aset
+# hanya untuk aset anomali / pilihan pengguna.
+EXPORT_MODE_SHEET_PER_ASSET = "sheet_per_aset"
+EXPORT_MODE_LONG_DETAIL = "detail_panjang"
+EXPORT_MODES = [EXPORT_MODE_SHEET_PER_ASSET, EXPORT_MODE_LONG_DETAIL]
+
+DETAIL_COLUMNS = ["Kode Aset"] + SCHEDULE_COLUMNS
+# Batas baris Excel 1.048.576 dikurangi satu baris header
+EXCEL_MAX_DATA_ROWS = 1048575
+# Progres export dilaporkan tiap sekian sheet aset (x10 untuk baris Detail)
+EXPORT_PROGRESS_EVERY = 100
+
+
+def _excel_value(value):
+    # NaN/NA ditulis sebagai sel kosong, sama seperti DataFrame.to_excel
+    if value is None:
+        return None
+
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+
+    return value
+
+
+def _write_record_rows(ws, start_row, records, columns):
+    for offset, record in enumerate(records):
+        ws.write_row(
+            start_row + offset,
+            0,
+            [_excel_value(record.get(col)) for col in columns]
+        )
+
+
+def asset_sheet_codes_for_export(
+    schedule_store,
+    anomaly_rows=None,
+    selected_codes=None,
+    export_mode=EXPORT_MODE_SHEET_PER_ASSET
+):
+    # Kode aset yang mendapat sheet tersendiri, urut schedule_store
+    codes = schedule_store_codes(schedule_store)
+
+    if export_mode == EXPORT_MODE_SHEET_PER_ASSET:
+        return list(codes)
+
+    wanted = {str(row.get("Kode Aset")) for row in anomaly_rows or []}
+    wanted.update(str(code) for code in selected_codes or [])
+
+    return [code for code in codes if str(code) in wanted]
+
+
+def _set_schedule_column_widths(ws, money_fmt, int_fmt, first_col=0):
+    widths = [
+        (12, None), (10, None), (14, None), (24, money_fmt), (24, int_fmt), (22, money_fmt),
+        (24, money_fmt), (24, money_fmt), (22, money_fmt), (24, int_fmt), (24, None),
+    ]
+
+    for offset, (width, fmt) in enumerate(widths):
+        ws.set_column(first_col + offset, first_col + offset, width, fmt)
+
+
+def schedule_row_counts(store):
+    # Jumlah baris jadwal per aset tanpa membentuk jadwalnya
+    counts = np.diff(store["offsets"]).astype(np.int64)
+
+    if store["end_month"] is not None and store["is_closed_form"].any():
+        closed_counts = store["end_month"] - store["closed_form"]["start_month"].astype(np.int64) + 1
+        counts = np.where(store["is_closed_form"], np.maximum(closed_counts, 0), counts)
+
+    return counts
+
+
+def largest_schedule_assets(store):
+    # Proksi aset terberat untuk panel Performa dan sheet Reviu Hasil
+    return largest_asset_rows(store["codes"], schedule_row_counts(store))
+
+
+def long_detail_sheet_names(schedule_store):
+    n_rows = int(schedule_row_counts(schedule_store).sum())
+    n_sheets = max(1, -(-n_rows // EXCEL_MAX_DATA_ROWS))
+
+    return ["Detail"] + [f"Detail {i}" for i in range(2, n_sheets + 1)]
+
+
+def _add_long_detail_placeholders(workbook, schedule_store, header_fmt, money_fmt, int_fmt):
+    # Header, lebar kolom dan freeze pane ditulis xlsxwriter; baris data
+    # disisipkan setelah workbook ditutup (lihat susutxlsx)
+    sheet_names = long_detail_sheet_names(schedule_store)
+
+    for name in sheet_names:
+        ws = workbook.add_worksheet(name)
+        ws.set_column(0, 0, 20)
+        _set_schedule_column_widths(ws, money_fmt, int_fmt, first_col=1)
+        ws.freeze_panes(1, 0)
+        ws.write_row(0, 0, DETAIL_COLUMNS, header_fmt)
+
+    return sheet_names
+
+
+def _long_detail_row_cells(schedule_store, money_fmt, int_fmt, on_asset=None):
+    # Isi XML per baris Detail (Kode Aset + SCHEDULE_COLUMNS), aset demi aset
+    kinds = ["s", "n", "n", "s", "n", "n", "n", "n", "n", "n", "n", "n"]
+    money, whole = money_fmt.xf_index, int_fmt.xf_index
+    styles = [None, None, None, None, money, whole, money, money, money, money, whole, None]
+    template = row_template(kinds, styles)
+
+    for position, asset_code in enumerate(schedule_store_codes(schedule_store)):
+        if on_asset is not None:
+            on_asset(position)
+
+        code_text = xml_text(asset_code)
+
+        for row in get_asset_schedule_rows(schedule_store, asset_code):
+            yield template.format(code_text, *row)
+
+
+def _long_detail_tables(schedule_store, sheet_names, money_fmt, int_fmt, on_asset=None):
+    row_counts = schedule_row_counts(schedule_store)
+    total = int(row_counts.sum())
+    rows = _long_detail_row_cells(schedule_store, money_fmt, int_fmt, on_asset)
+    tables = []
+
+    for i, name in enumerate(sheet_names):
+        count = min(EXCEL_MAX_DATA_ROWS, total - i * EXCEL_MAX_DATA_ROWS)
+        tables.append({
+            "sheet": name,
+            "name": name.replace(" ", "_"),
+            "columns": DETAIL_COLUMNS,
+            "row_count": count,
+            "rows": islice(rows, count),
+        })
+
+    return tables
+
+
+def rollup_sheet_names(rollup):
+    base = ROLLUP_SHEET_NAMES[rollup["granularity"]]
+    n_sheets = max(1, -(-len(rollup["period"]) // EXCEL_MAX_DATA_ROWS))
+
+    return [base] + [f"{base} {i}" for i in range(2, n_sheets + 1)]
+
+
+def _set_rollup_column_widths(ws, granularity, money_fmt, int_fmt):
+    widths = [(20, None), (10, None)]
+
+    if granularity == PERIOD_SEMESTER:
+        widths.append((10, None))
+
+    widths += [
+        (12, None), (24, money_fmt), (24, int_fmt), (22, money_fmt), (26, money_fmt),
+        (24, money_fmt), (22, money_fmt), (24, int_fmt), (24, None),
+    ]
+
+    for col, (width, fmt) in enumerate(widths):
+        ws.set_column(col, col, width, fmt)
+
+
+def _add_rollup_placeholders(workbook, rollup, header_fmt, money_fmt, int_fmt):
+    sheet_names = rollup_sheet_names(rollup)
+    columns = ROLLUP_COLUMNS[rollup["granularity"]]
+
+    for name in sheet_names:
+        ws = workbook.add_worksheet(name)
+        _set_rollup_column_widths(ws, rollup["granularity"], money_fmt, int_fmt)
+        ws.freeze_panes(1, 0)
+        ws.write_row(0, 0, columns, header_fmt)
+
+    return sheet_names
+
+
+def _rollup_row_cells(rollup, money_fmt, int_fmt):
+    # Isi XML per baris rekap (urutan ROLLUP_COLUMNS), per blok baris
+    money, whole = money_fmt.xf_index, int_fmt.xf_index
+    kinds = ["s", "n"]
+    styles = [None, None]
+
+    if rollup["granularity"] == PERIOD_SEMESTER:
+        kinds.append("n")
+        styles.append(None)
+
+    kinds += ["s", "n", "n", "n", "n", "n", "n", "n", "n"]
+    styles += [None, money, whole, money, money, money, money, whole, None]
+    template = row_template(kinds, styles)
+
+    n_rows = len(rollup["period"])
+
+    for lo in range(0, n_rows, ROWS_PER_WRITE):
+        for code, *values in rollup_rows(rollup, lo, min(lo + ROWS_PER_WRITE, n_rows)):
+            yield template.format(xml_text(code), *values)
+
+
+def _rollup_tables(rollup, sheet_names, money_fmt, int_fmt):
+    total = len(rollup["period"])
+    rows = _rollup_row_cells(rollup, money_fmt, int_fmt)
+
+    return [
+        {
+            "sheet": name,
+            "name": name.replace(" ", "_"),
+            "columns": ROLLUP_COLUMNS[rollup["granularity"]],
+            "row_count": min(EXCEL_MAX_DATA_ROWS, total - i * EXCEL_MAX_DATA_ROWS),
+            "rows": islice(rows, EXCEL_MAX_DATA_ROWS),
+        }
+        for i, name in enumerate(sheet_names)
+    ]
+
+
+def write_kkp_workbook_streaming(
+    output_path,
+    results,
+    schedule_store,
+    skipped_rows=None,
+    anomaly_rows=None,
+    total_rows=0,
+    snapshot_rows=None,
+    performance=None,
+    export_mode=EXPORT_MODE_SHEET_PER_ASSET,
+    selected_codes=None,
+    progress_callback=None,
+    rollups=None
+):
+    # Workbook format KKP (Ringkasan, sheet per aset, Reviu Hasil). Baris
+    # ditulis langsung dari data jadwal (tanpa DataFrame) dengan mode
+    # constant_memory xlsxwriter, dan workbook langsung ke file di disk.
+    # Baris jadwal dibaca per aset dari schedule_store.
+    # progress_callback(persen, teks) opsional, dipanggil tiap blok aset.
+    # rollups: hasil compute_period_rollups, ditulis sebagai sheet Rekap.
+    skipped_rows = skipped_rows or []
+    anomaly_rows = anomaly_rows or []
+    rollups = rollups or []
+
+    asset_sheet_codes = asset_sheet_codes_for_export(
+        schedule_store,
+        anomaly_rows=anomaly_rows,
+        selected_codes=selected_codes,
+        export_mode=export_mode
+    )
+    n_detail_assets = len(schedule_store_codes(schedule_store)) if export_mode == EXPORT_MODE_LONG_DETAIL else 0
+    total_units = max(len(asset_sheet_codes) + n_detail_assets, 1)
+
+    def report_export_progress(done, text):
+        if progress_callback is not None:
+            progress_callback(int(done / total_units * 100), text)
+
+    workbook = xlsxwriter.Workbook(
+        output_path,
+        {"constant_memory": True, "tmpdir": os.path.dirname(output_path) or None}
+    )
+
+    money_fmt = workbook.add_format({"num_format": "#,##0.00"})
+    int_fmt = workbook.add_format({"num_format": "0"})
+    bold_fmt = workbook.add_format({"bold": True})
+    header_fmt = workbook.add_format({
+        "bold": True,
+        "bg_color": "#D9EAF7",
+        "border": 1
+    })
+
+    # =====================================================
+    # SHEET RINGKASAN
+    # =====================================================
+    ws_ringkasan = workbook.add_worksheet("Ringkasan")
+
+    ws_ringkasan.set_column("A:A", 20)
+    ws_ringkasan.set_column("B:C", 18)
+    ws_ringkasan.set_column("D:F", 22, money_fmt)
+    ws_ringkasan.set_column("G:G", 24, int_fmt)
+
+    if results:
+        ws_ringkasan.write_row(0, 0, RINGKASAN_COLUMNS, header_fmt)
+        _write_record_rows(ws_ringkasan, 1, results, RINGKASAN_COLUMNS)
+
+    # =====================================================
+    # SHEET SNAPSHOT PELAPORAN (JIKA ADA)
+    # =====================================================
+    if snapshot_rows:
+        ws_snapshot = workbook.add_worksheet("Snapshot Pelaporan")
+
+        ws_snapshot.set_column("A:A", 18)
+        ws_snapshot.set_column("B:C", 18)
+        ws_snapshot.set_column("D:F", 24, money_fmt)
+        ws_snapshot.set_column("G:G", 24, int_fmt)
+
+        ws_snapshot.write_row(0, 0, SNAPSHOT_COLUMNS, header_fmt)
+        _write_record_rows(ws_snapshot, 1, snapshot_rows, SNAPSHOT_COLUMNS)
+
+    used_sheet_names = {"Ringkasan", "Snapshot Pelaporan", "Reviu Hasil"}
+
+    # =====================================================
+    # SHEET REKAP SEMESTERAN / TAHUNAN (JIKA ADA)
+    # =====================================================
+    rollup_sheets = []
+
+    for rollup in rollups:
+        sheet_names = _add_rollup_placeholders(workbook, rollup, header_fmt, money_fmt, int_fmt)
+        rollup_sheets.append((rollup, sheet_names))
+        used_sheet_names.update(sheet_names)
+
+    # =====================================================
+    # SHEET DETAIL FORMAT PANJANG (MODE DETAIL_PANJANG)
+    # =====================================================
+    long_detail_sheets = []
+
+    if export_mode == EXPORT_MODE_LONG_DETAIL:
+        long_detail_sheets = _add_long_detail_placeholders(
+            workbook, schedule_store, header_fmt, money_fmt, int_fmt
+        )
+        used_sheet_names.update(long_detail_sheets)
+
+    # =====================================================
+    # SHEET DETAIL PER ASET
+    # =====================================================
+    reporting_text = REPORTING_DATE.strftime("%d/%m/%Y")
+
+    for sheet_number, asset_code in enumerate(asset_sheet_codes):
+        if sheet_number % EXPORT_PROGRESS_EVERY == 0:
+            report_export_progress(
+                sheet_number,
+                f"Menulis sheet aset {sheet_number + 1} dari {len(asset_sheet_codes)}..."
+            )
+
+        base_sheet_name = safe_sheet_name(asset_code)
+        sheet_name = base_sheet_name
+
+        counter = 1
+
+        while sheet_name in used_sheet_names:
+            suffix = f"_{counter}"
+            sheet_name = safe_sheet_name(base_sheet_name[:31 - len(suffix)] + suffix)
+            counter += 1
+
+        used_sheet_names.add(sheet_name)
+
+        ws = workbook.add_worksheet(sheet_name)
+
+        _set_schedule_column_widths(ws, money_fmt, int_fmt)
+
+        ws.write(0, 0, "Kode Aset", bold_fmt)
+        ws.write(0, 1, asset_code)
+
+        ws.write(1, 0, "Tanggal Pelaporan", bold_fmt)
+        ws.write(1, 1, reporting_text)
+
+        ws.write_row(2, 0, SCHEDULE_COLUMNS, header_fmt)
+        for offset, row in enumerate(get_asset_schedule_rows(schedule_store, asset_code)):
+            ws.write_row(3 + offset, 0, [_excel_value(v) for v in row])
+
+        # Tutup file sementara sheet yang sudah selesai agar jumlah file
+        # terbuka tidak ikut bertambah per aset; xlsxwriter membukanya
+        # kembali saat workbook dirakit. Metode ini bukan API publik
+        # xlsxwriter, jadi dipanggil hanya bila tersedia.
+        opt_close = getattr(ws, "_opt_close", None)
+        if opt_close is not None:
+            opt_close()
+
+    # =====================================================
+    # SHEET REVIU HASIL
+    # =====================================================
+    ws_reviu = workbook.add_worksheet("Reviu Hasil")
+
+    ws_reviu.set_column("A:A", 22)
+    ws_reviu.set_column("B:B", 32)
+    ws_reviu.set_column("C:D", 20)
+    ws_reviu.set_column("E:E", 80)
+
+    ws_reviu.write(0, 0, "Ringkasan Reviu", bold_fmt)
+
+    ws_reviu.write(2, 0, "Jumlah total baris", bold_fmt)
+    ws_reviu.write(2, 1, total_rows, int_fmt)
+
+    ws_reviu.write(3, 0, "Jumlah baris berhasil diproses", bold_fmt)
+    ws_reviu.write(3, 1, len(results), int_fmt)
+
+    ws_reviu.write(4, 0, "Jumlah baris dilewati", bold_fmt)
+    ws_reviu.write(4, 1, len(skipped_rows), int_fmt)
+
+    ws_reviu.write(5, 0, "Jumlah input aset anomali", bold_fmt)
+    ws_reviu.write(5, 1, len(anomaly_rows), int_fmt)
+
+    start_row_skip = 8
+
+    ws_reviu.write(start_row_skip, 0, "Daftar Baris yang Dilewati", bold_fmt)
+    ws_reviu.write_row(start_row_skip + 1, 0, SKIPPED_COLUMNS, header_fmt)
+    _write_record_rows(ws_reviu, start_row_skip + 2, skipped_rows, SKIPPED_COLUMNS)
+
+    start_row_anom = start_row_skip + 3 + max(len(skipped_rows), 1)
+
+    ws_reviu.write(start_row_anom, 0, "Daftar Input Aset Tidak Logis / Anomali", bold_fmt)
+    ws_reviu.write_row(start_row_anom + 1, 0, ANOMALY_COLUMNS, header_fmt)
+    _write_record_rows(ws_reviu, start_row_anom + 2, anomaly_rows, ANOMALY_COLUMNS)
+
+    # Performa proses (hanya jika instrumentasi diaktifkan saat proses)
+    if performance and performance.get("stages"):
+        start_row_perf = start_row_anom + 3 + max(len(anomaly_rows), 1)
+
+        ws_reviu.write(start_row_perf, 0, "Performa Proses per Tahap", bold_fmt)
+        ws_reviu.write_row(start_row_perf + 1, 0, STAGE_COLUMNS, header_fmt)
+        _write_record_rows(ws_reviu, start_row_perf + 2, performance["stages"], STAGE_COLUMNS)
+
+        largest = performance.get("largest") or []
+
+        if largest:
+            start_row_large = start_row_perf + 3 + len(performance["stages"])
+            largest_columns = list(largest[0].keys())
+
+            ws_reviu.write(start_row_large, 0, f"{len(largest)} Aset dengan Baris Jadwal Terbanyak", bold_fmt)
+            ws_reviu.write_row(start_row_large + 1, 0, largest_columns, header_fmt)
+            _write_record_rows(ws_reviu, start_row_large + 2, largest, largest_columns)
+
+    workbook.close()
+
+    # Semua tabel besar disisipkan dalam satu kali salin file .xlsx
+    tables = []
+
+    for rollup, sheet_names in rollup_sheets:
+        tables.extend(_rollup_tables(rollup, sheet_names, money_fmt, int_fmt))
+
+    if long_detail_sheets:
+        def on_detail_asset(position):
+            if position % (EXPORT_PROGRESS_EVERY * 10) == 0:
+                report_export_progress(
+                    len(asset_sheet_codes) + position,
+                    f"Menulis sheet Detail: aset {position + 1} dari {n_detail_assets}..."
+                )
+
+        tables.extend(_long_detail_tables(
+            schedule_store, long_detail_sheets, money_fmt, int_fmt, on_detail_asset
+        ))
+
+    if tables:
+        splice_table_sheets(output_path, tables)
+
+    report_export_progress(total_units, "File Excel selesai ditulis.")
+
+    return output_path
+
+
+def export_kkp_workbook_to_tempfile(
+    results,
+    schedule_store,
+    skipped_rows=None,
+    anomaly_rows=None,
+    total_rows=0,
+    snapshot_rows=None,
+    performance=None,
+    export_mode=EXPORT_MODE_SHEET_PER_ASSET,
+    selected_codes=None,
+    progress_callback=None,
+    rollups=None
+):
+    # File hasil ditulis ke folder sementara tersendiri; pemanggil yang
+    # menghapusnya (lihat remove_export_file) setelah tidak dipakai.
+    # Jika gagal/dibatalkan di tengah jalan, folder langsung dihapus.
+    export_dir = tempfile.mkdtemp(prefix="kkp_bulanan_")
+    output_path = os.path.join(export_dir, "hasil_penyusutan_bulanan_2025.xlsx")
+
+    try:
+        return write_kkp_workbook_streaming(
+            output_path,
+            results,
+            schedule_store,
+            skipped_rows=skipped_rows,
+            anomaly_rows=anomaly_rows,
+            total_rows=total_rows,
+            snapshot_rows=snapshot_rows,
+            performance=performance,
+            export_mode=export_mode,
+            selected_codes=selected_codes,
+            progress_callback=progress_callback,
+            rollups=rollups
+        )
+    except BaseException:
+        shutil.rmtree(export_dir, ignore_errors=True)
+        raise
+
+
+def remove_export_file(path):
+    if path:
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+# =========================================================
+# RUNNER TANPA UI (SATU FILE REGISTER)
+# =========================================================
+
+def _rounded_total(rows, column):
+    return round(float(sum(row[column] for row in rows)), 2)
+
+
+def run_depreciation_file(
+    input_path,
+    output_dir,
+    reporting_dates=None,
+    parallel=False,
+    max_workers=None,
+    progress_callback=None,
+    export_mode=EXPORT_MODE_SHEET_PER_ASSET,
+    money_mode=MONEY_MODE_FLOAT,
+    spill_threshold_rows=SPILL_MIN_ROWS,
+    with_rollups=False,
+    trace_codes=None,
+    trace_format=TRACE_FORMAT_JSONL
+):
+    # Baca, validasi, hitung dan tulis workbook KKP + ringkasan JSON untuk
+    # satu file register. Hasil: dict ringkasan (juga ditulis ke file .json).
+    # with_rollups: sertakan sheet Rekap Semesteran dan Rekap Tahunan.
+    # trace_codes: Kode Aset yang dilacak per bulan, ditulis ke
+    # <nama>_trace.<trace_format> (jsonl / npz) di output_dir.
+    timings = {}
+    started = time.perf_counter()
+
+    def timed(stage, func, *args, **kwargs):
+        stage_start = time.perf_counter()
+        value = func(*args, **kwargs)
+        timings[stage] = round(time.perf_counter() - stage_start, 3)
+        return value
+
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    os.makedirs(output_dir, exist_ok=True)
+    workbook_path = os.path.join(output_dir, f"{stem}_penyusutan_bulanan.xlsx")
+    summary_path = os.path.join(output_dir, f"{stem}_ringkasan.json")
+    tracer = new_tracer(trace_codes)
+
+    assets_df, capitalizations_df, corrections_df, sheet_names, read_timings = timed(
+        "baca", read_register_file, input_path
+    )
+
+    assets_df, capitalizations_df, corrections_df = timed(
+        "validasi", prepare_input_data, assets_df, capitalizations_df, corrections_df
+    )
+
+    if parallel:
+        processed = timed(
+            "hitung", compute_depreciation_parallel,
+            assets_df, capitalizations_df, corrections_df,
+            max_workers=max_workers,
+            progress_callback=progress_callback,
+            money_mode=money_mode,
+            spill_threshold_rows=spill_threshold_rows,
+            tracer=tracer
+        )
+    else:
+        processed = timed(
+            "hitung", compute_depreciation_chunk,
+            assets_df, capitalizations_df, corrections_df,
+            progress_callback=progress_callback,
+            money_mode=money_mode,
+            spill_threshold_rows=spill_threshold_rows,
+            tracer=tracer
+        )
+
+    snapshot_rows = timed(
+        "snapshot", compute_reporting_snapshots,
+        processed["schedule_store"], reporting_dates
+    )
+
+    rollups = []
+
+    if with_rollups:
+        rollups = timed("rekap", compute_period_rollups, processed["schedule_store"])
+
+    timed(
+        "export", write_kkp_workbook_streaming,
+        workbook_path,
+        processed["results"],
+        processed["schedule_store"],
+        skipped_rows=processed["skipped_rows"],
+        anomaly_rows=processed["anomaly_rows"],
+        total_rows=processed["total_rows"],
+        snapshot_rows=snapshot_rows,
+        export_mode=export_mode,
+        rollups=rollups
+    )
+
+    spilled = processed["schedule_store"].get("spill") is not None
+    release_spill_dir(processed["schedule_store"].get("spill"))
+
+    results = processed["results"]
+    snapshot_totals = {}
+
+    for row in snapshot_rows:
+        total = snapshot_totals.setdefault(row["Tanggal Pelaporan"], {
+            "jumlah_aset": 0,
+            "beban_tahun_berjalan": 0.0,
+            "akumulasi_penyusutan": 0.0,
+            "nilai_buku_akhir": 0.0,
+        })
+        total["jumlah_aset"] += 1
+        total["beban_tahun_berjalan"] += row["Beban Penyusutan Tahun Berjalan"]
+        total["akumulasi_penyusutan"] += row["Akumulasi Penyusutan"]
+        total["nilai_buku_akhir"] += row["Nilai Buku Akhir"]
+
+    for total in snapshot_totals.values():
+        for key in ["beban_tahun_berjalan", "akumulasi_penyusutan", "nilai_buku_akhir"]:
+            total[key] = round(total[key], 2)
+
+    rollup_totals = {}
+
+    for rollup in rollups:
+        periods, group = np.unique(rollup["period"], return_inverse=True)
+        tahun, semester = period_parts(periods, rollup["granularity"])
+
+        def period_sums(col):
+            return np.round(np.bincount(group, weights=rollup[col], minlength=len(periods)), 2).tolist()
+
+        labels = (
+            [f"{t}-S{s}" for t, s in zip(tahun.tolist(), semester.tolist())]
+            if rollup["granularity"] == PERIOD_SEMESTER else [str(t) for t in tahun.tolist()]
+        )
+
+        rollup_totals[rollup["granularity"]] = {
+            label: {
+                "jumlah_aset": int(count),
+                "beban_penyusutan": beban,
+                "akumulasi_penyusutan": akumulasi,
+                "nilai_buku_akhir": nilai_buku,
+            }
+            for label, count, beban, akumulasi, nilai_buku in zip(
+                labels,
+                np.bincount(group, minlength=len(periods)),
+                period_sums("Beban Penyusutan Periode Ini"),
+                period_sums("Akumulasi Penyusutan"),
+                period_sums("Nilai Buku Akhir"),
+            )
+        }
+
+    trace_path = None
+
+    if tracer is not None:
+        trace_path = timed(
+            "trace", write_trace, tracer,
+            os.path.join(output_dir, f"{stem}_trace.{trace_format}")
+        )
+
+    timings["total"] = round(time.perf_counter() - started, 3)
+
+    summary = {
+        "file": os.path.abspath(input_path),
+        "status": "ok",
+        "engine_version": ENGINE_VERSION,
+        "aritmetika_uang": money_mode,
+        "jadwal_di_disk": spilled,
+        "tanggal_pelaporan": REPORTING_DATE.strftime("%Y-%m-%d"),
+        "sheet": sheet_names,
+        "jumlah_baris": processed["total_rows"],
+        "jumlah_diproses": len(results),
+        "jumlah_dilewati": len(processed["skipped_rows"]),
+        "jumlah_anomali": len(processed["anomaly_rows"]),
+        "total": {
+            "beban_penyusutan": _rounded_total(results, "Beban Penyusutan 2025"),
+            "akumulasi_penyusutan": _rounded_total(results, "Akumulasi Penyusutan"),
+            "nilai_buku_akhir": _rounded_total(results, "Nilai Buku Akhir"),
+        },
+        "snapshot": snapshot_totals,
+        "rekap": rollup_totals,
+        "waktu_detik": timings,
+        "waktu_baca_sheet": read_timings,
+        "workbook": os.path.abspath(workbook_path),
+    }
+
+    if trace_path is not None:
+        summary["trace"] = os.path.abspath(trace_path)
+
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    summary["ringkasan_json"] = os.path.abspath(summary_path)
+
+    return summary
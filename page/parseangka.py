@@ -0,0 +1,142 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# =========================================================
+# PARSER ANGKA FORMAT INDONESIA
+# =========================================================
+# Dipakai halaman batch (satu kolom sekaligus) dan RecalTab (per sel
+# tabel Word). Aturan: spasi, "Rp", "%", "^" dan "X" dibuang, catatan
+# "Rekalkulasi:..." dibuang, "-" / "–" / "—" berarti nol (jika
+# dash_as_zero), "(...)" berarti negatif, titik pemisah ribuan, koma
+# desimal. Sel angka (int/float) dipakai apa adanya.
+
+WHITESPACE_PATTERN = r"[ \n\r\t]"
+NOISE_PATTERN = r"Rp|RP|rp|[%^X]"
+RECALC_NOTE_PATTERN = r"Rekalkulasi:[-\d\.\,\(\)]+"
+NEGATIVE_PATTERN = r"^\(.+\)$"
+NUMBER_PATTERN = r"-?\d+(\.\d+)?"
+DASH_TEXTS = ["-", "–", "—"]
+
+_WHITESPACE_RE = re.compile(WHITESPACE_PATTERN)
+_NOISE_RE = re.compile(NOISE_PATTERN)
+_RECALC_NOTE_RE = re.compile(RECALC_NOTE_PATTERN)
+_NEGATIVE_RE = re.compile(NEGATIVE_PATTERN)
+_NUMBER_RE = re.compile(NUMBER_PATTERN)
+
+
+def parse_indonesian_number(text, dash_as_zero=True):
+    # Satu sel: float, atau None jika kosong / bukan angka. Sel angka
+    # (int/float) dipakai apa adanya, sama dengan parse_indonesian_numbers.
+    if text is None or isinstance(text, bool):
+        return None
+
+    if isinstance(text, (int, float, np.integer, np.floating)):
+        return None if np.isnan(text) else float(text)
+
+    text = str(text).strip()
+
+    if text == "":
+        return None
+
+    text = _WHITESPACE_RE.sub("", text)
+    text = _NOISE_RE.sub("", text)
+    text = _RECALC_NOTE_RE.sub("", text)
+
+    if text in DASH_TEXTS:
+        return 0.0 if dash_as_zero else None
+
+    is_negative = bool(_NEGATIVE_RE.match(text))
+
+    if is_negative:
+        text = text[1:-1]
+
+    text = text.replace(".", "").replace(",", ".")
+
+    if not _NUMBER_RE.fullmatch(text):
+        return None
+
+    number = float(text)
+
+    return -abs(number) if is_negative else number
+
+
+def parse_indonesian_numbers(values, dash_as_zero=True):
+    # Satu kolom / array sel sekaligus. Hasil: (angka float, mask error).
+    # Sel kosong -> NaN tanpa error; teks yang bukan angka dan sel bertipe
+    # lain (tanggal, bool, ...) -> NaN dengan error True.
+    values = pd.Series(values).reset_index(drop=True)
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+
+    numbers = np.full(len(values), np.nan)
+    errors = np.zeros(len(values), dtype=bool)
+
+    if kind in ("integer", "floating", "mixed-integer-float", "decimal", "empty"):
+        numbers[:] = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        return numbers, errors
+
+    if kind == "string":
+        is_text = np.ones(len(values), dtype=bool)
+    else:
+        is_text = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+        is_number = values.map(
+            lambda value: isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+        ).to_numpy(dtype=bool)
+        is_empty = values.isna().to_numpy(dtype=bool)
+
+        numbers[is_number] = values[is_number].to_numpy(dtype=float)
+        errors[~(is_text | is_number | is_empty)] = True
+
+    if not is_text.any():
+        return numbers, errors
+
+    text = values[is_text].astype(str)
+    blank = text.str.strip() == ""
+    negative = pd.Series(False, index=text.index)
+    dash = pd.Series(False, index=text.index)
+
+    # Langkah pembersihan hanya untuk sel yang memuat selain angka/titik/koma
+    dirty = text.str.contains(r"[^\d.,]", regex=True)
+
+    if dirty.any():
+        cleaned = text[dirty].str.strip()
+        cleaned = cleaned.str.replace(WHITESPACE_PATTERN, "", regex=True)
+        cleaned = cleaned.str.replace(NOISE_PATTERN, "", regex=True)
+        cleaned = cleaned.str.replace(RECALC_NOTE_PATTERN, "", regex=True)
+
+        dash[dirty] = cleaned.isin(DASH_TEXTS)
+        negative[dirty] = cleaned.str.match(NEGATIVE_PATTERN)
+        text[dirty] = cleaned.where(~negative[dirty], cleaned.str[1:-1])
+
+    text = text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+
+    valid = text.str.fullmatch(NUMBER_PATTERN)
+    parsed = np.full(len(text), np.nan)
+    parsed[valid.to_numpy(dtype=bool)] = text[valid].to_numpy(dtype=float)
+    parsed = np.where(negative.to_numpy(dtype=bool), -np.abs(parsed), parsed)
+
+    if dash_as_zero:
+        parsed = np.where(dash.to_numpy(dtype=bool), 0.0, parsed)
+
+    numbers[is_text] = parsed
+    errors[is_text] = ~(valid | dash | blank).to_numpy(dtype=bool)
+
+    return numbers, errors
+
+
+def parse_number_column(values, label, first_row=2, limit=20):
+    # parse_indonesian_numbers untuk satu kolom sheet; semua sel tidak valid
+    # dilaporkan sekaligus (nomor baris Excel) dalam satu ValueError
+    numbers, errors = parse_indonesian_numbers(values)
+
+    if errors.any():
+        rows = (np.flatnonzero(errors) + first_row).tolist()
+        listed = ", ".join(map(str, rows[:limit]))
+        more = f" (+{len(rows) - limit} lainnya)" if len(rows) > limit else ""
+        raise ValueError(
+            f"Kolom {label} berisi {len(rows)} angka tidak valid di baris Excel {listed}{more}."
+        )
+
+    return numbers
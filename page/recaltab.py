@@ -5,6 +5,8 @@ from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 import re
 import io
 
+from page.parseangka import parse_indonesian_number as parse_number
+
 
 # =========================================================
 # KONSTANTA (BARU)
@@ -1371,57 +1373,6 @@ def set_recalculation_cell_style(cell):
 # NUMBER PARSER AND FORMATTER
 # =========================================================
 
-def parse_number(text, dash_as_zero=True):
-    if text is None:
-        return None
-
-    text = str(text).strip()
-
-    if text == "":
-        return None
-
-    text = text.replace("\n", "")
-    text = text.replace("\r", "")
-    text = text.replace("\t", "")
-    text = text.replace(" ", "")
-
-    text = text.replace("Rp", "")
-    text = text.replace("RP", "")
-    text = text.replace("rp", "")
-    text = text.replace("%", "")
-
-    text = text.replace("^", "")
-    text = text.replace("X", "")
-
-    text = re.sub(r"Rekalkulasi:[-\d\.\,\(\)]+", "", text)
-
-    if text in ["-", "–", "—"]:
-        return 0.0 if dash_as_zero else None
-
-    is_negative = False
-
-    if re.match(r"^\(.+\)$", text):
-        is_negative = True
-        text = text[1:-1]
-
-    text = text.replace(".", "")
-    text = text.replace(",", ".")
-
-    if not re.match(r"^-?\d+(\.\d+)?$", text):
-        return None
-
-    try:
-        number = float(text)
-
-        if is_negative:
-            number = -abs(number)
-
-        return number
-
-    except ValueError:
-        return None
-
-
 def format_number(number):
     if number is None:
         return ""
@@ -0,0 +1,179 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+# =========================================================
+# CACHE HASIL PERHITUNGAN DI DISK
+# =========================================================
+# Satu entri = satu folder berisi tabel (Parquet), array (npz tanpa
+# kompresi agar cepat dimuat), array besar sebagai file .npy terpisah
+# (dibaca memory-mapped, tidak dimuat utuh ke RAM) dan meta.json. Waktu akses terakhir dicatat
+# lewat mtime meta.json; entri paling lama tidak dipakai dihapus lebih dulu
+# ketika total ukuran cache melewati batas.
+
+CACHE_DIR = os.environ.get(
+    "AUDITAPP_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "auditapp_cache")
+)
+CACHE_MAX_MB = float(os.environ.get("AUDITAPP_CACHE_MAX_MB", "2048"))
+
+META_FILE = "meta.json"
+ARRAYS_FILE = "arrays.npz"
+
+
+def file_content_hash(file_bytes):
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def make_cache_key(*parts):
+    text = "|".join(str(part) for part in parts)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:40]
+
+
+def _entry_dir(namespace, key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, namespace, key)
+
+
+def _dir_size(path):
+    total = 0
+
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+
+    return total
+
+
+def cache_entry_dir(namespace, key, cache_dir=None):
+    return _entry_dir(namespace, key, cache_dir)
+
+
+def has_cached_run(namespace, key, cache_dir=None):
+    return os.path.exists(os.path.join(_entry_dir(namespace, key, cache_dir), META_FILE))
+
+
+def save_cached_run(
+    namespace,
+    key,
+    tables=None,
+    arrays=None,
+    meta=None,
+    cache_dir=None,
+    max_mb=None,
+    mapped_arrays=None
+):
+    # tables: {nama: DataFrame}, arrays: {nama: ndarray}, meta: dict JSON.
+    # mapped_arrays: {nama: ndarray/memmap} ditulis sebagai <nama>.npy dan
+    # dikembalikan load_cached_run sebagai memmap (nama harus aman untuk file).
+    # Ditulis ke folder sementara lalu di-rename agar entri tidak pernah
+    # terbaca setengah jadi oleh sesi lain.
+    target = _entry_dir(namespace, key, cache_dir)
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+
+    staging = tempfile.mkdtemp(prefix=".tmp_", dir=parent)
+
+    try:
+        for name, df in (tables or {}).items():
+            df.to_parquet(os.path.join(staging, f"{name}.parquet"), index=False)
+
+        np.savez(os.path.join(staging, ARRAYS_FILE), **(arrays or {}))
+
+        for name, values in (mapped_arrays or {}).items():
+            np.save(os.path.join(staging, f"{name}.npy"), values)
+
+        with open(os.path.join(staging, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "tables": sorted((tables or {}).keys()),
+                "mapped": sorted((mapped_arrays or {}).keys()),
+                "created": time.time(),
+                "meta": meta or {},
+            }, f)
+
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(staging, target)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    evict_cache(namespace, cache_dir=cache_dir, max_mb=max_mb, keep=key)
+
+    return target
+
+
+def load_cached_run(namespace, key, cache_dir=None):
+    # Hasil: (tables, arrays, meta) atau None jika tidak ada / rusak.
+    # Array dari mapped_arrays ikut di arrays sebagai memmap hanya-baca.
+    entry = _entry_dir(namespace, key, cache_dir)
+    meta_path = os.path.join(entry, META_FILE)
+
+    if not os.path.exists(meta_path):
+        return None
+
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            info = json.load(f)
+
+        tables = {
+            name: pd.read_parquet(os.path.join(entry, f"{name}.parquet"))
+            for name in info["tables"]
+        }
+
+        with np.load(os.path.join(entry, ARRAYS_FILE), allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+
+        for name in info.get("mapped", []):
+            arrays[name] = np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r")
+    except Exception:
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+
+    # Tandai sebagai baru dipakai (dasar urutan LRU)
+    os.utime(meta_path, None)
+
+    return tables, arrays, info["meta"]
+
+
+def evict_cache(namespace, cache_dir=None, max_mb=None, keep=None):
+    max_bytes = (CACHE_MAX_MB if max_mb is None else max_mb) * 1024 * 1024
+    root = os.path.join(cache_dir or CACHE_DIR, namespace)
+
+    if not os.path.isdir(root):
+        return []
+
+    entries = []
+
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        meta_path = os.path.join(path, META_FILE)
+
+        if name.startswith(".tmp_") or not os.path.exists(meta_path):
+            continue
+
+        entries.append((os.path.getmtime(meta_path), name, _dir_size(path)))
+
+    total = sum(size for _, _, size in entries)
+    removed = []
+
+    for _, name, size in sorted(entries):
+        if total <= max_bytes:
+            break
+
+        if name == keep:
+            continue
+
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        total -= size
+        removed.append(name)
+
+    return removed
@@ -0,0 +1,557 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+# =========================================================
+# KERNEL PENYUSUTAN BERSAMA (TAHUNAN / SEMESTERAN / BULANAN)
+# =========================================================
+# Semua halaman penyusutan memakai aturan garis lurus atas nilai buku yang
+# sama; yang berbeda hanya panjang periode dan beberapa aturan kecil. Kernel
+# ini bekerja pada indeks periode bulat (lihat period_index) sehingga tidak
+# peduli periodenya tahun, semester atau bulan. Perulangan hanya berjalan
+# per periode; setiap periode semua aset aktif dihitung bersamaan dengan
+# urutan operasi float yang sama dengan versi per aset halaman lama.
+#
+# Urutan per periode: kapitalisasi (nilai buku bertambah, sisa umur
+# bertambah tetapi tidak melebihi umur awal) -> koreksi (nilai buku
+# berkurang) -> penyusutan = nilai buku / sisa umur, lalu sisa umur - 1.
+# Aturan yang berbeda antar halaman diatur lewat argumen:
+#   per_row_events      event satu periode diterapkan baris demi baris
+#                       sesuai urutan input (halaman tahunan/semesteran);
+#                       tanpa ini dijumlah dulu lalu diterapkan sekali
+#                       (halaman bulanan)
+#   clamp_corrections   nilai buku setelah koreksi minimal 0 (per baris
+#                       koreksi bila per_row_events)
+#   require_book_value  periode dengan nilai buku <= 0 tidak disusutkan
+#   stop_when_exhausted jadwal berhenti di periode pertama yang diawali
+#                       sisa umur 0 (halaman tahunan per aset)
+#   integer_money       uang dalam sen int64 (lihat MONEY_MODE_SEN di
+#                       page.enginebulanan)
+
+PERIOD_ANNUAL = "tahunan"
+PERIOD_SEMESTER = "semesteran"
+PERIOD_MONTHLY = "bulanan"
+PERIODS_PER_YEAR = {
+    PERIOD_ANNUAL: 1,
+    PERIOD_SEMESTER: 2,
+    PERIOD_MONTHLY: 12,
+}
+
+# Nama kolom hasil kernel (juga nama file kerja saat di-spill ke disk)
+KERNEL_MONEY_COLUMNS = ["kapitalisasi", "koreksi", "penyusutan", "akumulasi", "nilai_buku"]
+KERNEL_INT_COLUMNS = ["tambahan_usia", "sisa_umur"]
+
+
+def period_index(years, months=None, granularity=PERIOD_MONTHLY):
+    # Indeks periode: tahun * p + posisi periode dalam tahun (0..p-1),
+    # p = PERIODS_PER_YEAR[granularity]. Tanpa bulan = periode pertama tahun itu.
+    per_year = PERIODS_PER_YEAR[granularity]
+    index = np.asarray(years, dtype=np.int64) * per_year
+
+    if months is not None:
+        index = index + (np.asarray(months, dtype=np.int64) - 1) * per_year // 12
+
+    return index
+
+
+def period_parts(index, granularity=PERIOD_MONTHLY):
+    # Kebalikan period_index: (tahun, periode ke-1..p dalam tahun)
+    per_year = PERIODS_PER_YEAR[granularity]
+    index = np.asarray(index, dtype=np.int64)
+    return index // per_year, index % per_year + 1
+
+
+def round_money(values):
+    # Sama persis dengan round(x, 2) bawaan Python, tetapi untuk array.
+    # np.round bisa berbeda 1 sen pada nilai yang sangat dekat batas
+    # setengah sen, jadi nilai yang meragukan dibulatkan ulang per sel.
+    values = np.asarray(values, dtype=float)
+    scaled = values * 100.0
+    rounded = np.rint(scaled) / 100.0
+
+    frac = np.abs(scaled - np.trunc(scaled))
+    ambiguous = np.abs(frac - 0.5) <= np.abs(scaled) * 2.0 ** -50
+
+    if ambiguous.any():
+        rounded[ambiguous] = [round(v, 2) for v in values[ambiguous].tolist()]
+
+    return rounded
+
+
+def cumulative_sen(base, life, months):
+    # Pembulatan setengah ke atas dari base * months / life (semua >= 0,
+    # life > 0) tanpa overflow int64: base = q * life + r, r < life.
+    q, r = np.divmod(base, life)
+    return q * months + (2 * r * months + life) // (2 * life)
+
+
+def event_table(asset_idx, periods, amounts, extensions=None):
+    # Tabel event kernel: array sejajar posisi aset (0..n-1), indeks periode,
+    # jumlah uang dan (khusus kapitalisasi) tambahan umur dalam periode.
+    # Baris dengan periode kosong/bukan bilangan bulat dibuang.
+    periods = np.asarray(periods, dtype=float)
+    valid = np.isfinite(periods) & (periods == np.trunc(periods))
+
+    table = {
+        "asset": np.asarray(asset_idx, dtype=np.int64)[valid],
+        "period": periods[valid].astype(np.int64),
+        "amount": np.asarray(amounts)[valid],
+    }
+
+    if extensions is not None:
+        table["extension"] = np.asarray(extensions, dtype=np.int64)[valid]
+
+    return table
+
+
+def events_by_asset_key(events_df, key_column, asset_keys):
+    # Posisi aset (indeks baris asset_keys) untuk setiap baris event; event
+    # dengan kunci yang tidak ada di register mendapat -1. Kunci ganda di
+    # register: event ikut ke setiap baris aset berkunci sama.
+    keys = pd.Index(pd.Series(asset_keys, dtype=object))
+    event_keys = pd.Series(events_df[key_column], dtype=object) if len(events_df) else pd.Series([], dtype=object)
+
+    if keys.is_unique:
+        return np.arange(len(event_keys)), keys.get_indexer(event_keys)
+
+    by_key = pd.DataFrame({"key": keys, "asset": np.arange(len(keys))})
+    joined = pd.DataFrame({"key": event_keys, "row": np.arange(len(event_keys))}).merge(
+        by_key, on="key", how="inner", sort=False
+    ).sort_values(["row", "asset"], kind="stable")
+
+    return joined["row"].to_numpy(), joined["asset"].to_numpy()
+
+
+def register_events(events_df, key_column, asset_keys, periods, extensions=None, amount_column="Jumlah"):
+    # Sheet kapitalisasi/koreksi -> tabel event kernel. periods (dan
+    # extensions, tambahan umur dalam periode) sejajar baris events_df.
+    rows, asset_idx = events_by_asset_key(events_df, key_column, asset_keys)
+
+    if amount_column in events_df.columns:
+        amounts = events_df[amount_column].to_numpy(dtype=float)
+    else:
+        amounts = np.zeros(len(events_df))
+
+    return event_table(
+        asset_idx,
+        np.asarray(periods, dtype=float)[rows],
+        amounts[rows],
+        None if extensions is None else np.asarray(extensions, dtype=np.int64)[rows]
+    )
+
+
+def register_event_tables(
+    capitalizations_df,
+    corrections_df,
+    key_column,
+    asset_keys,
+    cap_periods,
+    corr_periods,
+    granularity=PERIOD_ANNUAL
+):
+    # Sheet kapitalisasi & koreksi halaman tahunan/semesteran -> (tabel
+    # kapitalisasi, tabel koreksi). "Tambahan Usia" (tahun, kosong = 0)
+    # dikonversi ke jumlah periode.
+    extensions = np.zeros(len(capitalizations_df))
+
+    if "Tambahan Usia" in capitalizations_df.columns:
+        extensions = pd.to_numeric(
+            capitalizations_df["Tambahan Usia"], errors="coerce"
+        ).fillna(0).to_numpy(dtype=float)
+
+    cap_events = register_events(
+        capitalizations_df, key_column, asset_keys, cap_periods,
+        np.trunc(extensions * PERIODS_PER_YEAR[granularity])
+    )
+    corr_events = register_events(corrections_df, key_column, asset_keys, corr_periods)
+
+    return cap_events, corr_events
+
+
+def parse_date_cells(values):
+    # Sel tanggal -> Series datetime64 sekaligus, tanpa bolak-balik teks.
+    # Sel bertipe tanggal dipakai apa adanya (jam dibuang); teks dibaca
+    # sebagai MM/DD/YY lalu DD/MM/YYYY. Sel kosong/tidak valid -> ValueError.
+    values = pd.Series(values)
+
+    if pd.api.types.is_datetime64_any_dtype(values):
+        if values.isna().any():
+            raise ValueError(f"Tipe data tanggal tidak valid: {type(pd.NaT)}")
+        return values.dt.normalize()
+
+    # Kolom seragam (semua teks / semua tanggal) tidak perlu diperiksa per sel
+    kind = pd.api.types.infer_dtype(values, skipna=False)
+    is_date = pd.Series(kind == "datetime", index=values.index)
+    is_text = pd.Series(kind == "string", index=values.index)
+
+    if kind not in ("datetime", "string"):
+        is_date = values.map(lambda value: isinstance(value, datetime) and value is not pd.NaT)
+        is_text = values.map(lambda value: isinstance(value, str))
+
+    invalid = ~(is_date | is_text)
+
+    if invalid.any():
+        raise ValueError(f"Tipe data tanggal tidak valid: {type(values[invalid].iloc[0])}")
+
+    dates = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+
+    if is_date.any():
+        dates[is_date] = pd.to_datetime(values[is_date]).dt.normalize()
+
+    if is_text.any():
+        text = values[is_text]
+        parsed = pd.to_datetime(text, format="%m/%d/%y", errors="coerce")
+        parsed = parsed.fillna(pd.to_datetime(text, format="%d/%m/%Y", errors="coerce"))
+
+        if parsed.isna().any():
+            raise ValueError(f"Format tanggal tidak valid: {text[parsed.isna()].iloc[0]}")
+
+        dates[is_text] = parsed
+
+    return dates
+
+
+def date_periods(dates, granularity=PERIOD_MONTHLY):
+    # Indeks periode dari tanggal (float, NaN untuk tanggal kosong)
+    dates = pd.DatetimeIndex(dates)
+    periods = np.full(len(dates), np.nan)
+    valid = ~dates.isna()
+    periods[valid] = period_index(dates.year[valid], dates.month[valid], granularity)
+    return periods
+
+
+def semester_periods(date_values):
+    # Indeks semester (tahun * 2 + 0/1) dari sel tanggal register
+    return date_periods(parse_date_cells(date_values), PERIOD_SEMESTER)
+
+
+def whole_periods(values, label):
+    # Tahun, indeks periode atau masa manfaat sebagai int64 (desimal
+    # dipotong); nilai kosong/tidak valid -> ValueError dengan nama kolom
+    values = np.asarray(pd.to_numeric(values, errors="coerce"), dtype=float)
+
+    if np.isnan(values).any():
+        raise ValueError(f"Kolom {label} berisi nilai kosong/tidak valid.")
+
+    return np.trunc(values).astype(np.int64)
+
+
+def _group_events(events, has_schedule, start_period, end_period, sorted_pos, first_period, last_period):
+    # Event yang jatuh di dalam jadwal asetnya, dikelompokkan per periode
+    # dengan urutan baris asli tetap terjaga; rank = urutan baris event itu
+    # di antara event aset yang sama pada periode yang sama
+    if events is None or len(events["asset"]) == 0:
+        return None
+
+    asset = events["asset"]
+    period = events["period"]
+    known = (asset >= 0) & (asset < len(has_schedule))
+    safe_asset = np.where(known, asset, 0)
+
+    valid = known & has_schedule[safe_asset]
+    valid &= period >= start_period[safe_asset]
+    valid &= period <= end_period[safe_asset]
+
+    period = period[valid]
+    by_period = np.argsort(period, kind="stable")
+    period = period[by_period]
+    pos = sorted_pos[asset[valid][by_period]]
+
+    values = [events["amount"][valid][by_period]]
+
+    if "extension" in events:
+        values.append(events["extension"][valid][by_period])
+
+    bounds = np.searchsorted(period, np.arange(first_period, last_period + 2), side="left")
+
+    by_asset = np.lexsort((pos, period))
+    group_start = np.ones(len(pos), dtype=bool)
+    group_start[1:] = (period[by_asset][1:] != period[by_asset][:-1]) | (pos[by_asset][1:] != pos[by_asset][:-1])
+    first = np.maximum.accumulate(np.where(group_start, np.arange(len(pos)), 0))
+    rank = np.empty(len(pos), dtype=np.int64)
+    rank[by_asset] = np.arange(len(pos)) - first
+
+    return pos, values, bounds, rank
+
+
+def _period_rounds(events, step, per_row):
+    # Event periode ke-step sebagai putaran [(posisi aset, [nilai, ...])];
+    # dalam satu putaran setiap aset muncul paling banyak sekali. Tanpa
+    # per_row: satu putaran berisi jumlah event per aset. Dengan per_row:
+    # putaran ke-r berisi baris event ke-r tiap aset (urutan input).
+    if events is None:
+        return []
+
+    pos, values, bounds, rank = events
+    lo, hi = bounds[step], bounds[step + 1]
+
+    if lo == hi:
+        return []
+
+    if per_row:
+        rank = rank[lo:hi]
+        return [
+            (pos[lo:hi][rank == r], [v[lo:hi][rank == r] for v in values])
+            for r in range(int(rank.max()) + 1)
+        ]
+
+    unique_pos, inverse = np.unique(pos[lo:hi], return_inverse=True)
+    sums = []
+
+    for v in values:
+        acc = np.zeros(len(unique_pos), dtype=v.dtype)
+        np.add.at(acc, inverse, v[lo:hi])
+        sums.append(acc)
+
+    return [(unique_pos, sums)]
+
+
+def depreciation_kernel(
+    initial_costs,
+    start_period,
+    end_period,
+    life_periods,
+    capitalizations=None,
+    corrections=None,
+    per_row_events=False,
+    clamp_corrections=True,
+    require_book_value=True,
+    stop_when_exhausted=False,
+    integer_money=False,
+    allocate=None,
+    progress_callback=None,
+    trace=None
+):
+    # initial_costs, start_period, life_periods: satu elemen per aset;
+    # start_period < 0 = aset tanpa jadwal. end_period: periode terakhir,
+    # skalar (sama untuk semua aset) atau per aset. capitalizations /
+    # corrections: hasil event_table (kapitalisasi wajib punya extension).
+    #
+    # Hasil: dict kolom datar (lihat KERNEL_MONEY_COLUMNS dan
+    # KERNEL_INT_COLUMNS, nilai uang belum dibulatkan) dengan "offsets":
+    # baris aset i ada di offsets[i]:offsets[i + 1], periode baris pertama =
+    # start_period[i] (lihat row_periods).
+    # allocate(name, length, dtype) membuat array kolom (default np.zeros),
+    # mis. untuk file memory-mapped; tidak bisa dipakai bersama
+    # stop_when_exhausted karena jadwal dipadatkan di RAM.
+    # trace: hook dari page.susuttrace.kernel_trace ({"positions", "record"});
+    # tiap periode record(periode, posisi aset, nilai kolom baris itu)
+    # dipanggil hanya untuk aset di "positions" yang sedang berjalan.
+    if allocate is not None and stop_when_exhausted:
+        raise ValueError("stop_when_exhausted tidak bisa dipakai dengan allocate.")
+
+    allocate = allocate or (lambda name, length, dtype: np.zeros(length, dtype=dtype))
+    money_dtype = np.int64 if integer_money else np.float64
+
+    initial_costs = np.asarray(initial_costs, dtype=money_dtype)
+    start_period = np.asarray(start_period, dtype=np.int64)
+    original_life = np.asarray(life_periods, dtype=np.int64)
+    n_assets = len(initial_costs)
+
+    uniform_end = np.ndim(end_period) == 0
+    end_period = np.broadcast_to(np.asarray(end_period, dtype=np.int64), (n_assets,))
+
+    has_schedule = (start_period >= 0) & (start_period <= end_period)
+
+    lengths = np.where(has_schedule, end_period - start_period + 1, 0)
+    offsets = np.zeros(n_assets + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    total_rows = int(offsets[-1])
+
+    # Urutkan aset aktif berdasarkan periode mulai: pada periode t, aset yang
+    # sudah berjalan selalu merupakan prefiks dari urutan ini.
+    active_assets = np.flatnonzero(has_schedule)
+    order = active_assets[np.argsort(start_period[active_assets], kind="stable")]
+    start_sorted = start_period[order]
+    end_sorted = end_period[order]
+    base_sorted = offsets[:-1][order]
+    life_sorted = original_life[order]
+
+    sorted_pos = np.full(n_assets, -1, dtype=np.int64)
+    sorted_pos[order] = np.arange(len(order))
+
+    book_value = initial_costs[order].copy()
+    remaining_life = life_sorted.copy()
+    accumulated = np.zeros(len(order), dtype=money_dtype)
+
+    if integer_money:
+        # Basis segmen per aset: nilai buku, sisa umur, periode berjalan
+        # sejak event terakhir
+        segment_base = book_value.copy()
+        segment_life = life_sorted.copy()
+        segment_done = np.zeros(len(order), dtype=np.int64)
+
+    out = {name: allocate(name, total_rows, money_dtype) for name in KERNEL_MONEY_COLUMNS}
+    out.update({name: allocate(name, total_rows, np.int64) for name in KERNEL_INT_COLUMNS})
+
+    first_period = int(start_sorted.min()) if len(order) else 0
+    last_period = int(end_sorted.max()) if len(order) else -1
+
+    cap_events = _group_events(
+        capitalizations, has_schedule, start_period, end_period, sorted_pos, first_period, last_period
+    )
+    corr_events = _group_events(
+        corrections, has_schedule, start_period, end_period, sorted_pos, first_period, last_period
+    )
+
+    total_periods = max(last_period - first_period + 1, 0)
+
+    if trace is not None:
+        traced = sorted_pos[np.asarray(trace["positions"], dtype=np.int64)]
+        traced = traced[traced >= 0]
+
+    for step, period in enumerate(range(first_period, last_period + 1)):
+        k = int(np.searchsorted(start_sorted, period, side="right"))
+        live = np.arange(k) if uniform_end else np.flatnonzero(end_sorted[:k] >= period)
+        row_pos = base_sorted[live] + (period - start_sorted[live])
+
+        touched = []
+
+        # Kolom kapitalisasi/koreksi = total periode; putaran pertama memuat
+        # semua aset yang punya event, putaran berikutnya menambah
+        for r, (p, (cap, ext)) in enumerate(_period_rounds(cap_events, step, per_row_events)):
+            rows = base_sorted[p] + (period - start_sorted[p])
+            book_value[p] += cap
+            remaining_life[p] = np.minimum(remaining_life[p] + ext, life_sorted[p])
+            out["kapitalisasi"][rows] = cap if r == 0 else out["kapitalisasi"][rows] + cap
+            out["tambahan_usia"][rows] = ext if r == 0 else out["tambahan_usia"][rows] + ext
+            touched.append(p)
+
+        for r, (p, (corr,)) in enumerate(_period_rounds(corr_events, step, per_row_events)):
+            rows = base_sorted[p] + (period - start_sorted[p])
+            after = book_value[p] - corr
+            book_value[p] = np.where(after < 0, 0, after) if clamp_corrections else after
+            out["koreksi"][rows] = corr if r == 0 else out["koreksi"][rows] + corr
+            touched.append(p)
+
+        if integer_money and touched:
+            p = np.concatenate(touched)
+            segment_base[p] = book_value[p]
+            segment_life[p] = remaining_life[p]
+            segment_done[p] = 0
+
+        depreciating = remaining_life[live] > 0
+
+        if require_book_value:
+            depreciating &= book_value[live] > 0
+
+        d = live[depreciating]
+
+        if len(d):
+            if integer_money:
+                done = segment_done[d] + 1
+                dep = (
+                    cumulative_sen(segment_base[d], segment_life[d], done)
+                    - cumulative_sen(segment_base[d], segment_life[d], done - 1)
+                )
+                segment_done[d] = done
+            else:
+                dep = book_value[d] / remaining_life[d]
+
+            accumulated[d] += dep
+            book_value[d] -= dep
+            remaining_life[d] -= 1
+            out["penyusutan"][base_sorted[d] + (period - start_sorted[d])] = dep
+
+        out["akumulasi"][row_pos] = accumulated[live]
+        out["nilai_buku"][row_pos] = book_value[live]
+        out["sisa_umur"][row_pos] = remaining_life[live]
+
+        if trace is not None:
+            t = traced[(start_sorted[traced] <= period) & (end_sorted[traced] >= period)]
+
+            if len(t):
+                rows = base_sorted[t] + (period - start_sorted[t])
+                trace["record"](period, order[t], {
+                    name: out[name][rows]
+                    for name in KERNEL_MONEY_COLUMNS + KERNEL_INT_COLUMNS
+                })
+
+        if progress_callback is not None:
+            progress_callback(step + 1, total_periods)
+
+    result = {"offsets": offsets, "start_period": np.where(has_schedule, start_period, -1)}
+    result.update(out)
+
+    if stop_when_exhausted:
+        result = _trim_exhausted(result, original_life)
+
+    return result
+
+
+def _trim_exhausted(result, original_life):
+    # Potong jadwal tiap aset sebelum periode pertama yang diawali sisa umur 0
+    offsets = result["offsets"]
+    lengths = np.diff(offsets)
+    row_asset = np.repeat(np.arange(len(lengths)), lengths)
+    is_first = np.zeros(len(row_asset), dtype=bool)
+    is_first[offsets[:-1][lengths > 0]] = True
+
+    life_before = np.empty(len(row_asset), dtype=np.int64)
+    life_before[1:] = result["sisa_umur"][:-1]
+    life_before[is_first] = original_life[row_asset[is_first]]
+
+    rows = np.arange(len(row_asset))
+    cut = offsets[1:].copy()
+    exhausted = np.flatnonzero(life_before <= 0)
+    np.minimum.at(cut, row_asset[exhausted], rows[exhausted])
+
+    keep = rows < cut[row_asset]
+    new_lengths = cut - offsets[:-1]
+    new_offsets = np.zeros_like(offsets)
+    np.cumsum(new_lengths, out=new_offsets[1:])
+
+    trimmed = {
+        name: values[keep]
+        for name, values in result.items()
+        if name not in ("offsets", "start_period")
+    }
+    trimmed["offsets"] = new_offsets
+    trimmed["start_period"] = np.where(new_lengths > 0, result["start_period"], -1)
+
+    return trimmed
+
+
+def row_periods(offsets, start_period, rows):
+    # Indeks periode untuk nomor baris jadwal kernel (rows: array int)
+    rows = np.asarray(rows, dtype=np.int64)
+    asset = np.searchsorted(offsets, rows, side="right") - 1
+    return start_period[asset] + (rows - offsets[asset])
+
+
+def kernel_schedule_records(result, granularity=PERIOD_ANNUAL):
+    # Jadwal per aset dalam format halaman tahunan/semesteran: list of dict
+    # {year[, semester], depreciation, accumulated, book_value, sisa_mm},
+    # uang dibulatkan 2 desimal. Hasil: list sejajar posisi aset.
+    offsets = result["offsets"]
+    periods = row_periods(offsets, result["start_period"], np.arange(int(offsets[-1])))
+    years, subs = period_parts(periods, granularity)
+
+    columns = {"year": years}
+
+    if granularity == PERIOD_SEMESTER:
+        columns["semester"] = subs
+    elif granularity == PERIOD_MONTHLY:
+        columns["month"] = subs
+
+    columns.update({
+        "depreciation": round_money(result["penyusutan"]),
+        "accumulated": round_money(result["akumulasi"]),
+        "book_value": round_money(result["nilai_buku"]),
+        "sisa_mm": result["sisa_umur"],
+    })
+
+    records = pd.DataFrame(columns).to_dict("records")
+
+    return [records[lo:hi] for lo, hi in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def kernel_last_values(result, column, default=0):
+    # Nilai baris terakhir tiap aset (default untuk aset tanpa jadwal)
+    offsets = result["offsets"]
+    has_rows = np.diff(offsets) > 0
+    values = np.full(len(has_rows), default, dtype=np.asarray(result[column]).dtype)
+    values[has_rows] = np.asarray(result[column])[offsets[1:][has_rows] - 1]
+    return values
@@ -0,0 +1,201 @@
+import os
+import csv
+import time
+from io import BytesIO, StringIO
+
+import pandas as pd
+
+
+# =========================================================
+# PEMBACAAN FILE REGISTER ASET (XLSX / XLSB / CSV / PARQUET)
+# =========================================================
+# Register entitas sering membawa puluhan kolom deskriptif yang tidak
+# dipakai perhitungan. Setiap tabel hanya dibaca pada kolom yang diminta
+# (column projection) dengan reader tercepat yang tersedia.
+
+SUPPORTED_EXTENSIONS = ["xlsx", "xlsb", "csv", "parquet"]
+
+CSV_DELIMITERS = ",;\t|"
+CSV_ENCODINGS = ["utf-8-sig", "cp1252"]
+
+# CSV ber-delimiter ";" adalah ekspor Excel berlocale Indonesia/Eropa:
+# angka memakai koma desimal dan titik pemisah ribuan (2.500.000,50)
+DECIMAL_COMMA_DELIMITERS = ";"
+
+
+def _has_module(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def file_extension(file_name):
+    return os.path.splitext(str(file_name or ""))[1].lower().lstrip(".")
+
+
+def excel_engine_for(extension):
+    # calamine (Rust) jauh lebih cepat daripada openpyxl/pyxlsb dan
+    # membaca xlsx maupun xlsb; dipakai jika paketnya terpasang.
+    if _has_module("python_calamine"):
+        return "calamine"
+
+    if extension == "xlsb":
+        return "pyxlsb"
+
+    return "openpyxl"
+
+
+def _column_picker(wanted, seen):
+    wanted = set(wanted)
+
+    def pick(column):
+        seen[column] = True
+        return str(column).strip() in wanted
+
+    return pick
+
+
+def _strip_columns(df):
+    df.columns = [str(col).strip() for col in df.columns]
+    return df
+
+
+def _sniff_delimiter(text):
+    sample = text[:65536]
+
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        first_line = sample.splitlines()[0] if sample else ""
+        return max(CSV_DELIMITERS, key=first_line.count)
+
+
+def _decode_text(file_bytes):
+    for encoding in CSV_ENCODINGS:
+        try:
+            return file_bytes.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+
+    return file_bytes.decode("latin-1")
+
+
+def _read_excel_tables(file_bytes, extension, table_columns, dtype_hints):
+    engine = excel_engine_for(extension)
+    excel_data = pd.ExcelFile(BytesIO(file_bytes), engine=engine)
+    sheet_names = excel_data.sheet_names
+
+    if len(sheet_names) < 1:
+        raise ValueError("File Excel tidak memiliki sheet yang dapat dibaca.")
+
+    tables = []
+    timings = []
+
+    for position, columns in enumerate(table_columns):
+        if position >= len(sheet_names):
+            tables.append(None)
+            continue
+
+        started = time.perf_counter()
+        seen = {}
+        df = excel_data.parse(
+            sheet_name=position,
+            usecols=_column_picker(columns, seen),
+            dtype={col: hint for col, hint in dtype_hints.items() if col in columns} or None
+        )
+        df = _strip_columns(df)
+
+        # Sheet ada isinya tetapi kolom wajib tidak lengkap: baca utuh agar
+        # validasi di tahap berikutnya melaporkan error yang sama seperti biasa
+        if seen and not set(columns).issubset(df.columns):
+            df = _strip_columns(excel_data.parse(sheet_name=position))
+
+        timings.append({
+            "Sheet": sheet_names[position],
+            "Baris": len(df),
+            "Kolom Dibaca": len(df.columns),
+            "Kolom di File": len(seen),
+            "Waktu (detik)": round(time.perf_counter() - started, 3),
+            "Reader": engine,
+        })
+        tables.append(df)
+
+    return tables, sheet_names, timings
+
+
+def _read_single_table(file_bytes, extension, file_name, columns, dtype_hints):
+    started = time.perf_counter()
+    seen = {}
+
+    if extension == "parquet":
+        import pyarrow.parquet as pq
+
+        source = BytesIO(file_bytes)
+        available = pq.read_schema(source).names
+        seen = dict.fromkeys(available, True)
+        picked = [col for col in available if str(col).strip() in set(columns)]
+
+        if set(columns).issubset(str(col).strip() for col in picked):
+            df = pd.read_parquet(BytesIO(file_bytes), columns=picked)
+        else:
+            df = pd.read_parquet(BytesIO(file_bytes))
+
+        reader = "pyarrow"
+    else:
+        text = _decode_text(file_bytes)
+        delimiter = _sniff_delimiter(text)
+        number_format = {}
+
+        if delimiter in DECIMAL_COMMA_DELIMITERS:
+            number_format = {"decimal": ",", "thousands": "."}
+
+        df = pd.read_csv(
+            StringIO(text),
+            sep=delimiter,
+            usecols=_column_picker(columns, seen),
+            dtype={col: hint for col, hint in dtype_hints.items() if col in columns} or None,
+            **number_format
+        )
+
+        if seen and not set(columns).issubset(str(col).strip() for col in df.columns):
+            df = pd.read_csv(StringIO(text), sep=delimiter, **number_format)
+
+        reader = f"csv ({delimiter!r})"
+
+    df = _strip_columns(df)
+
+    timing = {
+        "Sheet": os.path.basename(str(file_name)) or extension,
+        "Baris": len(df),
+        "Kolom Dibaca": len(df.columns),
+        "Kolom di File": len(seen),
+        "Waktu (detik)": round(time.perf_counter() - started, 3),
+        "Reader": reader,
+    }
+
+    return df, timing
+
+
+def read_register_tables(file_bytes, file_name, table_columns, dtype_hints=None):
+    # table_columns: daftar kolom per tabel sesuai urutan sheet
+    # (mis. [aset, kapitalisasi, koreksi]). CSV dan Parquet hanya berisi
+    # satu tabel sehingga tabel berikutnya dikembalikan None.
+    # Hasil: (tables, sheet_names, timings)
+    dtype_hints = dtype_hints or {}
+    extension = file_extension(file_name) or "xlsx"
+
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(
+            f"Format file .{extension} tidak didukung. "
+            f"Gunakan: {', '.join('.' + ext for ext in SUPPORTED_EXTENSIONS)}."
+        )
+
+    if extension in ("xlsx", "xlsb"):
+        return _read_excel_tables(file_bytes, extension, table_columns, dtype_hints)
+
+    df, timing = _read_single_table(file_bytes, extension, file_name, table_columns[0], dtype_hints)
+    tables = [df] + [None] * (len(table_columns) - 1)
+
+    return tables, [timing["Sheet"]], [timing]
@@ -0,0 +1,206 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+# =========================================================
+# JOB LATAR BELAKANG (PROSES PANJANG DI LUAR THREAD SCRIPT)
+# =========================================================
+# Streamlit menjalankan ulang script setiap ada interaksi widget; proses
+# batch yang panjang di thread script ikut terhenti/terulang. Job di sini
+# berjalan di thread pekerja milik proses server, sehingga:
+#   - rerun halaman cukup membaca status job (polling), tidak menghitung ulang;
+#   - tab browser yang ditutup tidak menghentikan job, hasil tetap bisa
+#     diambil dengan ID job yang sama (atau kunci file, lihat find_job);
+#   - job bisa dibatalkan: fungsi job memanggil report_progress/check_cancelled
+#     dan JobCancelled dilempar di titik pemeriksaan berikutnya.
+#
+# Registry bersifat global per proses server dan tidak disimpan ke disk.
+
+JOB_WORKERS = 2
+# Job selesai dihapus dari registry setelah waktu ini (detik)
+JOB_TTL_SECONDS = 3600
+
+STATUS_WAITING = "menunggu"
+STATUS_RUNNING = "berjalan"
+STATUS_DONE = "selesai"
+STATUS_FAILED = "gagal"
+STATUS_CANCELLED = "dibatalkan"
+FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+_executor = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _get_executor():
+    global _executor
+
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="auditapp-job")
+
+        return _executor
+
+
+def _update(job, **fields):
+    with _jobs_lock:
+        job.update(fields)
+
+
+def check_cancelled(job):
+    if job["cancel_event"].is_set():
+        raise JobCancelled()
+
+
+def report_progress(job, percent, text=None):
+    # Dipanggil dari fungsi job; sekaligus titik pemeriksaan pembatalan
+    check_cancelled(job)
+
+    fields = {"progress": max(0, min(100, int(percent)))}
+
+    if text is not None:
+        fields["message"] = text
+
+    _update(job, **fields)
+
+
+def set_partial_result(job, key, value):
+    # Hasil antara (mis. hasil hitung sebelum export) yang sudah bisa dibaca
+    with _jobs_lock:
+        job["partial"][key] = value
+
+
+def _run(job, func, args, kwargs):
+    if job["cancel_event"].is_set():
+        _update(job, status=STATUS_CANCELLED, finished=time.time(), message="Dibatalkan sebelum dimulai.")
+        return
+
+    _update(job, status=STATUS_RUNNING, started=time.time())
+
+    try:
+        result = func(job, *args, **kwargs)
+    except JobCancelled:
+        _update(job, status=STATUS_CANCELLED, finished=time.time(), message="Job dibatalkan.")
+    except Exception as e:
+        _update(
+            job,
+            status=STATUS_FAILED,
+            finished=time.time(),
+            error=f"{type(e).__name__}: {e}",
+            traceback=traceback.format_exc(),
+        )
+    else:
+        _update(job, status=STATUS_DONE, finished=time.time(), progress=100, result=result)
+
+
+def submit_job(kind, func, *args, job_key=None, **kwargs):
+    # func(job, *args, **kwargs) dijalankan di thread pekerja. job_key
+    # (opsional) dipakai find_job untuk menyambung ke job yang sama dari
+    # sesi/tab lain. Hasil: ID job.
+    cleanup_jobs()
+
+    job_id = uuid.uuid4().hex[:12]
+    job = {
+        "id": job_id,
+        "kind": kind,
+        "key": job_key,
+        "status": STATUS_WAITING,
+        "progress": 0,
+        "message": "Menunggu giliran...",
+        "partial": {},
+        "result": None,
+        "error": None,
+        "traceback": None,
+        "created": time.time(),
+        "started": None,
+        "finished": None,
+        "cancel_event": threading.Event(),
+    }
+
+    with _jobs_lock:
+        _jobs[job_id] = job
+
+    _get_executor().submit(_run, job, func, args, kwargs)
+
+    return job_id
+
+
+def get_job(job_id):
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def job_status(job_id):
+    # Salinan ringkas untuk ditampilkan (tanpa hasil)
+    job = get_job(job_id)
+
+    if job is None:
+        return None
+
+    with _jobs_lock:
+        elapsed_end = job["finished"] or time.time()
+
+        return {
+            "id": job["id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "progress": job["progress"],
+            "message": job["message"],
+            "error": job["error"],
+            "elapsed": round(elapsed_end - (job["started"] or elapsed_end), 1),
+            "finished": job["status"] in FINISHED_STATUSES,
+        }
+
+
+def find_job(kind, job_key, active_only=True):
+    with _jobs_lock:
+        candidates = [
+            job for job in _jobs.values()
+            if job["kind"] == kind
+            and job["key"] == job_key
+            and (not active_only or job["status"] not in FINISHED_STATUSES)
+        ]
+
+    if not candidates:
+        return None
+
+    return max(candidates, key=lambda job: job["created"])["id"]
+
+
+def cancel_job(job_id):
+    job = get_job(job_id)
+
+    if job is None or job["status"] in FINISHED_STATUSES:
+        return False
+
+    job["cancel_event"].set()
+    _update(job, message="Membatalkan...")
+
+    return True
+
+
+def discard_job(job_id):
+    with _jobs_lock:
+        return _jobs.pop(job_id, None)
+
+
+def cleanup_jobs(ttl_seconds=JOB_TTL_SECONDS):
+    now = time.time()
+
+    with _jobs_lock:
+        expired = [
+            job_id for job_id, job in _jobs.items()
+            if job["finished"] is not None and now - job["finished"] > ttl_seconds
+        ]
+
+        for job_id in expired:
+            del _jobs[job_id]
+
+    return expired
@@ -0,0 +1,148 @@
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# =========================================================
+# INSTRUMENTASI PERFORMA (WAKTU, CPU, MEMORI PER TAHAP)
+# =========================================================
+# profiler = None berarti instrumentasi mati: profile_stage hanya yield,
+# sehingga biaya saat tidak dipakai praktis nol. Saat aktif, memori puncak per tahap
+# diukur dengan tracemalloc (alokasi Python + NumPy) ditambah RSS puncak
+# proses dari sistem operasi.
+
+BYTES_PER_MB = 1024 * 1024
+
+STAGE_COLUMNS = [
+    "Tahap",
+    "Waktu (detik)",
+    "CPU (detik)",
+    "Memori Puncak Tahap (MB)",
+    "RSS Puncak Proses (MB)",
+]
+
+
+# Jumlah aset terbesar yang ditampilkan di panel Performa / Reviu Hasil
+LARGEST_ASSET_COUNT = 10
+
+
+def new_profiler(enabled=True):
+    if not enabled:
+        return None
+
+    return {
+        "stages": [],
+        "stack": [],
+        "started_tracing": False,
+    }
+
+
+def _process_peak_rss_mb():
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: KB di Linux, byte di macOS
+    return round(peak / (BYTES_PER_MB if sys.platform == "darwin" else 1024), 1)
+
+
+def begin_stage(profiler, name):
+    # Pasangan begin_stage/end_stage untuk blok yang tidak praktis dibungkus
+    # "with"; tahap boleh bersarang (tahap anak tampil menjorok).
+    if profiler is None:
+        return
+
+    if not profiler["stack"] and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        profiler["started_tracing"] = True
+
+    current, peak = tracemalloc.get_traced_memory()
+
+    if profiler["stack"]:
+        # Simpan puncak tahap induk sebelum direset untuk tahap anak
+        parent = profiler["stack"][-1]
+        parent["peak"] = max(parent["peak"], peak)
+
+    tracemalloc.reset_peak()
+
+    profiler["stack"].append({
+        "name": name,
+        "base": current,
+        "peak": current,
+        "wall": time.perf_counter(),
+        "cpu": time.process_time(),
+        "index": len(profiler["stages"]),
+    })
+    # Posisi dicadangkan agar tahap induk tampil sebelum tahap anaknya
+    profiler["stages"].append(None)
+
+
+def end_stage(profiler):
+    if profiler is None or not profiler["stack"]:
+        return
+
+    frame = profiler["stack"].pop()
+    _, peak = tracemalloc.get_traced_memory()
+    peak = max(frame["peak"], peak)
+
+    depth = len(profiler["stack"])
+    profiler["stages"][frame["index"]] = {
+        "Tahap": ("    " * depth) + frame["name"],
+        "Waktu (detik)": round(time.perf_counter() - frame["wall"], 4),
+        "CPU (detik)": round(time.process_time() - frame["cpu"], 4),
+        "Memori Puncak Tahap (MB)": round((peak - frame["base"]) / BYTES_PER_MB, 2),
+        "RSS Puncak Proses (MB)": _process_peak_rss_mb(),
+    }
+
+    if profiler["stack"]:
+        parent = profiler["stack"][-1]
+        parent["peak"] = max(parent["peak"], peak)
+    elif profiler["started_tracing"]:
+        tracemalloc.stop()
+        profiler["started_tracing"] = False
+
+
+@contextmanager
+def profile_stage(profiler, name):
+    if profiler is None:
+        yield
+        return
+
+    begin_stage(profiler, name)
+
+    try:
+        yield
+    finally:
+        end_stage(profiler)
+
+
+def stage_rows(profiler):
+    if profiler is None:
+        return []
+
+    return [stage for stage in profiler["stages"] if stage is not None]
+
+
+def largest_asset_rows(keys, row_counts, n=LARGEST_ASSET_COUNT, key_label="Kode Aset", count_label="Baris Jadwal"):
+    # Mesin dihitung per blok vektor sehingga waktu per aset tidak bisa
+    # diukur; sebagai gantinya dilaporkan N aset dengan baris jadwal
+    # terbanyak, yaitu aset yang paling membebani hitung dan export.
+    counts = np.asarray(row_counts, dtype=np.int64)
+    n = min(n, len(counts))
+
+    if n <= 0:
+        return []
+
+    top = np.argpartition(-counts, n - 1)[:n]
+    # Urut dari yang terbesar; seri mengikuti urutan register
+    top = top[np.lexsort((top, -counts[top]))]
+
+    return [{key_label: keys[i], count_label: int(counts[i])} for i in top]
@@ -1,110 +1,68 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
 from io import BytesIO
 
-# Fungsi Helper: Konversi Tanggal ke Semester
-def convert_date_to_semester(date_str):
-    try:
-        date = datetime.strptime(date_str, "%d/%m/%Y")
-    except ValueError:
-        raise ValueError(f"Tanggal tidak valid: {date_str}")
-    year = date.year
-    month = date.month
-    semester = 1 if 1 <= month <= 6 else 2
-    return (year, semester)
-
-# Fungsi Helper: Menghitung Depresiasi Semesteran (Logika dari Referensi)
+import numpy as np
+
+from page.susutcore import (
+    PERIOD_SEMESTER,
+    depreciation_kernel,
+    kernel_last_values,
+    kernel_schedule_records,
+    parse_date_cells,
+    register_event_tables,
+    round_money,
+    semester_periods,
+    whole_periods,
+)
+from page.susuttrace import (
+    TRACE_FORMAT_BINARY,
+    TRACE_FORMAT_JSONL,
+    kernel_trace,
+    new_tracer,
+    parse_trace_codes,
+    trace_bytes,
+    trace_frame,
+)
+
+# Fungsi Helper: Menghitung Depresiasi Semesteran di kernel bersama page.susutcore
+# (Logika dari Referensi: kapitalisasi/koreksi diterapkan baris demi baris,
+# semester dengan nilai buku 0 tidak disusutkan dan sisa masa manfaatnya
+# tidak berkurang). tracer: lihat page.susuttrace (None = trace mati)
+def compute_schedules(initial_costs, acquisition_dates, useful_lives, reporting_dates, asset_names, capitalizations_df, corrections_df, tracer=None):
+    acquisition_periods = whole_periods(semester_periods(acquisition_dates), "Tanggal Perolehan")
+    reporting_periods = whole_periods(semester_periods(reporting_dates), "Tanggal Pelaporan")
+    useful_lives = whole_periods(useful_lives, "Masa Manfaat (tahun)")
+    cap_events, corr_events = register_event_tables(
+        capitalizations_df, corrections_df, "Nama Aset", asset_names,
+        semester_periods(capitalizations_df["Tanggal"]),
+        semester_periods(corrections_df["Tanggal"]),
+        PERIOD_SEMESTER
+    )
+    return depreciation_kernel(
+        np.asarray(initial_costs, dtype=float),
+        acquisition_periods,
+        reporting_periods,
+        useful_lives * 2,
+        capitalizations=cap_events,
+        corrections=corr_events,
+        per_row_events=True,
+        clamp_corrections=True,
+        require_book_value=True,
+        trace=kernel_trace(tracer, asset_names, "semesteran", PERIOD_SEMESTER)
+    )
+
 def calculate_depreciation(initial_cost, acquisition_date, useful_life, reporting_date, capitalizations=None, corrections=None):
     if capitalizations is None:
         capitalizations = []
     if corrections is None:
         corrections = []
-
-    # Konversi masa manfaat awal ke semester
-    useful_life_semesters = useful_life * 2
-    remaining_life = useful_life_semesters
-    original_life = useful_life_semesters  # Simpan masa manfaat awal sebagai referensi
-
-    # Organisasi data kapitalisasi dan koreksi berdasarkan tanggal
-    cap_dict = {}
-    for cap in capitalizations:
-        key = convert_date_to_semester(cap["Tanggal"])
-        cap_dict.setdefault(key, []).append(cap)
-
-    corr_dict = {}
-    for corr in corrections:
-        key = convert_date_to_semester(corr["Tanggal"])
-        corr_dict.setdefault(key, []).append(corr)
-
-    # Inisialisasi variabel untuk perhitungan
-    book_value = initial_cost
-    current_year, current_semester = convert_date_to_semester(acquisition_date)
-    reporting_year, reporting_semester = convert_date_to_semester(reporting_date)
-    accumulated_dep = 0
-    schedule = []
-
-    # Loop untuk menghitung depresiasi setiap semester
-    while (current_year < reporting_year) or (current_year == reporting_year and current_semester <= reporting_semester):
-        key = (current_year, current_semester)
-
-        # Proses kapitalisasi
-        if key in cap_dict:
-            for cap in cap_dict[key]:
-                book_value += cap.get("Jumlah", 0)  # Tambahkan nilai kapitalisasi ke nilai buku
-                life_extension = cap.get("Tambahan Usia", 0) * 2  # Konversi tambahan usia ke semester
-                remaining_life = min(remaining_life + life_extension, original_life)  # Batasi sisa masa manfaat
-
-        # Proses koreksi
-        if key in corr_dict:
-            for corr in corr_dict[key]:
-                correction_amount = corr.get("Jumlah", 0)
-                book_value = max(book_value - correction_amount, 0)  # Pastikan nilai buku tidak negatif
-
-        # Hitung depresiasi semester ini
-        if remaining_life > 0 and book_value > 0:
-            dep_per_semester = book_value / remaining_life  # Hitung depresiasi berdasarkan nilai buku dan sisa masa manfaat
-            accumulated_dep += dep_per_semester
-            book_value -= dep_per_semester
-            remaining_life -= 1
-        else:
-            dep_per_semester = 0
-
-        # Simpan hasil perhitungan untuk semester ini
-        schedule.append({
-            "year": current_year,
-            "semester": current_semester,
-            "depreciation": round(dep_per_semester, 2),
-            "accumulated": round(accumulated_dep, 2),
-            "book_value": round(book_value, 2),
-            "sisa_mm": remaining_life,
-        })
-
-        # Pindah ke semester berikutnya
-        if current_semester == 1:
-            current_semester = 2
-        else:
-            current_semester = 1
-            current_year += 1
-
-    return schedule
-
-# Fungsi Helper: Memastikan Format Tanggal
-def ensure_date_format(date_value):
-    if isinstance(date_value, pd.Timestamp):  # Jika tipe data adalah Timestamp
-        return date_value.strftime("%d/%m/%Y")  # Konversi ke string dengan format DD/MM/YYYY
-    elif isinstance(date_value, str):  # Jika tipe data sudah string
-        try:
-            parsed_date = datetime.strptime(date_value, "%m/%d/%y")  # Format MM/DD/YY
-            return parsed_date.strftime("%d/%m/%Y")  # Ubah ke DD/MM/YYYY
-        except ValueError:
-            try:
-                parsed_date = datetime.strptime(date_value, "%d/%m/%Y")  # Format DD/MM/YYYY
-                return parsed_date.strftime("%d/%m/%Y")
-            except ValueError:
-                raise ValueError(f"Format tanggal tidak valid: {date_value}")
-    else:
-        raise ValueError(f"Tipe data tanggal tidak valid: {type(date_value)}")
+    schedule = compute_schedules(
+        [initial_cost], [acquisition_date], [useful_life], [reporting_date], [""],
+        pd.DataFrame(capitalizations, columns=["Tanggal", "Jumlah", "Tambahan Usia"]).assign(**{"Nama Aset": ""}),
+        pd.DataFrame(corrections, columns=["Tanggal", "Jumlah"]).assign(**{"Nama Aset": ""})
+    )
+    return kernel_schedule_records(schedule, PERIOD_SEMESTER)[0]
 
 # Fungsi Helper: Konversi DataFrame ke Excel dengan Beberapa Sheet
 def convert_df_to_excel_with_sheets(results, schedules):
@@ -135,8 +93,16 @@ def app():
     if st.button("⬇️ Download Template Excel"):
         st.markdown("[Download](https://docs.google.com/spreadsheets/d/1b4bueqvZ0vDn7DtKgNK-uVQojLGMM8vQ/edit?usp=drive_link)")
 
+    trace_codes = st.text_input(
+        "Lacak aset (trace)",
+        value="",
+        help="Nama Aset yang dicatat per semester, pisahkan dengan koma atau titik koma. Kosongkan untuk mematikan trace.",
+        key=f"{__name__}_trace"
+    )
+
     uploaded_file = st.file_uploader("📤 Unggah File Excel", type=["xlsx"])
     if uploaded_file is not None:
+        tracer = new_tracer(parse_trace_codes(trace_codes))
         try:
             excel_data = pd.ExcelFile(uploaded_file)
             
@@ -170,47 +136,44 @@ def app():
             assets_df["Masa Manfaat (tahun)"] = pd.to_numeric(assets_df["Masa Manfaat (tahun)"], errors="coerce")
             
             # Konversi tanggal
-            assets_df["Tanggal Perolehan"] = assets_df["Tanggal Perolehan"].apply(ensure_date_format)
-            assets_df["Tanggal Pelaporan"] = assets_df["Tanggal Pelaporan"].apply(ensure_date_format)
+            assets_df["Tanggal Perolehan"] = parse_date_cells(assets_df["Tanggal Perolehan"])
+            assets_df["Tanggal Pelaporan"] = parse_date_cells(assets_df["Tanggal Pelaporan"])
 
             # Proses tanggal di Sheet 2: Kapitalisasi
             capitalizations_df.rename(columns={"Tahun": "Tanggal"}, inplace=True)
-            capitalizations_df["Tanggal"] = capitalizations_df["Tanggal"].apply(ensure_date_format)
+            capitalizations_df["Tanggal"] = parse_date_cells(capitalizations_df["Tanggal"])
             capitalizations_df["Jumlah"] = pd.to_numeric(
                 capitalizations_df["Jumlah"].astype(str).str.replace(",", ""), errors="coerce"
             )
 
             # Proses tanggal di Sheet 3: Koreksi
             corrections_df.rename(columns={"Tahun": "Tanggal"}, inplace=True)
-            corrections_df["Tanggal"] = corrections_df["Tanggal"].apply(ensure_date_format)
+            corrections_df["Tanggal"] = parse_date_cells(corrections_df["Tanggal"])
             corrections_df["Jumlah"] = pd.to_numeric(
                 corrections_df["Jumlah"].astype(str).str.replace(",", ""), errors="coerce"
             )
 
-            results = []
-            schedules = {}
-            for _, asset in assets_df.iterrows():
-                asset_name = str(asset["Nama Aset"])
-                initial_cost = asset["Harga Perolehan Awal (Rp)"]
-                acquisition_date = asset["Tanggal Perolehan"]
-                useful_life = int(asset["Masa Manfaat (tahun)"])
-                reporting_date = asset["Tanggal Pelaporan"]
-
-                asset_caps = capitalizations_df[capitalizations_df["Nama Aset"] == asset_name].to_dict("records")
-                asset_corrs = corrections_df[corrections_df["Nama Aset"] == asset_name].to_dict("records")
-
-                schedule = calculate_depreciation(
-                    initial_cost, acquisition_date, useful_life, reporting_date, asset_caps, asset_corrs
-                )
-
-                results.append({
-                    "Nama Aset": asset_name,
-                    "Tanggal Pelaporan": reporting_date,
-                    "Penyusutan": schedule[-1]["depreciation"] if schedule else 0,
-                    "Akumulasi": schedule[-1]["accumulated"] if schedule else 0,
-                    "Nilai Buku": schedule[-1]["book_value"] if schedule else 0,
-                })
-                schedules[asset_name] = schedule
+            # Seluruh aset dihitung sekaligus; kapitalisasi/koreksi dipetakan lewat Nama Aset
+            asset_names = assets_df["Nama Aset"].astype(str).tolist()
+            schedule = compute_schedules(
+                assets_df["Harga Perolehan Awal (Rp)"].to_numpy(dtype=float),
+                assets_df["Tanggal Perolehan"],
+                assets_df["Masa Manfaat (tahun)"].to_numpy(dtype=float),
+                assets_df["Tanggal Pelaporan"],
+                asset_names,
+                capitalizations_df,
+                corrections_df,
+                tracer=tracer
+            )
+
+            results = pd.DataFrame({
+                "Nama Aset": asset_names,
+                "Tanggal Pelaporan": assets_df["Tanggal Pelaporan"].dt.strftime("%d/%m/%Y").tolist(),
+                "Penyusutan": round_money(kernel_last_values(schedule, "penyusutan")),
+                "Akumulasi": round_money(kernel_last_values(schedule, "akumulasi")),
+                "Nilai Buku": round_money(kernel_last_values(schedule, "nilai_buku")),
+            }).to_dict("records")
+            schedules = dict(zip(asset_names, kernel_schedule_records(schedule, PERIOD_SEMESTER)))
 
             results_df = pd.DataFrame(results)
             st.dataframe(results_df.style.format({
@@ -227,6 +190,12 @@ def app():
                 "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
             )
 
+            if tracer is not None:
+                with st.expander("🔎 Trace Aset", expanded=False):
+                    st.dataframe(trace_frame(tracer), use_container_width=True, hide_index=True)
+                    st.download_button("📥 Download Trace (JSONL)", trace_bytes(tracer, TRACE_FORMAT_JSONL), "trace_penyusutan.jsonl", "application/x-ndjson")
+                    st.download_button("📥 Download Trace (biner .npz)", trace_bytes(tracer, TRACE_FORMAT_BINARY), "trace_penyusutan.npz", "application/octet-stream")
+
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
 
@@ -0,0 +1,126 @@
+import os
+import time
+import shutil
+import weakref
+import tempfile
+
+import numpy as np
+
+
+# =========================================================
+# PENYIMPANAN JADWAL DI DISK (MEMORY-MAPPED)
+# =========================================================
+# Register sangat besar (ratusan ribu aset x ratusan bulan) tidak muat di
+# RAM worker Streamlit. Array jadwal per kolom ditulis sebagai file .npy
+# memory-mapped di satu folder per proses hitung; numpy membaca/menulis
+# irisan sesuai kebutuhan dan halaman yang tidak dipakai bisa dilepas OS,
+# sehingga memori anonim proses tetap datar saat register membesar.
+#
+# Folder dihapus:
+#   - saat store yang memakainya tidak lagi direferensikan (mis. sesi
+#     Streamlit berakhir atau hasil diganti proses baru), lewat
+#     weakref.finalize pada fungsi "release";
+#   - oleh cleanup_spill_dirs untuk folder yatim (server mati mendadak) yang
+#     tidak disentuh lebih dari SPILL_TTL_SECONDS.
+# Di Linux/macOS file yang sudah di-map tetap bisa dibaca walau folder
+# terhapus, jadi pembersihan TTL tidak merusak sesi yang masih berjalan.
+#
+# Folder bisa berpindah pemilik antar proses (blok mode paralel):
+# detach_spill_dir di proses worker, adopt_spill_dir di proses utama.
+
+SPILL_DIR = os.environ.get(
+    "AUDITAPP_SPILL_DIR",
+    os.path.join(tempfile.gettempdir(), "auditapp_spill")
+)
+SPILL_TTL_SECONDS = float(os.environ.get("AUDITAPP_SPILL_TTL_SECONDS", str(6 * 3600)))
+
+
+def create_spill_dir(prefix="jadwal_"):
+    cleanup_spill_dirs()
+    os.makedirs(SPILL_DIR, exist_ok=True)
+
+    return adopt_spill_dir(tempfile.mkdtemp(prefix=prefix, dir=SPILL_DIR))
+
+
+def adopt_spill_dir(path):
+    # Folder yang sudah ada menjadi milik proses ini
+    finalizer = None
+
+    def release():
+        finalizer()
+
+    # Folder ikut terhapus ketika "release" (disimpan di store) dibuang GC
+    finalizer = weakref.finalize(release, shutil.rmtree, path, True)
+
+    return {"path": path, "release": release, "detach": finalizer.detach}
+
+
+def detach_spill_dir(spill):
+    # Lepas kepemilikan agar folder tidak terhapus saat proses ini membuang
+    # store-nya; hasil bisa di-pickle dan diteruskan ke adopt_spill_dir
+    spill["detach"]()
+    return {"path": spill["path"]}
+
+
+def borrow_spill_dir(path):
+    # Folder milik pihak lain (mis. entri cache): tidak pernah dihapus dari sini
+    return {"path": path, "release": lambda: None, "detach": lambda: None}
+
+
+def spill_allocate(spill, name, length, dtype):
+    # Array 1 dimensi berisi nol, di-map dari file <path>/<name>.npy
+    return np.lib.format.open_memmap(
+        os.path.join(spill["path"], f"{name}.npy"),
+        mode="w+",
+        dtype=dtype,
+        shape=(int(length),)
+    )
+
+
+def spill_open(spill, name):
+    # Buka kembali file kolom <path>/<name>.npy (hanya baca, memory-mapped)
+    return np.load(os.path.join(spill["path"], f"{name}.npy"), mmap_mode="r")
+
+
+def spill_discard(spill, name):
+    # Hapus file kerja yang sudah tidak dibutuhkan (memmap-nya harus sudah dilepas)
+    try:
+        os.remove(os.path.join(spill["path"], f"{name}.npy"))
+    except OSError:
+        pass
+
+
+def touch_spill_dir(spill):
+    # Tandai masih dipakai agar tidak dianggap yatim oleh cleanup_spill_dirs
+    if spill is not None and os.path.isdir(spill["path"]):
+        os.utime(spill["path"], None)
+
+
+def release_spill_dir(spill):
+    if spill is not None:
+        spill["release"]()
+
+
+def cleanup_spill_dirs(ttl_seconds=None, spill_dir=None):
+    ttl_seconds = SPILL_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    root = spill_dir or SPILL_DIR
+
+    if not os.path.isdir(root):
+        return []
+
+    now = time.time()
+    removed = []
+
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+
+        try:
+            expired = os.path.isdir(path) and now - os.path.getmtime(path) > ttl_seconds
+        except OSError:
+            continue
+
+        if expired:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+
+    return removed
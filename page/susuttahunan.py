@@ -2,6 +2,27 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 
+import numpy as np
+
+from page.susutcore import (
+    PERIOD_ANNUAL,
+    depreciation_kernel,
+    event_table,
+    kernel_schedule_records,
+    period_index,
+)
+from page.susuttrace import (
+    TRACE_FORMAT_BINARY,
+    TRACE_FORMAT_JSONL,
+    kernel_trace,
+    new_tracer,
+    trace_bytes,
+    trace_frame,
+)
+
+# Kode aset tunggal halaman ini di trace (page.susuttrace)
+TRACE_ASSET_CODE = "Aset"
+
 # Fungsi-fungsi helper
 def delete_capitalization(index):
     st.session_state.capitalizations.pop(index)
@@ -15,60 +36,42 @@ def delete_correction(index):
 def edit_correction(index):
     st.session_state.editing_corr_index = index
 
-def calculate_depreciation(initial_cost, acquisition_year, useful_life, reporting_year, capitalizations=None, corrections=None):  
+def calculate_depreciation(initial_cost, acquisition_year, useful_life, reporting_year, capitalizations=None, corrections=None, tracer=None):  
     if capitalizations is None:
         capitalizations = []
     if corrections is None:
         corrections = []
-    # Organize capitalizations by year
-    cap_dict = {}
-    for cap in capitalizations:
-        year = cap['year']
-        cap_dict.setdefault(year, []).append(cap)
-    # Organize corrections by year
-    corr_dict = {}
-    for corr in corrections:
-        year = corr['year']
-        corr_dict.setdefault(year, []).append(corr)
-    # Initialize variables
-    book_value = initial_cost
-    remaining_life = useful_life
-    current_year = acquisition_year
-    original_life = useful_life
-    accumulated_dep = 0
-    schedule = []
-    # Calculate yearly depreciation
-    while remaining_life > 0 and current_year <= reporting_year:
-        # Process capitalizations
-        if current_year in cap_dict:
-            for cap in cap_dict[current_year]:
-                if cap['year'] > reporting_year:
-                    continue
-                book_value += cap['amount']
-                life_extension = cap.get('life_extension', 0)
-                remaining_life = min(remaining_life + life_extension, original_life)
-        # Process corrections
-        if current_year in corr_dict:
-            for corr in corr_dict[current_year]:
-                if corr['year'] > reporting_year:
-                    continue
-                book_value -= corr['amount']
-        # Calculate annual depreciation
-        annual_dep = book_value / remaining_life if remaining_life > 0 else 0
-        accumulated_dep += annual_dep
-        # Add to schedule
-        schedule.append({
-            'year': current_year,
-            'depreciation': round(annual_dep, 2),
-            'accumulated': round(accumulated_dep, 2),
-            'book_value': round(book_value - annual_dep, 2),
-            'sisa_mm': remaining_life - 1
-        })
-        # Update values for next year
-        book_value -= annual_dep
-        remaining_life -= 1
-        current_year += 1
-    return schedule
+    # Kapitalisasi/koreksi dari session state -> tabel event kernel (satu aset, periode = tahun)
+    cap_df = pd.DataFrame(capitalizations, columns=['year', 'amount', 'life_extension'])
+    corr_df = pd.DataFrame(corrections, columns=['year', 'amount'])
+    cap_events = event_table(
+        np.zeros(len(cap_df), dtype=np.int64),
+        cap_df['year'].to_numpy(dtype=float),
+        cap_df['amount'].to_numpy(dtype=float),
+        cap_df['life_extension'].fillna(0).to_numpy(dtype=np.int64)
+    )
+    corr_events = event_table(
+        np.zeros(len(corr_df), dtype=np.int64),
+        corr_df['year'].to_numpy(dtype=float),
+        corr_df['amount'].to_numpy(dtype=float)
+    )
+    # Aturan halaman ini: kapitalisasi/koreksi diterapkan baris demi baris,
+    # jadwal berhenti saat masa manfaat habis, dan koreksi boleh membuat
+    # nilai buku negatif
+    schedule = depreciation_kernel(
+        [initial_cost],
+        period_index([acquisition_year], granularity=PERIOD_ANNUAL),
+        period_index(reporting_year, granularity=PERIOD_ANNUAL),
+        [useful_life],
+        capitalizations=cap_events,
+        corrections=corr_events,
+        per_row_events=True,
+        clamp_corrections=False,
+        require_book_value=False,
+        stop_when_exhausted=True,
+        trace=kernel_trace(tracer, [TRACE_ASSET_CODE], "tahunan", PERIOD_ANNUAL)
+    )
+    return kernel_schedule_records(schedule, PERIOD_ANNUAL)[0]
 
 def convert_df_to_excel(df):
     import io
@@ -277,6 +280,12 @@ def app():
             st.info("Tidak ada data koreksi")
 
     # Calculation and Results
+    trace_mode = st.checkbox(
+        "Lacak perhitungan (trace)",
+        value=False,
+        help="Mencatat kapitalisasi, koreksi, tambahan usia dan sisa masa manfaat per tahun untuk diunduh.",
+        key="tahunan_trace"
+    )
     if st.button("🚀 Hitung Penyusutan", use_container_width=True):
         error_messages = []
         # Basic validations
@@ -289,15 +298,18 @@ def app():
                 st.error(msg)
         else:
             try:
+                tracer = new_tracer([TRACE_ASSET_CODE] if trace_mode else None)
                 schedule = calculate_depreciation(
                     initial_cost=initial_cost,
                     acquisition_year=acquisition_year,
                     useful_life=useful_life,
                     reporting_year=reporting_year,
                     capitalizations=st.session_state.capitalizations,
-                    corrections=st.session_state.corrections
+                    corrections=st.session_state.corrections,
+                    tracer=tracer
                 )
                 st.session_state.schedule = schedule
+                st.session_state.tahunan_tracer = tracer
 
                 # Format hasil untuk tampilan
                 df = pd.DataFrame(schedule)
@@ -338,6 +350,13 @@ def app():
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
 
+    tracer = st.session_state.get("tahunan_tracer")
+    if tracer is not None:
+        with st.expander("🔎 Trace Perhitungan", expanded=False):
+            st.dataframe(trace_frame(tracer), use_container_width=True, hide_index=True)
+            st.download_button("📥 Download Trace (JSONL)", trace_bytes(tracer, TRACE_FORMAT_JSONL), "trace_penyusutan.jsonl", "application/x-ndjson")
+            st.download_button("📥 Download Trace (biner .npz)", trace_bytes(tracer, TRACE_FORMAT_BINARY), "trace_penyusutan.npz", "application/octet-stream")
+
 # Tombol Reset
     action_col1, action_col2 = st.columns([1, 3])
     with action_col1:
@@ -0,0 +1,123 @@
+import json
+import re
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from page.susutcore import KERNEL_INT_COLUMNS, KERNEL_MONEY_COLUMNS, period_parts
+
+
+# =========================================================
+# TRACE PER PERIODE UNTUK ASET TERTENTU
+# =========================================================
+# Pengganti print per tahun per aset: tracer = None berarti trace mati dan
+# kernel tidak mengerjakan apa pun tambahan. Saat aktif, hanya aset yang
+# kodenya dipilih yang dicatat (satu baris per aset x periode: event,
+# penyusutan, akumulasi, nilai buku, sisa umur) dan hasilnya ditulis ke
+# JSONL (satu objek per baris, mis. dibaca pd.read_json(lines=True)) atau
+# .npz (biner ringkas, np.load) untuk diperiksa di luar aplikasi. Nilai
+# uang dalam rupiah dan belum dibulatkan.
+
+TRACE_FORMAT_JSONL = "jsonl"
+TRACE_FORMAT_BINARY = "npz"
+TRACE_FORMATS = [TRACE_FORMAT_JSONL, TRACE_FORMAT_BINARY]
+
+TRACE_VALUE_COLUMNS = KERNEL_MONEY_COLUMNS + KERNEL_INT_COLUMNS
+TRACE_COLUMNS = ["mesin", "kode", "tahun", "subperiode"] + TRACE_VALUE_COLUMNS
+# Tipe kolom di file .npz (kolom lain int64); uang sen ikut jadi float64
+TRACE_BINARY_DTYPES = {
+    "mesin": str,
+    "kode": str,
+    **{name: np.float64 for name in KERNEL_MONEY_COLUMNS},
+}
+
+
+def new_tracer(asset_codes=None):
+    codes = {str(code).strip() for code in asset_codes or [] if str(code).strip()}
+
+    if not codes:
+        return None
+
+    return {"codes": codes, "chunks": []}
+
+
+def parse_trace_codes(text):
+    # Kode/Nama Aset dipisah koma atau titik koma; spasi di dalam nama tetap
+    return [code.strip() for code in re.split(r"[,;]", str(text or "")) if code.strip()]
+
+
+def trace_mask(tracer, asset_keys):
+    # True untuk aset (urutan asset_keys) yang dilacak
+    if tracer is None:
+        return np.zeros(len(asset_keys), dtype=bool)
+
+    return np.asarray([str(key) in tracer["codes"] for key in asset_keys], dtype=bool)
+
+
+def kernel_trace(tracer, asset_keys, engine, granularity, integer_money=False):
+    # Hook untuk depreciation_kernel(trace=...): posisi aset yang dilacak
+    # (urutan asset_keys) + fungsi pencatat per periode. None jika tidak ada
+    # aset yang dilacak di run ini. integer_money: uang kernel dalam sen.
+    positions = np.flatnonzero(trace_mask(tracer, asset_keys))
+
+    if not len(positions):
+        return None
+
+    keys = [str(key) for key in asset_keys]
+    scale = 100 if integer_money else 1
+
+    def record(period, assets, values):
+        years, subperiods = period_parts(np.full(len(assets), period), granularity)
+        tracer["chunks"].append({
+            "mesin": np.full(len(assets), engine, dtype=object),
+            "kode": np.asarray([keys[i] for i in assets], dtype=object),
+            "tahun": years,
+            "subperiode": subperiods,
+            **{name: np.asarray(values[name]) / scale for name in KERNEL_MONEY_COLUMNS},
+            **{name: np.asarray(values[name]) for name in KERNEL_INT_COLUMNS},
+        })
+
+    return {"positions": positions, "record": record}
+
+
+def trace_frame(tracer):
+    # Semua baris trace sebagai DataFrame, urut kode lalu periode
+    if tracer is None or not tracer["chunks"]:
+        return pd.DataFrame(columns=TRACE_COLUMNS)
+
+    frame = pd.DataFrame({
+        col: np.concatenate([chunk[col] for chunk in tracer["chunks"]])
+        for col in TRACE_COLUMNS
+    })
+
+    return frame.sort_values(["mesin", "kode", "tahun", "subperiode"], kind="stable").reset_index(drop=True)
+
+
+def trace_bytes(tracer, fmt=TRACE_FORMAT_JSONL):
+    frame = trace_frame(tracer)
+
+    if fmt == TRACE_FORMAT_BINARY:
+        buffer = BytesIO()
+        np.savez_compressed(buffer, **{
+            col: frame[col].to_numpy(dtype=TRACE_BINARY_DTYPES.get(col, np.int64))
+            for col in TRACE_COLUMNS
+        })
+        return buffer.getvalue()
+
+    lines = [
+        json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        for record in frame.to_dict("records")
+    ]
+
+    return ("\n".join(lines) + "\n" if lines else "").encode("utf-8")
+
+
+def write_trace(tracer, path):
+    # Format mengikuti ekstensi file: .npz = biner, selain itu JSONL
+    fmt = TRACE_FORMAT_BINARY if str(path).endswith(".npz") else TRACE_FORMAT_JSONL
+
+    with open(path, "wb") as f:
+        f.write(trace_bytes(tracer, fmt))
+
+    return path
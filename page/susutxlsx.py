@@ -0,0 +1,212 @@
+import os
+import re
+import shutil
+import zipfile
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from xlsxwriter.utility import xl_col_to_name
+
+
+# =========================================================
+# SHEET TABEL BESAR: BARIS XML DISISIPKAN KE WORKBOOK JADI
+# =========================================================
+# xlsxwriter menulis sel satu per satu (~10 mikrodetik per sel) dan
+# add_table() tidak tersedia pada mode constant_memory. Untuk sheet berisi
+# jutaan baris, workbook ditulis dulu oleh xlsxwriter dengan sheet
+# "placeholder" (header, lebar kolom, freeze pane), lalu baris data
+# dirender langsung sebagai XML dan disisipkan ke file .xlsx bersama part
+# tabel Excel (filter + banded rows). Sheet lain disalin apa adanya.
+
+CONTENT_TYPES_PART = "[Content_Types].xml"
+TABLE_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.table+xml"
+TABLE_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/table"
+DEFAULT_TABLE_STYLE = "TableStyleLight9"
+
+ROWS_PER_WRITE = 10000
+
+
+def xml_text(value):
+    return escape(str(value))
+
+
+def row_template(kinds, styles=None):
+    # Template str.format untuk isi satu baris. kinds per kolom: "s" teks
+    # (inline string, nilai harus sudah di-escape dengan xml_text) atau "n"
+    # angka; styles: indeks format xlsxwriter (Format.xf_index) atau None.
+    styles = styles or [None] * len(kinds)
+    cells = []
+
+    for kind, style in zip(kinds, styles):
+        style_attr = f' s="{style}"' if style else ""
+
+        if kind == "s":
+            cells.append(f'<c{style_attr} t="inlineStr"><is><t>{{}}</t></is></c>')
+        else:
+            cells.append(f"<c{style_attr}><v>{{}}</v></c>")
+
+    return "".join(cells)
+
+
+def _sheet_parts(zin):
+    # Nama sheet -> path part XML-nya, dari workbook.xml + relasinya
+    workbook_xml = zin.read("xl/workbook.xml").decode("utf-8")
+    rels_xml = zin.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+
+    targets = dict(re.findall(r'<Relationship Id="([^"]+)"[^>]*?Target="([^"]+)"', rels_xml))
+
+    parts = {}
+
+    for name, rel_id in re.findall(r'<sheet name="([^"]+)"[^>]*?r:id="([^"]+)"', workbook_xml):
+        target = targets[rel_id].lstrip("/")
+        parts[name] = target if target.startswith("xl/") else f"xl/{target}"
+
+    return parts
+
+
+def _table_xml(table_id, name, ref, columns, style):
+    column_xml = "".join(
+        f'<tableColumn id="{i}" name="{xml_text(col)}"/>'
+        for i, col in enumerate(columns, start=1)
+    )
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<table xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        f'id="{table_id}" name="{name}" displayName="{name}" ref="{ref}">'
+        f'<autoFilter ref="{ref}"/>'
+        f'<tableColumns count="{len(columns)}">{column_xml}</tableColumns>'
+        f'<tableStyleInfo name="{style}" showFirstColumn="0" showLastColumn="0" '
+        'showRowStripes="1" showColumnStripes="0"/>'
+        "</table>"
+    )
+
+
+def _with_relationship(rels_xml, rel_id, rel_type, target):
+    relationship = f'<Relationship Id="{rel_id}" Type="{rel_type}" Target="{target}"/>'
+
+    if rels_xml is None:
+        return (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f"{relationship}</Relationships>"
+        )
+
+    return rels_xml.replace("</Relationships>", relationship + "</Relationships>")
+
+
+def _write_table_sheet(zout, part, placeholder_xml, table, rel_id):
+    # Placeholder dari xlsxwriter berisi baris header (baris 1). Baris data
+    # disisipkan sebelum </sheetData>, tableParts sebelum </worksheet>.
+    head, tail = placeholder_xml.split("</sheetData>", 1)
+    head = re.sub(r'<dimension ref="[^"]*"/>', f'<dimension ref="{table["ref"]}"/>', head, count=1)
+
+    table_parts = f'<tableParts count="1"><tablePart r:id="{rel_id}"/></tableParts>'
+
+    if "<extLst" in tail:
+        tail = tail.replace("<extLst", table_parts + "<extLst", 1)
+    else:
+        tail = tail.replace("</worksheet>", table_parts + "</worksheet>", 1)
+
+    with zout.open(part, "w", force_zip64=True) as fh:
+        fh.write(head.encode("utf-8"))
+
+        row_number = 2
+        template = '<row r="{}">{}</row>'
+
+        while True:
+            batch = list(islice(table["rows"], ROWS_PER_WRITE))
+
+            if not batch:
+                break
+
+            fh.write("".join([
+                template.format(row_number + i, cells)
+                for i, cells in enumerate(batch)
+            ]).encode("utf-8"))
+            row_number += len(batch)
+
+        fh.write(("</sheetData>" + tail).encode("utf-8"))
+
+    return row_number - 2
+
+
+def splice_table_sheets(xlsx_path, tables, style=DEFAULT_TABLE_STYLE):
+    # tables: daftar dict {"sheet", "name", "columns", "row_count", "rows"}.
+    # "rows" = iterator isi XML per baris (lihat row_template), tepat
+    # row_count baris. Sheet placeholder harus sudah berisi header kolom.
+    tmp_path = xlsx_path + ".splice"
+
+    try:
+        _splice(xlsx_path, tmp_path, tables, style)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    os.replace(tmp_path, xlsx_path)
+
+    return xlsx_path
+
+
+def _splice(xlsx_path, tmp_path, tables, style):
+    with zipfile.ZipFile(xlsx_path) as zin:
+        parts = _sheet_parts(zin)
+        names = set(zin.namelist())
+        by_part = {}
+
+        for table_id, table in enumerate(tables, start=1):
+            part = parts[xml_text(table["sheet"])]
+            last_row = max(table["row_count"], 1) + 1
+            table["ref"] = f"A1:{xl_col_to_name(len(table['columns']) - 1)}{last_row}"
+            table["id"] = table_id
+            by_part[part] = table
+
+        rels_parts = {
+            os.path.dirname(part) + "/_rels/" + os.path.basename(part) + ".rels": part
+            for part in by_part
+        }
+
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zout:
+            for info in zin.infolist():
+                name = info.filename
+
+                if name == CONTENT_TYPES_PART:
+                    content_types = zin.read(name).decode("utf-8")
+                    overrides = "".join(
+                        f'<Override PartName="/xl/tables/table{table["id"]}.xml" '
+                        f'ContentType="{TABLE_CONTENT_TYPE}"/>'
+                        for table in tables
+                    )
+                    zout.writestr(name, content_types.replace("</Types>", overrides + "</Types>"))
+
+                elif name in by_part:
+                    table = by_part[name]
+                    written = _write_table_sheet(
+                        zout, name, zin.read(name).decode("utf-8"), table, "rIdTable1"
+                    )
+
+                    if written != table["row_count"]:
+                        raise ValueError(
+                            f"Sheet {table['sheet']}: {written} baris ditulis, "
+                            f"seharusnya {table['row_count']}."
+                        )
+
+                elif name in rels_parts:
+                    continue
+
+                else:
+                    with zin.open(info) as src, zout.open(name, "w", force_zip64=True) as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+            for rels_part, part in rels_parts.items():
+                table = by_part[part]
+                existing = zin.read(rels_part).decode("utf-8") if rels_part in names else None
+
+                zout.writestr(rels_part, _with_relationship(
+                    existing, "rIdTable1", TABLE_REL_TYPE, f"../tables/table{table['id']}.xml"
+                ))
+                zout.writestr(
+                    f"xl/tables/table{table['id']}.xml",
+                    _table_xml(table["id"], table["name"], table["ref"], table["columns"], style)
+                )
@@ -0,0 +1,302 @@
+import pandas as pd
+
+from page.enginebulanan import (
+    MONEY_MODE_FLOAT,
+    MONEY_MODE_SEN,
+    REPORTING_DATE,
+    parse_mixed_excel_date,
+    to_sen,
+)
+from page.susutcore import cumulative_sen
+
+
+# =========================================================
+# PERHITUNGAN REFERENSI PER ASET (PERULANGAN HALAMAN LAMA)
+# =========================================================
+# Salinan logika per aset halaman tahunan, semesteran dan tahunan per aset
+# sebelum semuanya dipindah ke kernel bersama page.susutcore. Kapitalisasi
+# dan koreksi diterapkan baris demi baris sesuai urutan input. Dipakai
+# tes sebagai pembanding; bukan bagian aplikasi.
+
+def yearly_schedule(initial_cost, acquisition_year, useful_life, reporting_year, capitalizations=(), corrections=()):
+    # batchglyearly: event {"Tahun", "Jumlah", "Tambahan Usia"} / {"Tahun", "Jumlah"}
+    book_value = initial_cost
+    remaining_life = useful_life
+    accumulated_dep = 0
+    schedule = []
+
+    for year in range(acquisition_year, reporting_year + 1):
+        for cap in capitalizations:
+            if cap["Tahun"] == year:
+                book_value += cap.get("Jumlah", 0)
+                remaining_life = min(remaining_life + cap.get("Tambahan Usia", 0), useful_life)
+
+        for corr in corrections:
+            if corr["Tahun"] == year:
+                book_value = max(book_value - corr.get("Jumlah", 0), 0)
+
+        annual_dep = 0
+
+        if remaining_life > 0:
+            annual_dep = book_value / remaining_life
+            accumulated_dep += annual_dep
+            book_value -= annual_dep
+            remaining_life -= 1
+
+        schedule.append({
+            "year": year,
+            "depreciation": round(annual_dep, 2),
+            "accumulated": round(accumulated_dep, 2),
+            "book_value": round(book_value, 2),
+            "sisa_mm": remaining_life,
+        })
+
+    return schedule
+
+
+def semester_key(date):
+    return (date.year, 1 if date.month <= 6 else 2)
+
+
+def semester_schedule(
+    initial_cost,
+    acquisition_date,
+    useful_life,
+    reporting_date,
+    capitalizations=(),
+    corrections=(),
+    require_book_value=False
+):
+    # batchsemesteran (require_book_value=False) dan susutsemester (True):
+    # event {"Tanggal", "Jumlah", "Tambahan Usia"} / {"Tanggal", "Jumlah"}
+    original_life = useful_life * 2
+    remaining_life = original_life
+    book_value = initial_cost
+    accumulated_dep = 0
+    schedule = []
+
+    year, semester = semester_key(acquisition_date)
+    last = semester_key(reporting_date)
+
+    while (year, semester) <= last:
+        for cap in capitalizations:
+            if semester_key(cap["Tanggal"]) == (year, semester):
+                book_value += cap.get("Jumlah", 0)
+                remaining_life = min(remaining_life + cap.get("Tambahan Usia", 0) * 2, original_life)
+
+        for corr in corrections:
+            if semester_key(corr["Tanggal"]) == (year, semester):
+                book_value = max(book_value - corr.get("Jumlah", 0), 0)
+
+        semester_dep = 0
+
+        if remaining_life > 0 and (book_value > 0 or not require_book_value):
+            semester_dep = book_value / remaining_life
+            accumulated_dep += semester_dep
+            book_value -= semester_dep
+            remaining_life -= 1
+
+        schedule.append({
+            "year": year,
+            "semester": semester,
+            "depreciation": round(semester_dep, 2),
+            "accumulated": round(accumulated_dep, 2),
+            "book_value": round(book_value, 2),
+            "sisa_mm": remaining_life,
+        })
+
+        year, semester = (year, 2) if semester == 1 else (year + 1, 1)
+
+    return schedule
+
+
+def single_asset_yearly_schedule(initial_cost, acquisition_year, useful_life, reporting_year, capitalizations=(), corrections=()):
+    # susuttahunan: berhenti saat masa manfaat habis, koreksi tanpa batas 0;
+    # event {"year", "amount", "life_extension"} / {"year", "amount"}
+    book_value = initial_cost
+    remaining_life = useful_life
+    accumulated_dep = 0
+    schedule = []
+    year = acquisition_year
+
+    while remaining_life > 0 and year <= reporting_year:
+        for cap in capitalizations:
+            if cap["year"] == year:
+                book_value += cap["amount"]
+                remaining_life = min(remaining_life + cap.get("life_extension", 0), useful_life)
+
+        for corr in corrections:
+            if corr["year"] == year:
+                book_value -= corr["amount"]
+
+        annual_dep = book_value / remaining_life if remaining_life > 0 else 0
+        accumulated_dep += annual_dep
+        book_value -= annual_dep
+        remaining_life -= 1
+
+        schedule.append({
+            "year": year,
+            "depreciation": round(annual_dep, 2),
+            "accumulated": round(accumulated_dep, 2),
+            "book_value": round(book_value, 2),
+            "sisa_mm": remaining_life,
+        })
+        year += 1
+
+    return schedule
+
+
+# =========================================================
+# PERULANGAN BULANAN PER ASET (MESIN BULANAN LAMA)
+# =========================================================
+# Versi per aset page.enginebulanan sebelum mesin batch dan jalur cepat:
+# bulan demi bulan, event per bulan kalender, uang float atau sen int64.
+# Pembanding mesin batch, jalur cepat dan snapshot di tes.
+
+def calculate_depreciation_monthly(
+    initial_cost,
+    acquisition_date,
+    useful_life_years,
+    reporting_date=REPORTING_DATE,
+    capitalizations=None,
+    corrections=None,
+    money_mode=MONEY_MODE_FLOAT
+):
+    if capitalizations is None:
+        capitalizations = []
+
+    if corrections is None:
+        corrections = []
+
+    acquisition_date = parse_mixed_excel_date(acquisition_date)
+    reporting_date = parse_mixed_excel_date(reporting_date)
+
+    if pd.isna(acquisition_date) or pd.isna(reporting_date):
+        return []
+
+    if acquisition_date > reporting_date:
+        return []
+
+    original_life_months = int(float(useful_life_years) * 12)
+    remaining_life_months = original_life_months
+
+    sen_mode = money_mode == MONEY_MODE_SEN
+
+    if sen_mode:
+        book_value = int(to_sen([initial_cost])[0])
+        accumulated_dep = 0
+        # Basis segmen: nilai buku, sisa umur, bulan berjalan sejak event terakhir
+        segment = [book_value, remaining_life_months, 0]
+
+        def money(value):
+            return value / 100
+    else:
+        book_value = float(initial_cost)
+        accumulated_dep = 0.0
+
+        def money(value):
+            return round(value, 2)
+
+    cap_dict = {}
+
+    for cap in capitalizations:
+        cap_date = parse_mixed_excel_date(cap.get("Tanggal Kapitalisasi"))
+
+        if pd.notna(cap_date) and cap_date <= reporting_date:
+            key = (cap_date.year, cap_date.month)
+            cap_dict.setdefault(key, []).append(cap)
+
+    corr_dict = {}
+
+    for corr in corrections:
+        corr_date = parse_mixed_excel_date(corr.get("Tanggal Koreksi"))
+
+        if pd.notna(corr_date) and corr_date <= reporting_date:
+            key = (corr_date.year, corr_date.month)
+            corr_dict.setdefault(key, []).append(corr)
+
+    current_year = acquisition_date.year
+    current_month = acquisition_date.month
+
+    schedule = []
+
+    while (current_year < reporting_date.year) or (
+        current_year == reporting_date.year and current_month <= reporting_date.month
+    ):
+        current_key = (current_year, current_month)
+
+        kapitalisasi_bulan_ini = 0 if sen_mode else 0.0
+        koreksi_bulan_ini = 0 if sen_mode else 0.0
+        tambahan_usia_bulan_ini = 0
+
+        if current_key in cap_dict:
+            for cap in cap_dict[current_key]:
+                cap_amount = float(cap.get("Jumlah", 0) or 0)
+
+                if sen_mode:
+                    cap_amount = int(to_sen([cap_amount])[0])
+
+                tambahan_usia_tahun = float(cap.get("Tambahan Usia", 0) or 0)
+                tambahan_usia_bulan = int(tambahan_usia_tahun * 12)
+
+                kapitalisasi_bulan_ini += cap_amount
+                tambahan_usia_bulan_ini += tambahan_usia_bulan
+
+            book_value += kapitalisasi_bulan_ini
+
+            remaining_life_months = min(
+                remaining_life_months + tambahan_usia_bulan_ini,
+                original_life_months
+            )
+
+        if current_key in corr_dict:
+            for corr in corr_dict[current_key]:
+                corr_amount = float(corr.get("Jumlah", 0) or 0)
+
+                if sen_mode:
+                    corr_amount = int(to_sen([corr_amount])[0])
+
+                koreksi_bulan_ini += corr_amount
+
+            book_value = max(book_value - koreksi_bulan_ini, 0)
+
+        if sen_mode and (current_key in cap_dict or current_key in corr_dict):
+            segment = [book_value, remaining_life_months, 0]
+
+        monthly_dep = 0 if sen_mode else 0.0
+
+        if remaining_life_months > 0 and book_value > 0:
+            if sen_mode:
+                segment[2] += 1
+                monthly_dep = int(
+                    cumulative_sen(segment[0], segment[1], segment[2])
+                    - cumulative_sen(segment[0], segment[1], segment[2] - 1)
+                )
+            else:
+                monthly_dep = book_value / remaining_life_months
+
+            accumulated_dep += monthly_dep
+            book_value -= monthly_dep
+            remaining_life_months -= 1
+
+        schedule.append({
+            "Tahun": current_year,
+            "Bulan": current_month,
+            "Periode": f"{current_year}-{current_month:02d}",
+            "Kapitalisasi Bulan Ini": money(kapitalisasi_bulan_ini),
+            "Tambahan Usia Bulan Ini": tambahan_usia_bulan_ini,
+            "Koreksi Bulan Ini": money(koreksi_bulan_ini),
+            "Penyusutan Bulan Berjalan": money(monthly_dep),
+            "Akumulasi Penyusutan": money(accumulated_dep),
+            "Nilai Buku Akhir": money(book_value),
+            "Sisa Masa Manfaat (Bulan)": remaining_life_months,
+            "Sisa Masa Manfaat (Tahun)": round(remaining_life_months / 12, 2),
+        })
+
+        current_month += 1
+
+        if current_month > 12:
+            current_month = 1
+            current_year += 1
+
+    return schedule
@@ -0,0 +1,39 @@
+import json
+import os
+
+import batch_penyusutan
+
+
+def crash_worker(*args):
+    # Worker mati mendadak seperti dibunuh OOM killer
+    os._exit(1)
+
+
+def test_find_input_files_ignores_extension_case(tmp_path):
+    for name in ["a.XLSX", "b.Csv", "c.parquet", "~$a.xlsx", "catatan.txt"]:
+        (tmp_path / name).write_bytes(b"")
+
+    found = [os.path.basename(path) for path in batch_penyusutan.find_input_files([str(tmp_path)])]
+
+    assert found == ["a.XLSX", "b.Csv", "c.parquet"]
+
+
+def test_broken_worker_is_reported_as_failed_file(monkeypatch, tmp_path):
+    inputs = tmp_path / "input"
+    output = tmp_path / "output"
+    inputs.mkdir()
+
+    for name in ["a.xlsx", "b.xlsx"]:
+        (inputs / name).write_bytes(b"")
+
+    monkeypatch.setattr(batch_penyusutan, "process_one_file", crash_worker)
+
+    exit_code = batch_penyusutan.main([str(inputs), "--output", str(output), "--workers", "2"])
+
+    with open(output / "ringkasan_run.json", encoding="utf-8") as f:
+        run_summary = json.load(f)
+
+    assert exit_code == batch_penyusutan.EXIT_FILE_FAILED
+    assert run_summary["gagal"] == 2
+    assert [item["status"] for item in run_summary["file"]] == ["gagal", "gagal"]
+    assert all("BrokenProcessPool" in item["error"] for item in run_summary["file"])
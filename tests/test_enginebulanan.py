@@ -0,0 +1,437 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from page import enginebulanan as e
+from page import susutcache, susutspill
+
+import referensi
+
+
+# =========================================================
+# REGISTER UJI: HARGA BERSEN, MASA MANFAAT PECAHAN
+# =========================================================
+# Harga di generator benchmark dibulatkan ribuan sehingga hampir tidak
+# pernah memicu selisih pembulatan float; register di sini sengaja
+# memakai harga dengan sen dan masa manfaat 2,5 / 7,5 tahun.
+
+def make_register(n_assets, event_ratio, seed):
+    rng = np.random.default_rng(seed)
+    codes = [f"A{i:05d}" for i in range(n_assets)]
+
+    acquired = pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 11 * 365, n_assets), unit="D")
+    assets_df = pd.DataFrame({
+        "Kode Aset": codes,
+        "Harga Perolehan Awal (Rp)": np.round(rng.uniform(1e6, 5e9, n_assets), 2),
+        "Tanggal Perolehan": acquired,
+        "Masa Manfaat (tahun)": rng.choice([1, 2.5, 4, 5, 7.5, 10], n_assets),
+    })
+
+    with_events = [code for code, pick in zip(codes, rng.random(n_assets) < event_ratio) if pick]
+    caps, corrs = [], []
+
+    for code in with_events:
+        start = acquired[codes.index(code)]
+        month = start + pd.DateOffset(months=int(rng.integers(0, 24)))
+
+        # Dua kapitalisasi dan dua koreksi di bulan yang sama sengaja dibuat
+        for _ in range(int(rng.integers(1, 3))):
+            caps.append({
+                "Kode Aset": code,
+                "Tanggal Kapitalisasi": month,
+                "Jumlah": round(float(rng.uniform(1e5, 5e8)), 2),
+                "Tambahan Usia": int(rng.integers(0, 2)),
+            })
+
+        for _ in range(int(rng.integers(0, 3))):
+            corrs.append({
+                "Kode Aset": code,
+                "Tanggal Koreksi": month + pd.DateOffset(months=int(rng.integers(0, 3))),
+                "Jumlah": round(float(rng.uniform(-1e8, 8e8)), 2),
+            })
+
+    return (
+        assets_df,
+        pd.DataFrame(caps, columns=["Kode Aset", "Tanggal Kapitalisasi", "Jumlah", "Tambahan Usia"]),
+        pd.DataFrame(corrs, columns=["Kode Aset", "Tanggal Koreksi", "Jumlah"]),
+    )
+
+
+def reference_results(assets_df, capitalizations_df, corrections_df, money_mode):
+    # Ringkasan dan jadwal menurut perulangan per aset (tests/referensi.py)
+    caps = capitalizations_df.to_dict("records")
+    corrs = corrections_df.to_dict("records")
+    results, schedules = {}, {}
+
+    for row in assets_df.to_dict("records"):
+        schedule = referensi.calculate_depreciation_monthly(
+            row["Harga Perolehan Awal (Rp)"],
+            row["Tanggal Perolehan"],
+            row["Masa Manfaat (tahun)"],
+            e.REPORTING_DATE,
+            [cap for cap in caps if cap["Kode Aset"] == row["Kode Aset"]],
+            [corr for corr in corrs if corr["Kode Aset"] == row["Kode Aset"]],
+            money_mode=money_mode
+        )
+
+        if not schedule:
+            continue
+
+        schedule_df = pd.DataFrame(schedule)
+        last = schedule[-1]
+
+        results[row["Kode Aset"]] = {
+            "Periode Pelaporan": last["Periode"],
+            "Beban Penyusutan 2025": round(
+                schedule_df.loc[schedule_df["Tahun"] == e.REPORTING_DATE.year, "Penyusutan Bulan Berjalan"].sum(), 2
+            ),
+            "Akumulasi Penyusutan": last["Akumulasi Penyusutan"],
+            "Nilai Buku Akhir": last["Nilai Buku Akhir"],
+            "Sisa Masa Manfaat (Bulan)": last["Sisa Masa Manfaat (Bulan)"],
+        }
+        schedules[row["Kode Aset"]] = schedule
+
+    return results, schedules
+
+
+def assert_matches_reference(processed, reference):
+    results, schedules = reference
+    store = processed["schedule_store"]
+
+    assert sorted(row["Kode Aset"] for row in processed["results"]) == sorted(results)
+
+    for row in processed["results"]:
+        expected = results[row["Kode Aset"]]
+        assert {key: row[key] for key in expected} == expected, row["Kode Aset"]
+
+    for code, expected in schedules.items():
+        assert e.get_asset_schedule_records(store, code) == expected, code
+
+
+# =========================================================
+# MESIN BATCH + JALUR CEPAT VS PERULANGAN PER ASET
+# =========================================================
+
+@pytest.mark.parametrize("money_mode", e.MONEY_MODES)
+@pytest.mark.parametrize("closed_form", [True, False])
+def test_chunk_matches_monthly_loop(money_mode, closed_form):
+    register = make_register(120, event_ratio=0.4, seed=7)
+    prepared = e.prepare_input_data(*register)
+
+    processed = e.compute_depreciation_chunk(*prepared, closed_form=closed_form, money_mode=money_mode)
+
+    assert_matches_reference(processed, reference_results(*prepared, money_mode))
+
+
+def test_closed_form_only_in_sen_mode():
+    prepared = e.prepare_input_data(*make_register(40, event_ratio=0.0, seed=3))
+
+    float_store = e.compute_depreciation_chunk(*prepared, money_mode=e.MONEY_MODE_FLOAT)["schedule_store"]
+    sen_store = e.compute_depreciation_chunk(*prepared, money_mode=e.MONEY_MODE_SEN)["schedule_store"]
+
+    assert not float_store["is_closed_form"].any()
+    assert sen_store["is_closed_form"].all()
+
+
+def test_closed_form_block_matches_loop_cell_by_cell():
+    # Jadwal jalur cepat (mode sen) dibandingkan per sel dengan perulangan
+    rng = np.random.default_rng(11)
+    n_assets = 200
+    costs = np.round(rng.uniform(1e5, 5e9, n_assets), 2)
+    start_months = rng.integers(2010 * 12, 2025 * 12 + 12, n_assets)
+    life_years = rng.choice([0.5, 1, 2.5, 4, 7.5, 20], n_assets)
+    life_months = np.trunc(life_years * 12).astype(np.int64)
+    end_month = e.REPORTING_DATE.year * 12 + e.REPORTING_DATE.month - 1
+
+    block = e.closed_form_schedule_block(costs, start_months, life_months, end_month)
+    values = e.closed_form_values_at(costs, start_months, life_months, end_month)
+
+    row = 0
+
+    for i in range(n_assets):
+        acquired = pd.Timestamp(year=int(start_months[i] // 12), month=int(start_months[i] % 12 + 1), day=16)
+        expected = referensi.calculate_depreciation_monthly(
+            costs[i], acquired, life_years[i], e.REPORTING_DATE, money_mode=e.MONEY_MODE_SEN
+        )
+
+        for month in expected:
+            for col in e.SCHEDULE_STORE_DTYPES:
+                assert block[col][row] == month[col], (i, col)
+            row += 1
+
+        last = expected[-1]
+        beban = round(sum(m["Penyusutan Bulan Berjalan"] for m in expected if m["Tahun"] == 2025), 2)
+
+        assert values["Akumulasi Penyusutan"][i] == last["Akumulasi Penyusutan"]
+        assert values["Nilai Buku Akhir"][i] == last["Nilai Buku Akhir"]
+        assert values["Sisa Masa Manfaat (Bulan)"][i] == last["Sisa Masa Manfaat (Bulan)"]
+        assert values["beban"][i] == beban
+
+    assert row == len(block["Tahun"])
+
+
+def test_float_mode_example_matches_loop_to_the_cent():
+    # Harga 2.399.940.139,05, perolehan 16/01/2025, masa manfaat 2,5 tahun:
+    # rumus Harga / masa manfaat x 12 bulan meleset Rp0,10 dari perulangan
+    assets_df = pd.DataFrame({
+        "Kode Aset": ["X1"],
+        "Harga Perolehan Awal (Rp)": [2399940139.05],
+        "Tanggal Perolehan": [pd.Timestamp("2025-01-16")],
+        "Masa Manfaat (tahun)": [2.5],
+    })
+    prepared = e.prepare_input_data(assets_df, None, None)
+
+    processed = e.compute_depreciation_chunk(*prepared)
+
+    assert processed["results"][0]["Beban Penyusutan 2025"] == 959976055.58
+    assert_matches_reference(processed, reference_results(*prepared, e.MONEY_MODE_FLOAT))
+
+
+def test_sen_mode_examples_match_hand_computed_values():
+    # Mode sen, dihitung manual: akumulasi bulan ke-j sejak event terakhir
+    # = B x j / R dibulatkan setengah ke atas, penyusutan = selisihnya.
+    # X1: 100.001 sen / 3 bulan -> akumulasi 33.334, 66.667, 100.001.
+    # X2: 120.000 sen / 12 bulan, Maret kapitalisasi Rp100,005 (10.001 sen)
+    # -> B = 110.001 sen, R = 10; bulan ke-5 (Juli) 55.000,5 -> 55.001.
+    assets_df = pd.DataFrame({
+        "Kode Aset": ["X1", "X2"],
+        "Harga Perolehan Awal (Rp)": [1000.01, 1200.0],
+        "Tanggal Perolehan": [pd.Timestamp("2025-01-16"), pd.Timestamp("2025-01-02")],
+        "Masa Manfaat (tahun)": [0.25, 1],
+    })
+    capitalizations_df = pd.DataFrame({
+        "Kode Aset": ["X2"],
+        "Tanggal Kapitalisasi": [pd.Timestamp("2025-03-10")],
+        "Jumlah": [100.005],
+        "Tambahan Usia": [0],
+    })
+    expected = {
+        "X1": [333.34, 333.33, 333.34] + [0.0] * 9,
+        "X2": [100.0, 100.0, 110.0, 110.0, 110.0, 110.0, 110.01, 110.0, 110.0, 110.0, 110.0, 110.0],
+    }
+    prepared = e.prepare_input_data(assets_df, capitalizations_df, None)
+
+    _, schedules = reference_results(*prepared, e.MONEY_MODE_SEN)
+    processed = e.compute_depreciation_chunk(*prepared, money_mode=e.MONEY_MODE_SEN)
+    store = processed["schedule_store"]
+
+    for code, depreciation in expected.items():
+        for schedule in (schedules[code], e.get_asset_schedule_records(store, code)):
+            assert [m["Penyusutan Bulan Berjalan"] for m in schedule] == depreciation, code
+            assert schedule[-1]["Nilai Buku Akhir"] == 0.0, code
+            assert schedule[-1]["Sisa Masa Manfaat (Bulan)"] == 0, code
+
+    assert schedules["X2"][2]["Kapitalisasi Bulan Ini"] == 100.01
+    assert [m["Nilai Buku Akhir"] for m in schedules["X2"][2:4]] == [990.01, 880.01]
+    assert {row["Kode Aset"]: row["Akumulasi Penyusutan"] for row in processed["results"]} == {
+        "X1": 1000.01,
+        "X2": 1300.01,
+    }
+
+
+@pytest.mark.parametrize("money_mode", e.MONEY_MODES)
+def test_snapshots_match_loop_at_each_date(money_mode):
+    prepared = e.prepare_input_data(*make_register(80, event_ratio=0.3, seed=5))
+    dates = ["31/12/2023", "30/06/2025", "31/12/2025"]
+
+    processed = e.compute_depreciation_chunk(*prepared, money_mode=money_mode)
+    snapshots = e.compute_reporting_snapshots(processed["schedule_store"], dates)
+
+    # Jadwal penuh s.d. 31/12/2025 dipotong di tiap tanggal pelaporan
+    _, schedules = reference_results(*prepared, money_mode)
+
+    for snapshot in snapshots:
+        date = pd.to_datetime(snapshot["Tanggal Pelaporan"], format="%d/%m/%Y")
+        rows = [m for m in schedules[snapshot["Kode Aset"]] if (m["Tahun"], m["Bulan"]) <= (date.year, date.month)]
+        beban = pd.Series([m["Penyusutan Bulan Berjalan"] for m in rows if m["Tahun"] == date.year], dtype=float)
+
+        assert snapshot["Periode Pelaporan"] == rows[-1]["Periode"]
+        assert snapshot["Beban Penyusutan Tahun Berjalan"] == round(beban.sum(), 2)
+        assert snapshot["Akumulasi Penyusutan"] == rows[-1]["Akumulasi Penyusutan"]
+        assert snapshot["Nilai Buku Akhir"] == rows[-1]["Nilai Buku Akhir"]
+        assert snapshot["Sisa Masa Manfaat (Bulan)"] == rows[-1]["Sisa Masa Manfaat (Bulan)"]
+
+
+# =========================================================
+# JALUR PARALEL, INKREMENTAL DAN SPILL VS PERULANGAN
+# =========================================================
+
+@pytest.mark.parametrize("money_mode", e.MONEY_MODES)
+@pytest.mark.parametrize("seed", [21, 22])
+def test_parallel_and_incremental_match_monthly_loop(monkeypatch, money_mode, seed):
+    monkeypatch.setattr(e, "MIN_PARALLEL_CHUNK_ROWS", 20)
+    assets_df, caps_df, corrs_df = make_register(150, event_ratio=0.5, seed=seed)
+    prepared = e.prepare_input_data(assets_df, caps_df, corrs_df)
+    reference = reference_results(*prepared, money_mode)
+
+    previous = e.compute_depreciation_incremental(
+        *prepared, parallel=True, max_workers=2, money_mode=money_mode
+    )
+    assert_matches_reference(previous, reference)
+
+    # Satu aset berubah: sisanya dipakai ulang dari hasil sebelumnya
+    changed = assets_df.copy()
+    changed.loc[3, "Harga Perolehan Awal (Rp)"] += 1234.56
+    prepared = e.prepare_input_data(changed, caps_df, corrs_df)
+
+    processed = e.compute_depreciation_incremental(*prepared, previous=previous, money_mode=money_mode)
+
+    assert processed["recomputed_count"] == 1
+    assert_matches_reference(processed, reference_results(*prepared, money_mode))
+
+
+@pytest.mark.parametrize("money_mode", e.MONEY_MODES)
+def test_spilled_schedule_matches_monthly_loop(monkeypatch, tmp_path, money_mode):
+    monkeypatch.setattr(susutspill, "SPILL_DIR", str(tmp_path))
+    prepared = e.prepare_input_data(*make_register(60, event_ratio=0.5, seed=23))
+
+    processed = e.compute_depreciation_chunk(*prepared, money_mode=money_mode, spill_threshold_rows=0)
+
+    try:
+        assert processed["schedule_store"]["spill"] is not None
+        assert_matches_reference(processed, reference_results(*prepared, money_mode))
+    finally:
+        e.release_spill_dir(processed["schedule_store"]["spill"])
+
+
+@pytest.mark.parametrize("money_mode", e.MONEY_MODES)
+def test_spill_keeps_parallel_incremental_and_cache(monkeypatch, tmp_path, money_mode):
+    # Register di atas ambang spill tetap dihitung paralel, memakai ulang
+    # hasil sebelumnya dan masuk cache; jadwalnya tetap di disk
+    monkeypatch.setattr(susutspill, "SPILL_DIR", str(tmp_path / "spill"))
+    monkeypatch.setattr(susutcache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(e, "MIN_PARALLEL_CHUNK_ROWS", 20)
+    assets_df, caps_df, corrs_df = make_register(120, event_ratio=0.5, seed=24)
+    prepared = e.prepare_input_data(assets_df, caps_df, corrs_df)
+
+    previous = e.compute_depreciation_incremental(
+        *prepared, parallel=True, max_workers=2, money_mode=money_mode, spill_threshold_rows=0
+    )
+
+    assert isinstance(previous["schedule_store"]["columns"]["Nilai Buku Akhir"], np.memmap)
+    assert_matches_reference(previous, reference_results(*prepared, money_mode))
+    # Folder blok worker sudah dibersihkan, tinggal folder hasil gabungan
+    assert os.listdir(tmp_path / "spill") == [os.path.basename(previous["schedule_store"]["spill"]["path"])]
+
+    changed = assets_df.copy()
+    changed.loc[5, "Masa Manfaat (tahun)"] = 3
+    prepared = e.prepare_input_data(changed, caps_df, corrs_df)
+
+    processed = e.compute_depreciation_incremental(
+        *prepared, previous=previous, money_mode=money_mode, spill_threshold_rows=0
+    )
+
+    assert processed["recomputed_count"] == 1
+    assert processed["schedule_store"]["spill"] is not None
+    assert_matches_reference(processed, reference_results(*prepared, money_mode))
+
+    e.save_processed_to_cache("kunci", processed)
+    cached = e.load_processed_from_cache("kunci", spill_threshold_rows=0)
+
+    assert isinstance(cached["schedule_store"]["columns"]["Tahun"], np.memmap)
+    assert_matches_reference(cached, reference_results(*prepared, money_mode))
+
+
+# =========================================================
+# EVENT DENGAN JUMLAH KOSONG
+# =========================================================
+
+@pytest.mark.parametrize("money_mode", e.MONEY_MODES)
+def test_event_without_amount_is_anomaly_not_error(money_mode):
+    assets_df, caps_df, corrs_df = make_register(30, event_ratio=0.6, seed=9)
+    code = caps_df["Kode Aset"].iloc[0]
+    broken_caps = caps_df.copy()
+    broken_caps.loc[0, "Jumlah"] = None
+    broken_corrs = pd.concat([corrs_df, pd.DataFrame([{
+        "Kode Aset": code, "Tanggal Koreksi": pd.Timestamp("2025-03-01"), "Jumlah": "abc",
+    }])], ignore_index=True)
+
+    processed = e.compute_depreciation_chunk(
+        *e.prepare_input_data(assets_df, broken_caps, broken_corrs), money_mode=money_mode
+    )
+    clean = e.compute_depreciation_chunk(
+        *e.prepare_input_data(assets_df, caps_df.drop(index=0), corrs_df), money_mode=money_mode
+    )
+
+    # Baris tanpa Jumlah tidak dihitung; aset tetap punya hasil
+    assert processed["results"] == clean["results"]
+    assert [(row["Kode Aset"], row["Jenis Anomali"]) for row in processed["anomaly_rows"]] == [
+        (code, "Jumlah kapitalisasi tidak valid"),
+        (code, "Jumlah koreksi tidak valid"),
+    ]
+
+
+@pytest.mark.parametrize("money_mode", e.MONEY_MODES)
+def test_largest_schedule_assets_ranks_by_schedule_rows(money_mode):
+    prepared = e.prepare_input_data(*make_register(40, event_ratio=0.3, seed=9))
+    processed = e.compute_depreciation_chunk(*prepared, money_mode=money_mode)
+    _, schedules = reference_results(*prepared, money_mode)
+
+    largest = e.largest_schedule_assets(processed["schedule_store"])
+    counts = [row["Baris Jadwal"] for row in largest]
+
+    assert len(largest) == 10
+    assert counts == sorted(counts, reverse=True)
+    assert counts[0] == max(len(schedule) for schedule in schedules.values())
+    assert all(len(schedules[row["Kode Aset"]]) == row["Baris Jadwal"] for row in largest)
+
+
+# =========================================================
+# EXPORT XLSX (DETAIL PANJANG + SHEET ASET TERPILIH)
+# =========================================================
+
+@pytest.mark.parametrize("max_rows", [e.EXCEL_MAX_DATA_ROWS, 700])
+def test_long_detail_export_round_trip(monkeypatch, tmp_path, max_rows):
+    openpyxl = pytest.importorskip("openpyxl")
+    from openpyxl.utils import get_column_letter
+
+    monkeypatch.setattr(e, "EXCEL_MAX_DATA_ROWS", max_rows)
+    prepared = e.prepare_input_data(*make_register(30, event_ratio=0.3, seed=21))
+    processed = e.compute_depreciation_chunk(*prepared, money_mode=e.MONEY_MODE_SEN)
+    store = processed["schedule_store"]
+    selected = [store["codes"][3], store["codes"][17]]
+
+    output_path = e.write_kkp_workbook_streaming(
+        str(tmp_path / "kkp.xlsx"),
+        processed["results"],
+        store,
+        export_mode=e.EXPORT_MODE_LONG_DETAIL,
+        selected_codes=selected
+    )
+    workbook = openpyxl.load_workbook(output_path)
+
+    # Sheet aset hanya untuk kode terpilih, sisanya ada di sheet Detail
+    for code in selected:
+        ws = workbook[e.safe_sheet_name(code)]
+        assert ws["B1"].value == code
+        assert ws.max_row == 3 + len(e.get_asset_schedule_rows(store, code))
+
+    assert workbook.sheetnames == [
+        "Ringkasan", *e.long_detail_sheet_names(store), *map(e.safe_sheet_name, selected), "Reviu Hasil"
+    ]
+
+    total_rows = int(e.schedule_row_counts(store).sum())
+    detail_rows = []
+    last_column = get_column_letter(len(e.DETAIL_COLUMNS))
+
+    for name in e.long_detail_sheet_names(store):
+        ws = workbook[name]
+        rows = list(ws.iter_rows(min_row=2, values_only=True))
+        table = ws.tables[name.replace(" ", "_")]
+
+        assert len(rows) <= max_rows
+        assert table.ref == f"A1:{last_column}{len(rows) + 1}"
+        assert [cell.value for cell in ws[1]] == e.DETAIL_COLUMNS
+        detail_rows.extend(rows)
+
+    assert len(detail_rows) == total_rows
+
+    expected = [
+        (code, *row)
+        for code in store["codes"]
+        for row in e.get_asset_schedule_rows(store, code)
+    ]
+    assert [row[0] for row in detail_rows] == [row[0] for row in expected]
+    assert [row[7] for row in detail_rows] == [pytest.approx(row[7]) for row in expected]
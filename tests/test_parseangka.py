@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from page.parseangka import parse_indonesian_number, parse_indonesian_numbers
+
+
+CELLS = [
+    "Rp 1.234.567,89", "(2.500,5)", "-", "—", "12,5%", "", "  ", "abc",
+    "1.000Rekalkulasi:1.100", 12.5, 7, np.float64(0.25), np.nan, True,
+]
+
+
+def test_numeric_cells_pass_through():
+    assert parse_indonesian_number(12.5) == 12.5
+    assert parse_indonesian_number(1234) == 1234.0
+    assert parse_indonesian_number(np.int64(3)) == 3.0
+    assert parse_indonesian_number(float("nan")) is None
+    assert parse_indonesian_number(True) is None
+
+
+@pytest.mark.parametrize("dash_as_zero", [True, False])
+def test_scalar_matches_column(dash_as_zero):
+    numbers, _ = parse_indonesian_numbers(CELLS, dash_as_zero=dash_as_zero)
+
+    for cell, number in zip(CELLS, numbers):
+        scalar = parse_indonesian_number(cell, dash_as_zero=dash_as_zero)
+        assert (scalar is None and np.isnan(number)) or scalar == number, cell
@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from page import enginebulanan as e
+from page import susutcache
+
+from tests.test_enginebulanan import make_register
+
+
+@pytest.fixture
+def cache_dir(monkeypatch, tmp_path):
+    path = str(tmp_path / "cache")
+    monkeypatch.setattr(susutcache, "CACHE_DIR", path)
+    return path
+
+
+# =========================================================
+# SIMPAN / MUAT HASIL PERHITUNGAN
+# =========================================================
+
+@pytest.mark.parametrize("money_mode", e.MONEY_MODES)
+def test_cached_run_round_trip_equals_processed(cache_dir, money_mode):
+    assets_df, caps_df, corrs_df = make_register(40, event_ratio=0.5, seed=31)
+    # Satu baris dilewati dan satu anomali agar semua tabel ikut tersimpan
+    assets_df.loc[2, "Harga Perolehan Awal (Rp)"] = np.nan
+    caps_df.loc[0, "Jumlah"] = np.nan
+    processed = e.compute_depreciation_incremental(
+        *e.prepare_input_data(assets_df, caps_df, corrs_df), money_mode=money_mode
+    )
+
+    e.save_processed_to_cache("kunci", processed)
+    cached = e.load_processed_from_cache("kunci")
+
+    assert processed["skipped_rows"] and processed["anomaly_rows"]
+    assert cached["from_cache"]
+    assert cached["results"] == processed["results"]
+    assert cached["skipped_rows"] == processed["skipped_rows"]
+    assert cached["anomaly_rows"] == processed["anomaly_rows"]
+    assert cached["total_rows"] == processed["total_rows"]
+    assert cached["fingerprints"] == processed["fingerprints"]
+
+    store, cached_store = processed["schedule_store"], cached["schedule_store"]
+
+    assert cached_store["codes"] == store["codes"]
+    assert cached_store["end_month"] == store["end_month"]
+    assert cached_store["money_mode"] == money_mode
+    assert np.array_equal(cached_store["is_closed_form"], store["is_closed_form"])
+
+    for code in store["codes"]:
+        assert e.get_asset_schedule_records(cached_store, code) == e.get_asset_schedule_records(store, code), code
+
+
+# =========================================================
+# KUNCI CACHE
+# =========================================================
+
+def test_cache_key_misses_when_run_settings_change(cache_dir, monkeypatch):
+    file_bytes = b"register aset"
+    processed = e.compute_depreciation_incremental(*e.prepare_input_data(*make_register(5, 0.0, seed=1)))
+    key = e.run_cache_key(file_bytes)
+    e.save_processed_to_cache(key, processed)
+
+    assert e.run_cache_key(file_bytes) == key
+    assert e.load_processed_from_cache(key) is not None
+
+    assert e.load_processed_from_cache(e.run_cache_key(file_bytes, money_mode=e.MONEY_MODE_SEN)) is None
+    assert e.load_processed_from_cache(e.run_cache_key(b"register aset baru")) is None
+
+    with monkeypatch.context() as patch:
+        patch.setattr(e, "REPORTING_DATE", e.REPORTING_DATE - pd.offsets.MonthEnd(1))
+        assert e.load_processed_from_cache(e.run_cache_key(file_bytes)) is None
+
+    with monkeypatch.context() as patch:
+        patch.setattr(e, "ENGINE_VERSION", e.ENGINE_VERSION + "-uji")
+        assert e.load_processed_from_cache(e.run_cache_key(file_bytes)) is None
+
+
+# =========================================================
+# EVIKSI LRU
+# =========================================================
+
+def save_entry(key, cache_dir, max_mb=None):
+    return susutcache.save_cached_run(
+        "uji", key, arrays={"nilai": np.arange(2000, dtype=np.float64)},
+        cache_dir=cache_dir, max_mb=max_mb
+    )
+
+
+def test_eviction_removes_least_recently_used_first(tmp_path):
+    cache_dir = str(tmp_path)
+
+    for key, last_used in [("a", 100), ("b", 200), ("c", 300)]:
+        path = save_entry(key, cache_dir)
+        os.utime(os.path.join(path, susutcache.META_FILE), (last_used, last_used))
+
+    entry_mb = susutcache._dir_size(path) / (1024 * 1024)
+
+    # Memuat "a" menjadikannya entri terbaru, sehingga "b" yang dihapus lebih dulu
+    assert susutcache.load_cached_run("uji", "a", cache_dir=cache_dir) is not None
+    assert susutcache.evict_cache("uji", cache_dir=cache_dir, max_mb=entry_mb * 2.5) == ["b"]
+    assert susutcache.evict_cache("uji", cache_dir=cache_dir, max_mb=entry_mb * 1.5) == ["c"]
+    assert sorted(os.listdir(tmp_path / "uji")) == ["a"]
+
+    # Entri yang baru disimpan tidak ikut terhapus walau melebihi batas
+    save_entry("d", cache_dir, max_mb=entry_mb * 0.5)
+
+    assert sorted(os.listdir(tmp_path / "uji")) == ["d"]
+    assert susutcache.has_cached_run("uji", "d", cache_dir=cache_dir)
+    assert not susutcache.has_cached_run("uji", "a", cache_dir=cache_dir)
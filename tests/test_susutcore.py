@@ -0,0 +1,241 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from page import batchglyearly, batchsemesteran, susutsemester, susuttahunan
+from page.susutcore import PERIOD_ANNUAL, PERIOD_SEMESTER, depreciation_kernel, event_table, kernel_schedule_records
+
+import referensi
+
+
+# =========================================================
+# EVENT DALAM SATU PERIODE: BARIS DEMI BARIS VS DIJUMLAH
+# =========================================================
+
+def test_two_capitalizations_same_year_applied_row_by_row():
+    # (2013,52 + 32,87) + 15,285 = 2061,67...; 2013,52 + (32,87 + 15,285)
+    # jatuh tepat di 2061,675 dan dibulatkan ke 2061,68
+    caps = [
+        {"Tahun": 2014, "Jumlah": 32.87, "Tambahan Usia": 0},
+        {"Tahun": 2014, "Jumlah": 15.285, "Tambahan Usia": 0},
+    ]
+
+    schedule = batchglyearly.calculate_depreciation(2013.52, 2014, 1, 2014, caps)
+
+    assert schedule == referensi.yearly_schedule(2013.52, 2014, 1, 2014, caps)
+    assert schedule[0]["depreciation"] == 2061.67
+
+
+def test_corrections_same_year_clamped_per_row():
+    # 100 - 150 -> 0 (batas 0), lalu 0 - (-30) -> 30; dijumlah dulu akan
+    # memberi 100 - 120 -> 0
+    corrs = [{"Tahun": 2020, "Jumlah": 150.0}, {"Tahun": 2020, "Jumlah": -30.0}]
+
+    schedule = batchglyearly.calculate_depreciation(100.0, 2020, 3, 2021, None, corrs)
+
+    assert schedule == referensi.yearly_schedule(100.0, 2020, 3, 2021, (), corrs)
+    assert schedule[0]["depreciation"] == 10.0
+    assert schedule[-1]["book_value"] == 10.0
+
+
+def test_semester_pages_apply_events_row_by_row():
+    date = pd.Timestamp
+    caps = [
+        {"Tanggal": date("2019-03-01"), "Jumlah": 0.1, "Tambahan Usia": 1},
+        {"Tanggal": date("2019-05-01"), "Jumlah": 0.2, "Tambahan Usia": 1},
+    ]
+    corrs = [
+        {"Tanggal": date("2019-02-01"), "Jumlah": 5e6},
+        {"Tanggal": date("2019-06-30"), "Jumlah": -1234.56},
+    ]
+    args = (3e6 + 0.7, date("2017-08-17"), 4, date("2021-12-31"))
+
+    assert batchsemesteran.calculate_depreciation(*args, caps, corrs) == referensi.semester_schedule(
+        *args, caps, corrs
+    )
+    assert susutsemester.calculate_depreciation(*args, caps, corrs) == referensi.semester_schedule(
+        *args, caps, corrs, require_book_value=True
+    )
+
+
+def test_single_asset_page_applies_unclamped_corrections_row_by_row():
+    # (5732,265 - 6,555) - 2,265 dan 5732,265 - (6,555 + 2,265) dibulatkan
+    # ke sen yang berbeda
+    caps = [{"year": 2012, "amount": 20.425, "life_extension": 0}]
+    corrs = [{"year": 2012, "amount": 6.555}, {"year": 2012, "amount": 2.265}]
+    args = (5711.84, 2012, 1, 2012)
+
+    schedule = susuttahunan.calculate_depreciation(*args, caps, corrs)
+
+    assert schedule == referensi.single_asset_yearly_schedule(*args, caps, corrs)
+    assert schedule[0]["depreciation"] == round(((5711.84 + 20.425) - 6.555) - 2.265, 2)
+
+
+def test_kernel_per_row_events_follow_input_order():
+    # Urutan baris input dalam satu periode menentukan hasil batas 0
+    def book_values(amounts):
+        corrections = event_table(np.zeros(len(amounts)), np.zeros(len(amounts)), amounts)
+        schedule = depreciation_kernel(
+            [100.0], [0], 0, [1],
+            corrections=corrections,
+            per_row_events=True,
+            require_book_value=False
+        )
+        return schedule["koreksi"][0], schedule["penyusutan"][0]
+
+    assert book_values([150.0, -30.0]) == (120.0, 30.0)
+    assert book_values([-30.0, 150.0]) == (120.0, 0.0)
+
+
+def test_kernel_sums_events_without_per_row():
+    corrections = event_table(np.zeros(2), np.zeros(2), [150.0, -30.0])
+    schedule = depreciation_kernel([100.0], [0], 0, [1], corrections=corrections, require_book_value=False)
+
+    assert kernel_schedule_records(schedule, PERIOD_ANNUAL)[0][0]["depreciation"] == 0.0
+
+
+# =========================================================
+# REGISTER ACAK: HALAMAN TAHUNAN & SEMESTERAN VS REFERENSI
+# =========================================================
+# Beberapa kapitalisasi/koreksi di periode yang sama, nilai setengah sen,
+# koreksi besar (memicu batas 0) dan koreksi negatif sengaja dibuat.
+
+def make_page_register(n_assets, seed):
+    rng = np.random.default_rng(seed)
+    names = [f"Aset Kantor {i}" for i in range(n_assets)]
+    acquired = pd.Timestamp("2008-01-01") + pd.to_timedelta(rng.integers(0, 15 * 365, n_assets), unit="D")
+    reporting = [
+        max(date, pd.Timestamp("2024-12-31") - pd.DateOffset(months=int(months)))
+        for date, months in zip(acquired, rng.integers(0, 60, n_assets))
+    ]
+    assets_df = pd.DataFrame({
+        "Nama Aset": names,
+        "Harga Perolehan Awal (Rp)": np.round(rng.uniform(1e3, 5e9, n_assets), 3),
+        "Tanggal Perolehan": acquired,
+        "Masa Manfaat (tahun)": rng.integers(1, 21, n_assets),
+        "Tanggal Pelaporan": pd.DatetimeIndex(reporting),
+    })
+    caps, corrs = [], []
+
+    for name, start, cost in zip(names, acquired, assets_df["Harga Perolehan Awal (Rp)"]):
+        if rng.random() < 0.3:
+            continue
+
+        date = start + pd.DateOffset(months=int(rng.integers(0, 48)))
+
+        for _ in range(int(rng.integers(1, 4))):
+            caps.append({
+                "Nama Aset": name,
+                "Tanggal": date + pd.DateOffset(days=int(rng.integers(0, 30))),
+                "Jumlah": round(float(rng.uniform(0, cost)), 3),
+                "Tambahan Usia": int(rng.integers(0, 3)),
+            })
+
+        for _ in range(int(rng.integers(0, 4))):
+            corrs.append({
+                "Nama Aset": name,
+                "Tanggal": date + pd.DateOffset(months=int(rng.integers(0, 2))),
+                "Jumlah": round(float(rng.uniform(-0.2, 1.5) * cost), 3),
+            })
+
+    return (
+        assets_df,
+        pd.DataFrame(caps, columns=["Nama Aset", "Tanggal", "Jumlah", "Tambahan Usia"]),
+        pd.DataFrame(corrs, columns=["Nama Aset", "Tanggal", "Jumlah"]),
+    )
+
+
+def events_of(events_df, name):
+    return events_df[events_df["Nama Aset"] == name].to_dict("records")
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_yearly_page_matches_reference_on_register(seed):
+    assets_df, caps_df, corrs_df = make_page_register(150, seed)
+    assets_df = assets_df.assign(
+        **{
+            "Tahun Perolehan": assets_df["Tanggal Perolehan"].dt.year,
+            "Tahun Pelaporan": assets_df["Tanggal Pelaporan"].dt.year,
+        }
+    )
+    caps_df = caps_df.assign(Tahun=caps_df["Tanggal"].dt.year)
+    corrs_df = corrs_df.assign(Tahun=corrs_df["Tanggal"].dt.year)
+
+    results, schedules = batchglyearly.compute_depreciation(assets_df, caps_df, corrs_df)
+
+    for asset, result in zip(assets_df.to_dict("records"), results):
+        expected = referensi.yearly_schedule(
+            asset["Harga Perolehan Awal (Rp)"],
+            asset["Tahun Perolehan"],
+            asset["Masa Manfaat (tahun)"],
+            asset["Tahun Pelaporan"],
+            events_of(caps_df, asset["Nama Aset"]),
+            events_of(corrs_df, asset["Nama Aset"]),
+        )
+
+        assert schedules[asset["Nama Aset"]] == expected, asset["Nama Aset"]
+        assert (result["Penyusutan"], result["Akumulasi"], result["Nilai Buku"]) == (
+            expected[-1]["depreciation"], expected[-1]["accumulated"], expected[-1]["book_value"]
+        )
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_semester_pages_match_reference_on_register(seed):
+    assets_df, caps_df, corrs_df = make_page_register(150, seed)
+    names = assets_df["Nama Aset"].tolist()
+
+    results, schedules = batchsemesteran.compute_depreciation(assets_df, caps_df, corrs_df)
+    gl_schedules = kernel_schedule_records(
+        susutsemester.compute_schedules(
+            assets_df["Harga Perolehan Awal (Rp)"].to_numpy(dtype=float),
+            assets_df["Tanggal Perolehan"],
+            assets_df["Masa Manfaat (tahun)"].to_numpy(dtype=float),
+            assets_df["Tanggal Pelaporan"],
+            names,
+            caps_df,
+            corrs_df
+        ),
+        PERIOD_SEMESTER
+    )
+
+    for asset, result, gl_schedule in zip(assets_df.to_dict("records"), results, gl_schedules):
+        args = (
+            asset["Harga Perolehan Awal (Rp)"],
+            asset["Tanggal Perolehan"],
+            asset["Masa Manfaat (tahun)"],
+            asset["Tanggal Pelaporan"],
+            events_of(caps_df, asset["Nama Aset"]),
+            events_of(corrs_df, asset["Nama Aset"]),
+        )
+        expected = referensi.semester_schedule(*args)
+        reporting_year = asset["Tanggal Pelaporan"].year
+
+        assert schedules[asset["Nama Aset"]] == expected, asset["Nama Aset"]
+        assert result["Penyusutan"] == round(
+            sum(row["depreciation"] for row in expected if row["year"] == reporting_year), 2
+        )
+        assert (result["Akumulasi"], result["Nilai Buku"]) == (
+            expected[-1]["accumulated"], expected[-1]["book_value"]
+        )
+        assert gl_schedule == referensi.semester_schedule(*args, require_book_value=True), asset["Nama Aset"]
+
+
+def test_single_asset_page_matches_reference_on_random_inputs():
+    rng = np.random.default_rng(4)
+
+    for _ in range(200):
+        cost = round(float(rng.uniform(1e3, 1e9)), 3)
+        acquired = int(rng.integers(2000, 2020))
+        year = lambda: int(acquired + rng.integers(0, 5))
+        caps = [
+            {"year": year(), "amount": round(float(rng.uniform(0, cost)), 3), "life_extension": int(rng.integers(0, 3))}
+            for _ in range(int(rng.integers(0, 4)))
+        ]
+        corrs = [
+            {"year": year(), "amount": round(float(rng.uniform(-0.2, 1.5) * cost), 3)}
+            for _ in range(int(rng.integers(0, 4)))
+        ]
+        args = (cost, acquired, int(rng.integers(1, 15)), int(rng.integers(acquired, 2026)))
+
+        assert susuttahunan.calculate_depreciation(*args, caps, corrs) == \
+            referensi.single_asset_yearly_schedule(*args, caps, corrs), args
@@ -0,0 +1,69 @@
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+from page import enginebulanan as e
+
+
+def register_frame():
+    return pd.DataFrame({
+        "Kode Aset": ["0012", "0013", "0014"],
+        "Harga Perolehan Awal (Rp)": [2500000.50, 1250000.0, 480000.25],
+        "Tanggal Perolehan": ["15/03/2019", "01/01/2021", "31/07/2022"],
+        "Masa Manfaat (tahun)": [4, 8, 5],
+        "Keterangan": ["Laptop", "Gedung", "Meja"],
+    })
+
+
+def assert_same_results(read, expected):
+    assets_df, capitalizations_df, corrections_df, _, _ = read
+    processed = e.compute_depreciation_chunk(*e.prepare_input_data(assets_df, capitalizations_df, corrections_df))
+    reference = e.compute_depreciation_chunk(
+        *e.prepare_input_data(expected, e.get_empty_capitalization_df(), e.get_empty_correction_df())
+    )
+
+    assert assets_df["Kode Aset"].tolist() == expected["Kode Aset"].tolist()
+    assert assets_df["Harga Perolehan Awal (Rp)"].tolist() == expected["Harga Perolehan Awal (Rp)"].tolist()
+    assert processed["results"] == reference["results"]
+    assert len(processed["results"]) == len(expected)
+
+
+# =========================================================
+# CSV (DELIMITER , DAN ;) DAN PARQUET
+# =========================================================
+
+def test_semicolon_csv_reads_decimal_comma_amounts():
+    expected = register_frame()
+    text = (
+        "Kode Aset;Harga Perolehan Awal (Rp);Tanggal Perolehan;Masa Manfaat (tahun);Keterangan\n"
+        "0012;2500000,50;15/03/2019;4;Laptop\n"
+        "0013;1.250.000,00;01/01/2021;8;Gedung\n"
+        "0014;480.000,25;31/07/2022;5;Meja\n"
+    )
+
+    read = e.read_register_from_bytes(text.encode("utf-8"), "register.csv")
+
+    assert read[4][0]["Reader"] == "csv (';')"
+    assert_same_results(read, expected)
+
+
+def test_comma_csv_keeps_decimal_point_amounts():
+    expected = register_frame()
+
+    read = e.read_register_from_bytes(expected.to_csv(index=False).encode("utf-8"), "register.csv")
+
+    assert_same_results(read, expected)
+
+
+def test_parquet_reads_only_needed_columns():
+    pytest.importorskip("pyarrow")
+    expected = register_frame()
+    buffer = BytesIO()
+    expected.to_parquet(buffer, index=False)
+
+    read = e.read_register_from_bytes(buffer.getvalue(), "register.parquet")
+
+    assert "Keterangan" not in read[0].columns
+    assert read[4][0]["Kolom Dibaca"] == 4
+    assert_same_results(read, expected)
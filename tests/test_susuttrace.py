@@ -0,0 +1,158 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from page import enginebulanan as e
+from page import batchglyearly
+from page.susutcore import round_money
+from page.susuttrace import (
+    TRACE_COLUMNS,
+    TRACE_FORMAT_BINARY,
+    TRACE_FORMAT_JSONL,
+    new_tracer,
+    parse_trace_codes,
+    trace_frame,
+    write_trace,
+)
+
+from tests.test_enginebulanan import make_register, reference_results
+
+
+def test_parse_trace_codes_keeps_spaces_in_names():
+    assert parse_trace_codes(" Gedung Kantor A; Mobil Dinas,B 12 ,, ") == ["Gedung Kantor A", "Mobil Dinas", "B 12"]
+    assert parse_trace_codes("") == []
+    assert new_tracer(parse_trace_codes(" ; ")) is None
+
+
+def assert_trace_matches_schedule(frame, schedules):
+    assert sorted(frame["kode"].unique()) == sorted(schedules)
+
+    for code, schedule in schedules.items():
+        rows = frame[frame["kode"] == code]
+
+        assert rows["tahun"].tolist() == [m["Tahun"] for m in schedule], code
+        assert rows["subperiode"].tolist() == [m["Bulan"] for m in schedule], code
+        assert round_money(rows["penyusutan"]).tolist() == [m["Penyusutan Bulan Berjalan"] for m in schedule], code
+        assert round_money(rows["akumulasi"]).tolist() == [m["Akumulasi Penyusutan"] for m in schedule], code
+        assert round_money(rows["nilai_buku"]).tolist() == [m["Nilai Buku Akhir"] for m in schedule], code
+        assert rows["sisa_umur"].tolist() == [m["Sisa Masa Manfaat (Bulan)"] for m in schedule], code
+
+
+# =========================================================
+# TRACE MESIN BULANAN
+# =========================================================
+
+@pytest.mark.parametrize("money_mode", e.MONEY_MODES)
+def test_monthly_trace_matches_schedule(money_mode):
+    prepared = e.prepare_input_data(*make_register(60, event_ratio=0.3, seed=13))
+    codes = prepared[0]["Kode Aset"].iloc[[0, 7, 21, 40]].tolist()
+    tracer = new_tracer(codes)
+
+    traced = e.compute_depreciation_chunk(*prepared, money_mode=money_mode, tracer=tracer)
+    plain = e.compute_depreciation_chunk(*prepared, money_mode=money_mode)
+
+    # Hasil sama persis dengan trace hidup atau mati
+    assert traced["results"] == plain["results"]
+
+    _, schedules = reference_results(*prepared, money_mode)
+    frame = trace_frame(tracer)
+
+    assert set(frame["mesin"]) == {"bulanan"}
+    assert_trace_matches_schedule(frame, {code: schedules[code] for code in codes})
+
+
+def test_traced_asset_leaves_closed_form_in_sen_mode():
+    prepared = e.prepare_input_data(*make_register(10, event_ratio=0.0, seed=3))
+    code = prepared[0]["Kode Aset"].iloc[4]
+    tracer = new_tracer([code])
+
+    processed = e.compute_depreciation_chunk(*prepared, money_mode=e.MONEY_MODE_SEN, tracer=tracer)
+    closed = dict(zip(processed["schedule_store"]["codes"], processed["schedule_store"]["is_closed_form"]))
+
+    assert not closed[code]
+    assert sum(closed.values()) == len(closed) - 1
+
+    _, schedules = reference_results(*prepared, e.MONEY_MODE_SEN)
+    assert_trace_matches_schedule(trace_frame(tracer), {code: schedules[code]})
+
+
+def test_parallel_and_incremental_collect_trace(monkeypatch):
+    monkeypatch.setattr(e, "MIN_PARALLEL_CHUNK_ROWS", 10)
+    prepared = e.prepare_input_data(*make_register(60, event_ratio=0.3, seed=17))
+    codes = prepared[0]["Kode Aset"].iloc[[2, 33, 59]].tolist()
+    _, schedules = reference_results(*prepared, e.MONEY_MODE_FLOAT)
+    expected = {code: schedules[code] for code in codes}
+
+    tracer = new_tracer(codes)
+    previous = e.compute_depreciation_incremental(*prepared, parallel=True, max_workers=2, tracer=tracer)
+    assert_trace_matches_schedule(trace_frame(tracer), expected)
+
+    # Register tidak berubah: aset lain dipakai ulang, aset yang dilacak dihitung ulang
+    tracer = new_tracer(codes)
+    processed = e.compute_depreciation_incremental(*prepared, previous=previous, tracer=tracer)
+
+    assert processed["recomputed_count"] == len(codes)
+    assert_trace_matches_schedule(trace_frame(tracer), expected)
+
+
+# =========================================================
+# TRACE HALAMAN TAHUNAN + FILE
+# =========================================================
+
+def yearly_register():
+    assets_df = pd.DataFrame({
+        "Nama Aset": ["Gedung Kantor A", "Mobil Dinas"],
+        "Harga Perolehan Awal (Rp)": [1250000.55, 480000.0],
+        "Tahun Perolehan": [2015, 2019],
+        "Masa Manfaat (tahun)": [8, 5],
+        "Tahun Pelaporan": [2024, 2024],
+    })
+    capitalizations_df = pd.DataFrame({
+        "Nama Aset": ["Gedung Kantor A", "Gedung Kantor A"],
+        "Tahun": [2018, 2018],
+        "Jumlah": [150000.25, 20000.0],
+        "Tambahan Usia": [2, 0],
+    })
+    corrections_df = pd.DataFrame({"Nama Aset": ["Mobil Dinas"], "Tahun": [2021], "Jumlah": [30000.0]})
+    return assets_df, capitalizations_df, corrections_df
+
+
+def test_yearly_trace_matches_schedule():
+    tracer = new_tracer(parse_trace_codes("Gedung Kantor A"))
+
+    traced = batchglyearly.compute_depreciation(*yearly_register(), tracer=tracer)
+    plain = batchglyearly.compute_depreciation(*yearly_register())
+
+    assert traced == plain
+
+    frame = trace_frame(tracer)
+    schedule = traced[1]["Gedung Kantor A"]
+
+    assert frame["kode"].unique().tolist() == ["Gedung Kantor A"]
+    assert frame["tahun"].tolist() == [row["year"] for row in schedule]
+    assert round_money(frame["nilai_buku"]).tolist() == [row["book_value"] for row in schedule]
+    assert frame["sisa_umur"].tolist() == [row["sisa_mm"] for row in schedule]
+    assert frame.loc[frame["tahun"] == 2018, "kapitalisasi"].iloc[0] == pytest.approx(170000.25)
+
+
+def test_write_trace_round_trip(tmp_path):
+    prepared = e.prepare_input_data(*make_register(20, event_ratio=0.5, seed=2))
+    tracer = new_tracer(prepared[0]["Kode Aset"].iloc[[1, 5]].tolist())
+    e.compute_depreciation_chunk(*prepared, tracer=tracer)
+    frame = trace_frame(tracer)
+
+    jsonl_path = write_trace(tracer, str(tmp_path / f"trace.{TRACE_FORMAT_JSONL}"))
+    npz_path = write_trace(tracer, str(tmp_path / f"trace.{TRACE_FORMAT_BINARY}"))
+
+    with open(jsonl_path, encoding="utf-8") as f:
+        first = json.loads(f.readline())
+
+    assert list(first) == TRACE_COLUMNS
+    pd.testing.assert_frame_equal(pd.read_json(jsonl_path, lines=True), frame, check_dtype=False)
+
+    with np.load(npz_path) as data:
+        assert data["kode"].tolist() == frame["kode"].tolist()
+        assert np.array_equal(data["nilai_buku"], frame["nilai_buku"].to_numpy(dtype=float))
+        assert np.array_equal(data["sisa_umur"], frame["sisa_umur"].to_numpy(dtype=np.int64))